@@ -6,16 +6,38 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Logging no bloqueante (antes de que nada use app.logger)
+    from app.logging_setup import init_logging
+    init_logging(app)
+    
     # Registrar blueprints
     from app.routes.auth_routes import auth_bp
     from app.routes.user_routes import user_bp
     from app.routes.admin_routes import admin_bp
     from app.routes.notification_routes import notification_bp
+    from app.routes.metrics_routes import metrics_bp
     
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(user_bp, url_prefix='/user')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(notification_bp, url_prefix='/notifications')
+    app.register_blueprint(metrics_bp)
+    
+    # Conteo de llamadas al backend por petición
+    from app.repositories.supabase.instrumentation import register_backend_tracing
+    register_backend_tracing(app)
+    
+    # Métricas de latencia por endpoint (expuestas en /metrics)
+    from app import metrics
+    metrics.init_app(app)
+    
+    # Perfilado bajo demanda para administradores
+    from app import profiling
+    profiling.init_app(app)
+    
+    # Invalidaciones de caché publicadas por otras instancias
+    from app.repositories.supabase import invalidation
+    invalidation.init_app(app)
     
     # Ruta principal
     @app.route('/')
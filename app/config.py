@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -17,6 +18,78 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SUPABASE_URL = os.environ.get('SUPABASE_URL') or ''
     SUPABASE_KEY = os.environ.get('SUPABASE_KEY') or ''
+
+    # Backend de datos: 'supabase' (por defecto), 'postgres' (conexión directa con pool, ver
+    # repositories/postgres) o 'memory' (tablas en memoria para benchmarks/pruebas)
+    DATA_BACKEND = os.environ.get('DATA_BACKEND', 'supabase').lower()
+    MEMORY_BACKEND_LATENCY_MS = float(os.environ.get('MEMORY_BACKEND_LATENCY_MS', '0'))
+    MEMORY_BACKEND_SEED = os.environ.get('MEMORY_BACKEND_SEED') or ''
+
+    # Cliente HTTP de PostgREST (httpx): conexiones por proceso, timeouts en segundos y keep-alive.
+    # SUPABASE_HTTP2=True requiere `pip install h2`
+    SUPABASE_HTTP_MAX_CONNECTIONS = int(os.environ.get('SUPABASE_HTTP_MAX_CONNECTIONS', 20))
+    SUPABASE_HTTP_MAX_KEEPALIVE = int(os.environ.get('SUPABASE_HTTP_MAX_KEEPALIVE', 10))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('SUPABASE_HTTP_KEEPALIVE_EXPIRY', 30))
+    SUPABASE_HTTP2 = os.environ.get('SUPABASE_HTTP2', 'False') == 'True'
+    SUPABASE_CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 5))
+    SUPABASE_READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT', 15))
+    SUPABASE_POOL_TIMEOUT = float(os.environ.get('SUPABASE_POOL_TIMEOUT', 5))
+
+    # Reintentos de lecturas idempotentes (ver repositories/supabase/retry.py); 0 los desactiva
+    BACKEND_READ_RETRIES = int(os.environ.get('BACKEND_READ_RETRIES', 2))
+    BACKEND_RETRY_BASE_MS = float(os.environ.get('BACKEND_RETRY_BASE_MS', 50))
+    BACKEND_RETRY_MAX_MS = float(os.environ.get('BACKEND_RETRY_MAX_MS', 1000))
+
+    # Conexión directa a Postgres (no la URL REST de Supabase): Project Settings > Database
+    DATABASE_URL = os.environ.get('DATABASE_URL') or ''
+    POSTGRES_POOL_MIN = int(os.environ.get('POSTGRES_POOL_MIN', 1))
+    POSTGRES_POOL_MAX = int(os.environ.get('POSTGRES_POOL_MAX', 10))
+    POSTGRES_POOL_TIMEOUT = float(os.environ.get('POSTGRES_POOL_TIMEOUT', 10))
+    POSTGRES_STATEMENT_TIMEOUT_MS = int(os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 15000))
+    # Ejecuciones de una misma consulta antes de prepararla en el servidor; 'none' lo desactiva
+    # (necesario con el pooler de Supabase en modo transaction, puerto 6543)
+    POSTGRES_PREPARE_THRESHOLD = os.environ.get('POSTGRES_PREPARE_THRESHOLD', '5')
+
+    # Instrumentación del backend: cabeceras X-Backend-Calls/X-Backend-Time (siempre en DEBUG)
+    # y aviso cuando una misma consulta se repite más de N_PLUS_ONE_THRESHOLD veces por petición
+    BACKEND_TRACE = os.environ.get('BACKEND_TRACE', 'False') == 'True'
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+
+    # /metrics: accesible para admins, desde localhost o con "Authorization: Bearer METRICS_TOKEN"
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or ''
+
+    # Perfilador bajo demanda (?_profile=1 o cabecera X-Profile: 1, solo admins)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True') == 'True'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or str(BASE_DIR / 'profiles')
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '1'))
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+
+    # Logging estructurado (JSON por defecto) con límite de errores repetidos por ventana
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_ERROR_BURST = int(os.environ.get('LOG_ERROR_BURST', 10))
+    LOG_ERROR_WINDOW = float(os.environ.get('LOG_ERROR_WINDOW', 60))
+
+    # Snapshot compartido entre workers (espacios, horarios de clase, admins) en archivos mapeados.
+    # Por defecto en el directorio temporal; con DATA_BACKEND=memory solo si se indica SHARED_SNAPSHOT_DIR
+    SHARED_SNAPSHOT_ENABLED = os.environ.get('SHARED_SNAPSHOT_ENABLED', 'True') == 'True'
+    SHARED_SNAPSHOT_DIR = os.environ.get('SHARED_SNAPSHOT_DIR') or ''
+    SHARED_SNAPSHOT_TTL = float(os.environ.get('SHARED_SNAPSHOT_TTL', 60))
+
+    # Bus de invalidación entre instancias: local | sqlite | postgres (ver repositories/supabase/invalidation.py)
+    INVALIDATION_TRANSPORT = os.environ.get('INVALIDATION_TRANSPORT', 'local')
+    INVALIDATION_SQLITE_PATH = os.environ.get('INVALIDATION_SQLITE_PATH') or os.path.join(
+        tempfile.gettempdir(), 'reservaspuce-invalidation.sqlite3')
+    INVALIDATION_POLL_INTERVAL = float(os.environ.get('INVALIDATION_POLL_INTERVAL', 0.5))
+    INVALIDATION_DATABASE_URL = os.environ.get('INVALIDATION_DATABASE_URL') or DATABASE_URL
+    INVALIDATION_CHANNEL = os.environ.get('INVALIDATION_CHANNEL', 'reservaspuce_invalidation')
+
+    # Réplica local de lectura en SQLite (ver repositories/supabase/read_replica.py).
+    # Con DATA_BACKEND=memory solo si se indica READ_REPLICA_PATH
+    READ_REPLICA_ENABLED = os.environ.get('READ_REPLICA_ENABLED', 'False') == 'True'
+    READ_REPLICA_PATH = os.environ.get('READ_REPLICA_PATH') or ''
+    READ_REPLICA_MAX_STALENESS = float(os.environ.get('READ_REPLICA_MAX_STALENESS', 5))
+    READ_REPLICA_FULL_SYNC_INTERVAL = float(os.environ.get('READ_REPLICA_FULL_SYNC_INTERVAL', 3600))
     
     # Configuración de la aplicación
     DEBUG = os.environ.get('FLASK_DEBUG', 'False') == 'True'
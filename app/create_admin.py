@@ -65,7 +65,7 @@ def create_admin():
         password_hash = generate_password_hash(password)
         
         # Crear usuario como admin
-        user = user_repo.create_user(
+        user, error = user_repo.create_user(
             email=email,
             password_hash=password_hash,
             name=name,
@@ -82,7 +82,7 @@ def create_admin():
             print(f"   Nombre: {user['name']}")
             print(f"   Rol: {user['role']}")
         else:
-            print("❌ Error al crear el administrador")
+            print(f"❌ Error al crear el administrador{': ' + error if error else ''}")
             
     except Exception as e:
         print(f"❌ Error: {e}")
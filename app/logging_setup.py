@@ -0,0 +1,154 @@
+"""
+Logging estructurado y no bloqueante.
+
+Los módulos usan ``logging.getLogger(__name__)`` (todos cuelgan del logger ``app``). Aquí se
+configura ese logger con un QueueHandler: el hilo de la petición solo encola el registro y
+un QueueListener lo escribe en stdout en segundo plano. Cada registro sale como una línea
+JSON con request_id, user_id y ruta; los errores repetidos se limitan por ventana para que
+un backend caído no inunde el log.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, g, has_request_context, request, session
+
+LOGGER_NAME = "app"
+
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """Agrega request_id, user_id y route (se ejecuta en el hilo que registra)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.request_id = g.get("request_id")
+            record.user_id = session.get("user_id")
+            record.route = f"{request.method} {request.path}"
+        else:
+            record.request_id = record.user_id = record.route = None
+        return True
+
+
+class ErrorRateLimitFilter(logging.Filter):
+    """Deja pasar como máximo `burst` errores iguales (logger + plantilla) por ventana.
+
+    El primer registro de la ventana siguiente lleva `suppressed` con los descartados.
+    """
+
+    def __init__(self, burst: int = 10, window: float = 60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._state: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR or self.burst <= 0:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._state[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("request_id", "user_id", "route", "suppressed"):
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("[%(asctime)s] %(levelname)s %(name)s [%(request_id)s]: %(message)s")
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler que resuelve mensaje y traceback en el hilo que registra.
+
+    El traceback se convierte a texto aquí (los frames no deben cruzar de hilo) y el
+    resto de campos viaja intacto para que el formateador JSON los use.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.stack_info = None
+        return record
+
+
+def _stop_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def init_logging(app: Flask):
+    """Configura el logger `app` con cola + JSON y agrega X-Request-Id a cada petición."""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+    logger.propagate = False
+
+    with _listener_lock:
+        if _listener is None:
+            log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+            stream = logging.StreamHandler()
+            stream.setFormatter(JsonFormatter() if app.config.get("LOG_FORMAT", "json") == "json" else TextFormatter())
+            handler = ContextQueueHandler(log_queue)
+            handler.addFilter(RequestContextFilter())
+            handler.addFilter(ErrorRateLimitFilter(
+                burst=int(app.config.get("LOG_ERROR_BURST", 10)),
+                window=float(app.config.get("LOG_ERROR_WINDOW", 60)),
+            ))
+            logger.handlers = [handler]
+            _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_stop_listener)
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = request.headers.get("X-Request-Id") or uuid.uuid4().hex
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-Id"] = request_id
+        return response
@@ -0,0 +1,203 @@
+"""
+Registro de métricas en proceso con formato de exposición de Prometheus.
+
+Contadores e histogramas con etiquetas, protegidos por un lock y sin dependencias
+externas. Cada worker de gunicorn tiene su propio registro; /metrics expone el del
+proceso que atiende la petición.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Contador monotónico con etiquetas."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+
+class Histogram:
+    """Histograma acumulativo (buckets + sum + count) con etiquetas."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [conteo por bucket..., +Inf], suma
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+        lines = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = 'le="' + le + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Valor leído al exponer (callback que retorna [(labels, valor)])."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 collect: Callable[[], Iterable[Tuple[LabelValues, float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._collect = collect
+
+    def samples(self) -> List[str]:
+        try:
+            items = list(self._collect())
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+              collect: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "reservas_http_requests_total", "Peticiones HTTP por endpoint", ("endpoint", "method", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "reservas_http_request_duration_seconds", "Duración de las peticiones HTTP", ("endpoint", "method"))
+BACKEND_LATENCY = REGISTRY.histogram(
+    "reservas_backend_call_duration_seconds", "Duración de las llamadas al backend por método de repositorio",
+    ("repository", "method", "operation"))
+BACKEND_ERRORS = REGISTRY.counter(
+    "reservas_backend_errors_total", "Llamadas al backend que lanzaron excepción", ("repository", "method"))
+BACKEND_RETRIES = REGISTRY.counter(
+    "reservas_backend_retries_total", "Reintentos de lecturas al backend (retry, budget_exhausted)",
+    ("repository", "method", "outcome"))
+EMAIL_SENT = REGISTRY.counter(
+    "reservas_email_sent_total", "Correos por resultado (sent, error, not_configured)", ("outcome",))
+EMAIL_LATENCY = REGISTRY.histogram(
+    "reservas_email_send_duration_seconds", "Duración de los envíos SMTP (un correo o un lote)", ("mode",))
+LLM_REQUESTS = REGISTRY.counter(
+    "reservas_llm_requests_total", "Llamadas a DeepSeek por resultado (success, error)", ("outcome",))
+LLM_LATENCY = REGISTRY.histogram(
+    "reservas_llm_request_duration_seconds", "Duración de las llamadas a DeepSeek", (),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0))
+CHATBOT_INTENT_SOURCE = REGISTRY.counter(
+    "reservas_chatbot_intent_source_total", "Origen del intent del chatbot (deepseek, rule_based)", ("source",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "reservas_cache_requests_total", "Consultas a cachés por resultado (hit, miss)", ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool):
+    """Registra un acierto o fallo de caché (ver reservas_cache_requests_total)."""
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def _lru_cache_stats():
+    from app.models.time_range import to_minutes
+    info = to_minutes.cache_info()
+    return [(("to_minutes", "hit"), info.hits), (("to_minutes", "miss"), info.misses)]
+
+
+REGISTRY.gauge(
+    "reservas_lru_cache_requests", "Aciertos/fallos acumulados de cachés lru_cache en proceso",
+    ("cache", "result"), _lru_cache_stats)
+
+
+def init_app(app):
+    """Mide duración y conteo de cada petición por endpoint del blueprint."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop("_metrics_started", None)
+        endpoint = request.endpoint or "unknown"
+        if started is not None:
+            HTTP_LATENCY.observe(time.perf_counter() - started, endpoint, request.method)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        return response
@@ -0,0 +1 @@
+# Modelos de dominio
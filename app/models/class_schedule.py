@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.models.time_range import TimeRange
+
+
+@dataclass
+class ClassSchedule:
+    """Bloqueo fijo de un aula por clases en un día de la semana (0 = lunes)."""
+
+    __slots__ = ("id", "space_id", "weekday", "time_range", "description")
+
+    id: Optional[str]
+    space_id: str
+    weekday: int
+    time_range: TimeRange
+    description: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> Optional["ClassSchedule"]:
+        time_range = TimeRange.from_row(row)
+        if time_range is None:
+            return None
+        return cls(row.get("id"), row.get("space_id"), row.get("weekday"), time_range, row.get("description"))
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> List["ClassSchedule"]:
+        """Decodifica filas de class_schedules; descarta las que no tienen un rango válido."""
+        return [schedule for schedule in map(cls.from_row, rows) if schedule is not None]
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.models.space import Space
+from app.models.time_range import TimeRange
+from app.models.user import UserSummary
+
+
+# Margen al pedir cambios del calendario: cubre escrituras con relojes levemente desfasados
+# o transacciones que confirman después de fijar su updated_at (el cliente deduplica por id)
+CALENDAR_SYNC_OVERLAP = timedelta(seconds=10)
+
+
+def calendar_cursor(moment: Optional[datetime] = None) -> str:
+    """Cursor del calendario en UTC con sufijo Z (sin '+', viaja en la URL sin escapar)"""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def normalize_embeds(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Deja spaces/users de PostgREST como dict (o None).
+
+    Se aplica una vez al salir del repositorio para que las capas superiores y los
+    templates no tengan que preguntar si el embed vino como dict o como lista.
+    """
+    for key in ("spaces", "users"):
+        value = row.get(key)
+        if isinstance(value, list):
+            row[key] = value[0] if value else None
+    return row
+
+
+def space_name_of(row: Dict[str, Any], default: str = "el espacio") -> str:
+    """Nombre del espacio embebido en una fila de reservas ya normalizada."""
+    space = row.get("spaces")
+    return (space.get("name") or default) if space else default
+
+
+@dataclass
+class Reservation:
+    """Reserva decodificada desde PostgREST con sus relaciones embebidas.
+
+    Los repositorios la retornan en las lecturas que no van a templates (calendario,
+    recordatorios, validación de conflictos); el resto de lecturas siguen siendo dicts.
+    """
+
+    __slots__ = (
+        "id", "user_id", "space_id", "date", "time_range", "status",
+        "justification", "booking_id", "created_at", "updated_at", "space", "user",
+    )
+
+    id: str
+    user_id: str
+    space_id: str
+    date: str
+    time_range: Optional[TimeRange]
+    status: str
+    justification: str
+    booking_id: Optional[str]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    space: Optional[Space]
+    user: Optional[UserSummary]
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Reservation":
+        return cls(
+            row.get("id"),
+            row.get("user_id"),
+            row.get("space_id"),
+            str(row.get("date") or ""),
+            TimeRange.from_row(row),
+            row.get("status") or "pending",
+            row.get("justification") or "",
+            row.get("booking_id"),
+            row.get("created_at"),
+            row.get("updated_at"),
+            Space.from_row(row.get("spaces")),
+            UserSummary.from_row(row.get("users")),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> List["Reservation"]:
+        return [cls.from_row(row) for row in rows]
+
+    def space_name(self, default: str = "el espacio") -> str:
+        return self.space.name if self.space and self.space.name else default
+
+    def user_name(self, default: str = "Usuario") -> str:
+        return self.user.name if self.user and self.user.name else default
+
+    @property
+    def start_str(self) -> str:
+        return self.time_range.start_str if self.time_range else ""
+
+    @property
+    def end_str(self) -> str:
+        return self.time_range.end_str if self.time_range else ""
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+def resolve_floor(floor: Optional[str], name: str, space_type: str) -> str:
+    """Piso declarado o deducido del prefijo del nombre (A-0/A-1/A-2)."""
+    if floor:
+        return floor
+    name = (name or "").upper()
+    if name.startswith("A-0"):
+        return "planta_baja"
+    if name.startswith("A-1"):
+        return "piso_1"
+    if name.startswith("A-2"):
+        return "piso_2"
+    if (space_type or "").lower() == "auditorio":
+        return "planta_baja"
+    return "sin_piso"
+
+
+@dataclass
+class Space:
+    """Espacio reservable (aula, laboratorio, auditorio)."""
+
+    __slots__ = ("id", "name", "type", "floor", "capacity", "lab_category", "description")
+
+    id: str
+    name: str
+    type: str
+    floor: Optional[str]
+    capacity: Optional[int]
+    lab_category: Optional[str]
+    description: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict[str, Any]]) -> Optional["Space"]:
+        """Decodifica una fila (o embed) de spaces. Acepta dict o lista de PostgREST."""
+        if isinstance(row, list):
+            row = row[0] if row else None
+        if not row:
+            return None
+        return cls(
+            row.get("id"),
+            row.get("name") or "",
+            row.get("type") or "",
+            row.get("floor"),
+            row.get("capacity"),
+            row.get("lab_category"),
+            row.get("description"),
+        )
+
+    @property
+    def resolved_floor(self) -> str:
+        """Piso declarado o deducido del prefijo del nombre (A-0/A-1/A-2)."""
+        return resolve_floor(self.floor, self.name, self.type)
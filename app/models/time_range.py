@@ -0,0 +1,139 @@
+"""
+Rango horario compacto en minutos desde medianoche.
+
+Las horas llegan de Supabase como "HH:MM:SS" y de los formularios como "HH:MM".
+Los repositorios que validan conflictos las decodifican al leer (Reservation y
+ClassSchedule traen su TimeRange) y las comparaciones (solapamiento, bloques
+libres) se hacen sobre ints.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@lru_cache(maxsize=4096)
+def to_minutes(time_str: str) -> int:
+    """Convierte HH:MM o HH:MM:SS a minutos desde medianoche. ValueError si es inválida.
+
+    La resolución es de minutos (formularios e importación usan HH:MM): los segundos
+    se validan (00-59) y se descartan, 10:15:30 equivale a 10:15.
+    """
+    parts = str(time_str).strip().split(":")
+    if len(parts) > 3:
+        raise ValueError(f"Hora inválida: {time_str}")
+    hour = int(parts[0])
+    minute = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    # PostgREST puede devolver fracciones de segundo (10:15:00.000)
+    second = float(parts[2]) if len(parts) > 2 else 0
+    if not (0 <= hour <= 24 and 0 <= minute < 60 and 0 <= second < 60) or (hour == 24 and (minute or second)):
+        raise ValueError(f"Hora inválida: {time_str}")
+    return hour * 60 + minute
+
+
+def format_minutes(minutes: int, with_seconds: bool = False) -> str:
+    """Convierte minutos desde medianoche a HH:MM (o HH:MM:SS)."""
+    text = f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return f"{text}:00" if with_seconds else text
+
+
+class TimeRange:
+    """Intervalo semiabierto [start, end) en minutos."""
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, start_time: str, end_time: str) -> "TimeRange":
+        return cls(to_minutes(start_time), to_minutes(end_time))
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> Optional["TimeRange"]:
+        """Rango de una fila con start_time/end_time; None si faltan o son inválidas."""
+        start, end = row.get("start_time"), row.get("end_time")
+        if not start or not end:
+            return None
+        try:
+            return cls(to_minutes(start), to_minutes(end))
+        except (ValueError, TypeError):
+            return None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.end > self.start
+
+    @property
+    def start_str(self) -> str:
+        return format_minutes(self.start)
+
+    @property
+    def end_str(self) -> str:
+        return format_minutes(self.end)
+
+    def overlaps(self, other: "TimeRange") -> bool:
+        return self.start < other.end and other.start < self.end
+
+    def merge(self, other: "TimeRange") -> "TimeRange":
+        """Unión de dos rangos que se solapan o se tocan."""
+        return TimeRange(min(self.start, other.start), max(self.end, other.end))
+
+    def subtract(self, other: "TimeRange") -> List["TimeRange"]:
+        """Partes de este rango que no cubre other (0, 1 o 2 rangos)."""
+        if not self.overlaps(other):
+            return [self]
+        parts = []
+        if other.start > self.start:
+            parts.append(TimeRange(self.start, other.start))
+        if other.end < self.end:
+            parts.append(TimeRange(other.end, self.end))
+        return parts
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, TimeRange) and self.start == other.start and self.end == other.end
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
+    def __lt__(self, other: "TimeRange") -> bool:
+        return (self.start, self.end) < (other.start, other.end)
+
+    def __repr__(self) -> str:
+        return f"TimeRange({self.start_str}-{self.end_str})"
+
+
+def merge_ranges(ranges: Iterable[TimeRange]) -> List[TimeRange]:
+    """Une rangos solapados o contiguos; retorna la lista ordenada."""
+    merged: List[TimeRange] = []
+    for r in sorted(ranges):
+        if merged and r.start <= merged[-1].end:
+            if r.end > merged[-1].end:
+                merged[-1] = TimeRange(merged[-1].start, r.end)
+        else:
+            merged.append(TimeRange(r.start, r.end))
+    return merged
+
+
+def free_ranges(busy: Iterable[TimeRange], window: TimeRange) -> List[TimeRange]:
+    """Bloques libres dentro de window descontando los rangos ocupados."""
+    free = []
+    cursor = window.start
+    for r in merge_ranges(busy):
+        if r.end <= window.start or r.start >= window.end:
+            continue
+        if r.start > cursor:
+            free.append(TimeRange(cursor, r.start))
+        cursor = max(cursor, r.end)
+    if cursor < window.end:
+        free.append(TimeRange(cursor, window.end))
+    return free
+
+
+def find_overlap(target: TimeRange, rows: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Primera fila (con start_time/end_time) que se solapa con target."""
+    for row in rows:
+        r = TimeRange.from_row(row)
+        if r is not None and target.overlaps(r):
+            return row
+    return None
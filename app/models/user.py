@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class UserSummary:
+    """Datos públicos del usuario embebidos en una reserva (sin credenciales)."""
+
+    __slots__ = ("id", "name", "email", "student_id")
+
+    id: Optional[str]
+    name: str
+    email: Optional[str]
+    student_id: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict[str, Any]]) -> Optional["UserSummary"]:
+        if isinstance(row, list):
+            row = row[0] if row else None
+        if not row:
+            return None
+        return cls(row.get("id"), row.get("name") or "", row.get("email"), row.get("student_id"))
@@ -0,0 +1,233 @@
+"""
+Perfilado bajo demanda de una petición (solo administradores).
+
+Un admin agrega ``?_profile=1`` (o la cabecera ``X-Profile: 1``) a cualquier URL y la
+petición se ejecuta con un muestreador de pilas en un hilo aparte más tracemalloc. Se
+guardan en PROFILE_DIR:
+
+- ``<id>.speedscope.json``: perfil muestreado para https://www.speedscope.app
+- ``<id>.collapsed.txt``: pilas colapsadas (flamegraph.pl / speedscope)
+- ``<id>.alloc.txt``: top de asignaciones de memoria por línea
+- ``<id>.meta.json``: ruta, duración, muestras y estado
+
+Las peticiones normales solo pagan la comprobación del parámetro en before_request.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, g, request, session
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_RE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{3}-[a-z0-9_.-]+$")
+PROFILE_FILES = {
+    "speedscope": ".speedscope.json",
+    "collapsed": ".collapsed.txt",
+    "alloc": ".alloc.txt",
+}
+
+Frame = Tuple[str, str, int]
+
+# tracemalloc es global al proceso: un solo perfil a la vez
+_PROFILE_LOCK = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Muestrea cada `interval` segundos la pila del hilo que atiende la petición."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        current_frames = sys._current_frames
+        while not self._done.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            stack: List[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    return "\n".join(f"{';'.join(_frame_label(f) for f in stack)} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+def speedscope_profile(stacks: Counter, interval_ms: float, name: str) -> Dict[str, Any]:
+    frames: List[Dict[str, Any]] = []
+    index: Dict[Frame, int] = {}
+    samples, weights = [], []
+    for stack, count in stacks.items():
+        ids = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            ids.append(index[frame])
+        samples.append(ids)
+        weights.append(count * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "reservaspuce-profiler",
+    }
+
+
+def top_allocations(snapshot: "tracemalloc.Snapshot", limit: int = 30) -> str:
+    stats = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]).statistics("lineno")
+    total = sum(s.size for s in stats)
+    lines = [f"Total asignado y vivo al terminar: {total / 1024:.1f} KiB", ""]
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} bloques  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def list_profiles(directory: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """Perfiles guardados, más recientes primero (lee los .meta.json)."""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".meta.json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), "r", encoding="utf-8") as fh:
+                profiles.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+def profile_file(directory: str, profile_id: str, kind: str) -> Optional[str]:
+    """Nombre de archivo de un perfil si el id y el tipo son válidos."""
+    if kind not in PROFILE_FILES or not PROFILE_ID_RE.match(profile_id or ""):
+        return None
+    filename = profile_id + PROFILE_FILES[kind]
+    return filename if os.path.isfile(os.path.join(directory, filename)) else None
+
+
+def _prune(directory: str, keep: int):
+    metas = sorted(n for n in os.listdir(directory) if n.endswith(".meta.json"))
+    for meta in metas[:-keep] if keep > 0 else []:
+        profile_id = meta[: -len(".meta.json")]
+        for suffix in list(PROFILE_FILES.values()) + [".meta.json"]:
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except OSError:
+                pass
+
+
+def _wants_profile() -> bool:
+    return (request.args.get("_profile") == "1" or request.headers.get("X-Profile") == "1") \
+        and session.get("role") == "admin"
+
+
+def init_app(app: Flask):
+    """Registra los hooks del perfilador (se activan solo si PROFILING_ENABLED)."""
+    if not app.config.get("PROFILING_ENABLED", True):
+        return
+    directory = app.config.get("PROFILE_DIR") or os.path.join(app.root_path, os.pardir, "profiles")
+    interval_ms = float(app.config.get("PROFILE_INTERVAL_MS", 1.0))
+    keep = int(app.config.get("PROFILE_KEEP", 50))
+    app.config["PROFILE_DIR"] = os.path.abspath(directory)
+
+    @app.before_request
+    def _start_profile():
+        if not _wants_profile() or not _PROFILE_LOCK.acquire(blocking=False):
+            return
+        tracemalloc.start(10)
+        sampler = StackSampler(threading.get_ident(), interval_ms / 1000.0)
+        g._profile = (sampler, time.perf_counter())
+        sampler.start()
+
+    @app.after_request
+    def _finish_profile(response):
+        state = g.pop("_profile", None)
+        if state is None:
+            return response
+        sampler, started = state
+        sampler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        _PROFILE_LOCK.release()
+
+        endpoint = re.sub(r"[^a-z0-9_.-]", "_", (request.endpoint or "unknown").lower())
+        now = datetime.now()
+        profile_id = f"{now:%Y%m%d-%H%M%S}-{now.microsecond // 1000:03d}-{endpoint}"
+        name = f"{request.method} {request.full_path.rstrip('?')}"
+        try:
+            os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+            base = os.path.join(app.config["PROFILE_DIR"], profile_id)
+            with open(base + ".speedscope.json", "w", encoding="utf-8") as fh:
+                json.dump(speedscope_profile(sampler.stacks, interval_ms, name), fh)
+            with open(base + ".collapsed.txt", "w", encoding="utf-8") as fh:
+                fh.write(collapsed_stacks(sampler.stacks))
+            with open(base + ".alloc.txt", "w", encoding="utf-8") as fh:
+                fh.write(top_allocations(snapshot))
+            with open(base + ".meta.json", "w", encoding="utf-8") as fh:
+                json.dump({
+                    "id": profile_id,
+                    "name": name,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "samples": sum(sampler.stacks.values()),
+                    "created_at": now.isoformat(timespec="seconds"),
+                    "user_id": session.get("user_id"),
+                }, fh, ensure_ascii=False)
+            _prune(app.config["PROFILE_DIR"], keep)
+            response.headers["X-Profile-Id"] = profile_id
+        except OSError as e:
+            logger.error("Error guardando perfil de la petición: %s", e)
+        return response
+
+    @app.teardown_request
+    def _abort_profile(exc):
+        # Si la petición terminó sin pasar por after_request, liberar el perfilador
+        state = g.pop("_profile", None)
+        if state is not None:
+            state[0].stop()
+            tracemalloc.stop()
+            _PROFILE_LOCK.release()
@@ -0,0 +1,27 @@
+"""
+Implementación de repositorios según DATA_BACKEND.
+
+Los repositorios de app/repositories/supabase definen la interfaz y hablan con el cliente
+por la API de builder de PostgREST, que funciona con los tres backends (supabase,
+postgres y memory). Con DATA_BACKEND=postgres las clases de app/repositories/postgres los
+extienden y resuelven en SQL las rutas pesadas: conflicto de horario, espacios libres,
+conteos del dashboard y operaciones masivas en una transacción.
+"""
+
+from app.config import Config
+
+
+def reservation_repository():
+    if Config.DATA_BACKEND == 'postgres':
+        from app.repositories.postgres.reservation_repo import PostgresReservationRepository
+        return PostgresReservationRepository()
+    from app.repositories.supabase.reservation_repo import ReservationRepository
+    return ReservationRepository()
+
+
+def space_repository():
+    if Config.DATA_BACKEND == 'postgres':
+        from app.repositories.postgres.space_repo import PostgresSpaceRepository
+        return PostgresSpaceRepository()
+    from app.repositories.supabase.space_repo import SpaceRepository
+    return SpaceRepository()
@@ -0,0 +1 @@
+# Backend en memoria (sustituto local de Supabase para benchmarks y pruebas)
@@ -0,0 +1,321 @@
+"""
+Cliente en memoria que imita el subconjunto de supabase/postgrest que usan los repositorios.
+
+Soporta select con embeds (``spaces(name)``, ``users!reservations_user_id_fkey(*)``),
+eq/neq/gt/gte/lt/lte/is_/in_, order, limit, single/maybe_single, ``count='exact'`` e
+insert/update/delete con representación. Cada execute() puede dormir una latencia fija
+para simular el viaje de red a Supabase.
+
+Se activa con ``DATA_BACKEND=memory`` (ver app/config.py).
+"""
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.repositories.select_parser import FOREIGN_KEYS, QueryParams, UnknownRelation, parse_select, resolve_embed
+
+# Valores por defecto de las columnas (además de id/created_at/updated_at)
+COLUMN_DEFAULTS = {
+    "users": {"role": "user", "email_verified": False},
+    "spaces": {"floor": "planta_baja"},
+    "reservations": {"status": "pending"},
+    "notifications": {"type": "info", "read": False},
+}
+
+TIMESTAMP_TABLES = {"users", "spaces", "class_schedules", "reservations"}
+TIME_COLUMNS = {"start_time", "end_time"}
+
+
+class MemoryAPIError(Exception):
+    """Error equivalente a postgrest.APIError para el backend en memoria."""
+
+
+class MemoryResponse:
+    """Respuesta con la misma forma que APIResponse (data y count)."""
+
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize_time(value: Any) -> Any:
+    """Postgres devuelve TIME como HH:MM:SS aunque se inserte HH:MM."""
+    if isinstance(value, str) and len(value) == 5 and value[2] == ":":
+        return f"{value}:00"
+    return value
+
+
+class MemoryDatabase:
+    """Tablas en memoria (listas de dicts) protegidas por un lock."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.latency = max(latency_ms, 0.0) / 1000.0
+        self.calls = 0
+        self.lock = threading.RLock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def load(self, data: Dict[str, List[Dict[str, Any]]]):
+        """Carga filas semilla {tabla: [filas]} aplicando los defaults de inserción."""
+        with self.lock:
+            for table, rows in data.items():
+                for row in rows:
+                    self.rows(table).append(self.prepare_insert(table, row))
+
+    def load_json(self, path: str):
+        with open(path, "r", encoding="utf-8") as fh:
+            self.load(json.load(fh))
+
+    def reset(self):
+        with self.lock:
+            self.tables.clear()
+            self.calls = 0
+
+    def prepare_insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        new_row = dict(COLUMN_DEFAULTS.get(table, {}))
+        new_row.update({k: _normalize_time(v) if k in TIME_COLUMNS else v for k, v in row.items()})
+        new_row.setdefault("id", str(uuid.uuid4()))
+        new_row.setdefault("created_at", _now())
+        if table in TIMESTAMP_TABLES:
+            new_row.setdefault("updated_at", new_row["created_at"])
+        return new_row
+
+    def index_by(self, table: str, column: str, cache: Dict[Tuple[str, str], Dict[Any, List[Dict[str, Any]]]]):
+        """Agrupa las filas de una tabla por columna (se reutiliza durante un mismo execute)."""
+        key = (table, column)
+        if key not in cache:
+            groups: Dict[Any, List[Dict[str, Any]]] = {}
+            for r in self.rows(table):
+                groups.setdefault(r.get(column), []).append(r)
+            cache[key] = groups
+        return cache[key]
+
+    # ---- relaciones ----
+    def resolve_embed(self, table: str, relation: str, hint: Optional[str]):
+        try:
+            return resolve_embed(table, relation, hint)
+        except UnknownRelation as e:
+            raise MemoryAPIError(str(e)) from e
+
+    def project(self, table: str, row: Dict[str, Any], fields: List[Tuple[str, Any]],
+                cache: Optional[Dict] = None) -> Dict[str, Any]:
+        cache = {} if cache is None else cache
+        out: Dict[str, Any] = {}
+        for kind, spec in fields:
+            if kind == "*":
+                out.update(row)
+            elif kind == "col":
+                alias, column = spec
+                out[alias] = row.get(column)
+            else:
+                alias, relation, hint, inner = spec
+                mode, local, remote = self.resolve_embed(table, relation, hint)
+                value = row.get(local)
+                related = self.index_by(relation, remote, cache).get(value, []) if value is not None else []
+                if mode == "one":
+                    out[alias] = self.project(relation, related[0], inner, cache) if related else None
+                else:
+                    out[alias] = [self.project(relation, r, inner, cache) for r in related]
+        return out
+
+    def delete_cascade(self, table: str, deleted: List[Dict[str, Any]]):
+        ids = {r.get("id") for r in deleted}
+        for fk_table, column, ref_table, on_delete in FOREIGN_KEYS:
+            if ref_table != table:
+                continue
+            children = [r for r in self.rows(fk_table) if r.get(column) in ids]
+            if not children:
+                continue
+            if on_delete == "cascade":
+                self.tables[fk_table] = [r for r in self.rows(fk_table) if r.get(column) not in ids]
+                self.delete_cascade(fk_table, children)
+            else:
+                for child in children:
+                    child[column] = None
+
+
+class MemoryQueryBuilder:
+    """Builder encadenable equivalente a SyncRequestBuilder/SyncFilterRequestBuilder."""
+
+    def __init__(self, db: MemoryDatabase, table: str):
+        self.db = db
+        self.table = table
+        self.method = "select"
+        self.params = QueryParams({"select": "*"})
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.orders: List[Tuple[str, bool, bool]] = []
+        self.limit_count: Optional[int] = None
+        self.count_mode: Optional[str] = None
+        self.single_mode: Optional[str] = None
+
+    # ---- verbos ----
+    def select(self, *columns: str, count: Optional[str] = None) -> "MemoryQueryBuilder":
+        self.method = "select"
+        self.params = self.params.set("select", ",".join(columns) or "*")
+        self.count_mode = count
+        return self
+
+    def insert(self, json_data: Any, *, count: Optional[str] = None, returning: str = "representation",
+               upsert: bool = False) -> "MemoryQueryBuilder":
+        self.method = "insert"
+        self.payload = json_data
+        self.count_mode = count
+        return self
+
+    def update(self, json_data: Dict[str, Any], *, count: Optional[str] = None,
+               returning: str = "representation") -> "MemoryQueryBuilder":
+        self.method = "update"
+        self.payload = json_data
+        self.count_mode = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: str = "representation") -> "MemoryQueryBuilder":
+        self.method = "delete"
+        self.count_mode = count
+        return self
+
+    # ---- filtros ----
+    def _add(self, predicate: Callable[[Dict[str, Any]], bool]) -> "MemoryQueryBuilder":
+        self.filters.append(predicate)
+        return self
+
+    def eq(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        value = _normalize_time(value) if column in TIME_COLUMNS else value
+        return self._add(lambda r: r.get(column) == value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._add(lambda r: r.get(column) != value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._add(lambda r: r.get(column) is not None and r.get(column) > value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._add(lambda r: r.get(column) is not None and r.get(column) >= value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._add(lambda r: r.get(column) is not None and r.get(column) < value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        return self._add(lambda r: r.get(column) is not None and r.get(column) <= value)
+
+    def is_(self, column: str, value: Any) -> "MemoryQueryBuilder":
+        if value is None or str(value).lower() in ("null", "none"):
+            return self._add(lambda r: r.get(column) is None)
+        expected = value if isinstance(value, bool) else str(value).lower() == "true"
+        return self._add(lambda r: r.get(column) is expected)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "MemoryQueryBuilder":
+        allowed = set(values)
+        return self._add(lambda r: r.get(column) in allowed)
+
+    # ---- modificadores ----
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = False,
+              foreign_table: Optional[str] = None) -> "MemoryQueryBuilder":
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "MemoryQueryBuilder":
+        self.limit_count = size
+        return self
+
+    def single(self) -> "MemoryQueryBuilder":
+        self.single_mode = "single"
+        return self
+
+    def maybe_single(self) -> "MemoryQueryBuilder":
+        self.single_mode = "maybe"
+        return self
+
+    # ---- ejecución ----
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(predicate(row) for predicate in self.filters)
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Orden estable aplicando primero el criterio menos prioritario (como ORDER BY a, b)
+        for column, desc, nullsfirst in reversed(self.orders):
+            # Postgres: ASC NULLS LAST, DESC NULLS FIRST salvo nullsfirst explícito
+            nulls_high = (nullsfirst or desc) == desc
+            rows = sorted(
+                rows,
+                key=lambda r, c=column, h=nulls_high: ((r.get(c) is None) == h, r.get(c) if r.get(c) is not None else ""),
+                reverse=desc,
+            )
+        return rows
+
+    def _run(self) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        db = self.db
+        fields = parse_select(self.params.get("select") or "*")
+        rows = db.rows(self.table)
+
+        if self.method == "insert":
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            affected = [db.prepare_insert(self.table, r) for r in payload]
+            rows.extend(affected)
+        elif self.method == "update":
+            changes = {k: _normalize_time(v) if k in TIME_COLUMNS else v for k, v in self.payload.items()}
+            if self.table in TIMESTAMP_TABLES:
+                # Como el trigger touch_updated_at (03_updated_at_triggers.sql)
+                changes["updated_at"] = _now()
+            affected = [r for r in rows if self._matches(r)]
+            for r in affected:
+                r.update(changes)
+        elif self.method == "delete":
+            affected = [r for r in rows if self._matches(r)]
+            if affected:
+                ids = {id(r) for r in affected}
+                db.tables[self.table] = [r for r in rows if id(r) not in ids]
+                db.delete_cascade(self.table, affected)
+        else:
+            affected = self._sorted([r for r in rows if self._matches(r)])
+
+        count = len(affected) if self.count_mode == "exact" else None
+        if self.limit_count is not None:
+            affected = affected[: self.limit_count]
+        cache: Dict = {}
+        data = [db.project(self.table, r, fields, cache) for r in affected]
+        return data, count
+
+    def execute(self) -> Optional[MemoryResponse]:
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            self.db.calls += 1
+            data, count = self._run()
+
+        if self.single_mode:
+            if len(data) > 1:
+                raise MemoryAPIError("JSON object requested, multiple (or no) rows returned")
+            if not data:
+                if self.single_mode == "maybe":
+                    return None
+                raise MemoryAPIError("JSON object requested, multiple (or no) rows returned")
+            return MemoryResponse(data[0], count)
+        return MemoryResponse(data, count)
+
+
+class MemoryClient:
+    """Sustituto de supabase.Client: solo expone table()/from_()."""
+
+    def __init__(self, latency_ms: float = 0.0, seed_path: Optional[str] = None):
+        self.db = MemoryDatabase(latency_ms)
+        if seed_path:
+            self.db.load_json(seed_path)
+
+    def table(self, table_name: str) -> MemoryQueryBuilder:
+        return MemoryQueryBuilder(self.db, table_name)
+
+    def from_(self, table_name: str) -> MemoryQueryBuilder:
+        return self.table(table_name)
@@ -0,0 +1 @@
+# Repositorios con conexión directa a Postgres (DATA_BACKEND=postgres)
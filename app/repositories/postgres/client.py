@@ -0,0 +1,392 @@
+"""
+Cliente directo a Postgres con la misma API de builder que usan los repositorios.
+
+Cada table().select/insert/update/delete con sus filtros, order, limit, single y
+``count='exact'`` se traduce a una sola sentencia SQL. Los embeds de PostgREST
+(``spaces(name)``, ``users!reservations_user_id_fkey(*)``) se resuelven con subconsultas
+json dentro de la misma sentencia y el resultado se arma con json_agg, así fechas, horas,
+timestamps y uuid llegan como texto con la misma forma que devuelve Supabase.
+
+Las conexiones salen de un pool (psycopg_pool) y psycopg prepara en el servidor las
+sentencias que se repiten más de POSTGRES_PREPARE_THRESHOLD veces. Además expone lo que
+PostgREST no permite: fetch() para SQL propio y transaction() para agrupar varias
+escrituras de repositorios distintos (ver app/repositories/postgres/).
+
+Se activa con ``DATA_BACKEND=postgres`` y ``DATABASE_URL``; requiere
+``pip install "psycopg[binary]" psycopg_pool``.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import psycopg
+from psycopg import sql
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
+
+from app.repositories.select_parser import QueryParams, UnknownRelation, parse_select, resolve_embed
+
+# Orden de carga y de vaciado (las tablas referenciadas primero)
+TABLES = ("users", "spaces", "class_schedules", "reservations", "reservation_deletions", "notifications")
+
+ROOT = "t0"
+
+
+class PostgresAPIError(Exception):
+    """Error equivalente a postgrest.APIError para el backend directo."""
+
+
+class TransactionState:
+    """Lo que entrega PostgresDatabase.transaction(): committed es False si hubo ROLLBACK."""
+
+    __slots__ = ("committed",)
+
+    def __init__(self):
+        self.committed = False
+
+
+class PostgresResponse:
+    """Respuesta con la misma forma que APIResponse (data y count)."""
+
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _column(alias: str, column: str) -> sql.Composable:
+    return sql.Identifier(alias, column)
+
+
+def _projection(table: str, alias: str, fields: List[Tuple[str, Any]], depth: int = 0) -> sql.Composable:
+    """Columnas del SELECT; cada embed es una subconsulta json correlacionada."""
+    parts: List[sql.Composable] = []
+    for kind, spec in fields:
+        if kind == "*":
+            parts.append(sql.SQL("{}.*").format(sql.Identifier(alias)))
+        elif kind == "col":
+            name, column = spec
+            parts.append(sql.SQL("{} AS {}").format(_column(alias, column), sql.Identifier(name)))
+        else:
+            name, relation, hint, inner = spec
+            try:
+                mode, local, remote = resolve_embed(table, relation, hint)
+            except UnknownRelation as e:
+                raise PostgresAPIError(str(e)) from e
+            child = f"t{depth + 1}"
+            subquery = sql.SQL("SELECT {} FROM {} {} WHERE {} = {}").format(
+                _projection(relation, child, inner, depth + 1),
+                sql.Identifier(relation), sql.Identifier(child),
+                _column(child, remote), _column(alias, local),
+            )
+            if mode == "one":
+                template = "(SELECT row_to_json(_e) FROM ({}) _e) AS {}"
+            else:
+                template = "(SELECT coalesce(json_agg(_e), '[]'::json) FROM ({}) _e) AS {}"
+            parts.append(sql.SQL(template).format(subquery, sql.Identifier(name)))
+    return sql.SQL(", ").join(parts)
+
+
+class PostgresDatabase:
+    """Pool de conexiones y conexión fija por hilo mientras hay una transacción abierta."""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, timeout: float = 10.0,
+                 statement_timeout_ms: int = 15000, prepare_threshold: Optional[int] = 5):
+        options = f"-c TimeZone=UTC -c statement_timeout={int(statement_timeout_ms)}"
+        self.pool = ConnectionPool(
+            dsn,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            kwargs={"autocommit": True, "prepare_threshold": prepare_threshold, "options": options},
+            # Descarta conexiones cortadas por el servidor antes de entregarlas
+            check=ConnectionPool.check_connection,
+            name="reservaspuce",
+            open=True,
+        )
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+        self._local = threading.local()
+
+    def count_call(self):
+        with self._calls_lock:
+            self.calls += 1
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            try:
+                yield pinned
+            except Exception:
+                self._local.failed = True
+                raise
+            return
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[TransactionState]:
+        """Todas las consultas del hilo dentro del bloque usan una misma transacción.
+
+        Los repositorios atrapan sus errores y retornan None/[]: si una sentencia falla,
+        Postgres rechaza las siguientes (transacción abortada) y al salir del bloque se hace
+        ROLLBACK. Lo que retornaron los pasos anteriores ya no vale: quien abre el bloque
+        debe mirar state.committed al salir.
+        """
+        if getattr(self._local, "conn", None) is not None:
+            # Anidada: se une a la transacción exterior (committed se fija al salir de esa)
+            yield self._local.state
+            return
+        state = TransactionState()
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            self._local.state = state
+            self._local.failed = False
+            try:
+                rolled_back = False
+                with conn.transaction():
+                    yield state
+                    if self._local.failed:
+                        rolled_back = True
+                        raise psycopg.Rollback()
+                state.committed = not rolled_back
+            finally:
+                self._local.conn = None
+                self._local.state = None
+                self._local.failed = False
+
+    def fetch(self, query: Any, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Ejecuta SQL propio y retorna las filas como dicts ([] si no retorna filas)."""
+        self.count_call()
+        with self.connection() as conn:
+            with conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(query, params)
+                return cur.fetchall() if cur.description else []
+
+    # ---- datos de benchmarks/pruebas ----
+    def reset(self):
+        """Vacía todas las tablas de la app."""
+        with self.pool.connection() as conn:
+            conn.execute(sql.SQL("TRUNCATE {} CASCADE").format(
+                sql.SQL(", ").join(sql.Identifier(t) for t in TABLES)))
+        self.calls = 0
+
+    def load(self, data: Dict[str, List[Dict[str, Any]]]):
+        """Carga filas {tabla: [filas]} con COPY; las columnas omitidas toman su DEFAULT."""
+        with self.pool.connection() as conn, conn.transaction():
+            for table in sorted(data, key=lambda t: TABLES.index(t) if t in TABLES else len(TABLES)):
+                groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+                for row in data[table]:
+                    groups.setdefault(tuple(row), []).append(row)
+                for columns, rows in groups.items():
+                    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+                        sql.Identifier(table), sql.SQL(", ").join(sql.Identifier(c) for c in columns))
+                    with conn.cursor().copy(copy_sql) as copy:
+                        for row in rows:
+                            copy.write_row([row[c] for c in columns])
+
+    def close(self):
+        self.pool.close()
+
+
+class PostgresQueryBuilder:
+    """Builder encadenable equivalente a SyncRequestBuilder/SyncFilterRequestBuilder."""
+
+    def __init__(self, db: PostgresDatabase, table: str):
+        self.db = db
+        self.table = table
+        self.method = "select"
+        self.params = QueryParams({"select": "*"})
+        self.payload: Any = None
+        self.filters: List[Tuple[sql.Composable, List[Any]]] = []
+        self.orders: List[sql.Composable] = []
+        self.limit_count: Optional[int] = None
+        self.count_mode: Optional[str] = None
+        self.single_mode: Optional[str] = None
+
+    # ---- verbos ----
+    def select(self, *columns: str, count: Optional[str] = None) -> "PostgresQueryBuilder":
+        self.method = "select"
+        self.params = self.params.set("select", ",".join(columns) or "*")
+        self.count_mode = count
+        return self
+
+    def insert(self, json_data: Any, *, count: Optional[str] = None, returning: str = "representation",
+               upsert: bool = False) -> "PostgresQueryBuilder":
+        self.method = "insert"
+        self.payload = json_data
+        self.count_mode = count
+        return self
+
+    def update(self, json_data: Dict[str, Any], *, count: Optional[str] = None,
+               returning: str = "representation") -> "PostgresQueryBuilder":
+        self.method = "update"
+        self.payload = json_data
+        self.count_mode = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: str = "representation") -> "PostgresQueryBuilder":
+        self.method = "delete"
+        self.count_mode = count
+        return self
+
+    # ---- filtros ----
+    def _add(self, template: str, column: str, *values: Any) -> "PostgresQueryBuilder":
+        self.filters.append((sql.SQL(template).format(_column(ROOT, column)), list(values)))
+        return self
+
+    def eq(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} = %s", column, value)
+
+    def neq(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} <> %s", column, value)
+
+    def gt(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} > %s", column, value)
+
+    def gte(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} >= %s", column, value)
+
+    def lt(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} < %s", column, value)
+
+    def lte(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        return self._add("{} <= %s", column, value)
+
+    def is_(self, column: str, value: Any) -> "PostgresQueryBuilder":
+        if value is None or str(value).lower() in ("null", "none"):
+            return self._add("{} IS NULL", column)
+        expected = value if isinstance(value, bool) else str(value).lower() == "true"
+        return self._add("{} IS TRUE" if expected else "{} IS FALSE", column)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "PostgresQueryBuilder":
+        values = list(values)
+        if not values:
+            return self._add("FALSE AND {} IS NULL", column)
+        # IN (...) y no = ANY(%s): una lista de str se envía como text[] y no compara con uuid
+        return self._add("{} IN (" + ", ".join(["%s"] * len(values)) + ")", column, *values)
+
+    # ---- modificadores ----
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = False,
+              foreign_table: Optional[str] = None) -> "PostgresQueryBuilder":
+        template = "{} DESC" if desc else "{} ASC"
+        if nullsfirst:
+            template += " NULLS FIRST"
+        self.orders.append(sql.SQL(template).format(_column(ROOT, column)))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "PostgresQueryBuilder":
+        self.limit_count = size
+        return self
+
+    def single(self) -> "PostgresQueryBuilder":
+        self.single_mode = "single"
+        return self
+
+    def maybe_single(self) -> "PostgresQueryBuilder":
+        self.single_mode = "maybe"
+        return self
+
+    # ---- compilación ----
+    def _where(self) -> Tuple[sql.Composable, List[Any]]:
+        if not self.filters:
+            return sql.SQL(""), []
+        clause = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(f for f, _ in self.filters)
+        return clause, [v for _, values in self.filters for v in values]
+
+    def _write(self) -> Tuple[sql.Composable, List[Any]]:
+        """Sentencia de escritura con RETURNING para el CTE _w."""
+        table = sql.Identifier(self.table)
+        alias = sql.Identifier(ROOT)
+        if self.method == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            columns = list(dict.fromkeys(c for row in rows for c in row))
+            values, params = [], []
+            for row in rows:
+                items = []
+                for c in columns:
+                    if c in row:
+                        items.append(sql.Placeholder())
+                        params.append(row[c])
+                    else:
+                        items.append(sql.SQL("DEFAULT"))
+                values.append(sql.SQL("({})").format(sql.SQL(", ").join(items)))
+            statement = sql.SQL("INSERT INTO {} AS {} ({}) VALUES {} RETURNING {}.*").format(
+                table, alias, sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+                sql.SQL(", ").join(values), alias)
+            return statement, params
+        where, where_params = self._where()
+        if self.method == "update":
+            assignments = sql.SQL(", ").join(
+                sql.SQL("{} = %s").format(sql.Identifier(c)) for c in self.payload)
+            statement = sql.SQL("UPDATE {} AS {} SET {}{} RETURNING {}.*").format(
+                table, alias, assignments, where, alias)
+            return statement, list(self.payload.values()) + where_params
+        statement = sql.SQL("DELETE FROM {} AS {}{} RETURNING {}.*").format(table, alias, where, alias)
+        return statement, where_params
+
+    def compile(self) -> Tuple[sql.Composable, List[Any]]:
+        """Sentencia completa: una fila con (json de los datos, count)."""
+        fields = parse_select(self.params.get("select") or "*")
+        projection = _projection(self.table, ROOT, fields)
+        count_mode = self.count_mode == "exact"
+
+        if self.method == "select":
+            where, params = self._where()
+            source = sql.SQL("{} {}").format(sql.Identifier(self.table), sql.Identifier(ROOT))
+            inner = sql.SQL("SELECT {} FROM {}{}").format(projection, source, where)
+            if self.orders:
+                inner += sql.SQL(" ORDER BY ") + sql.SQL(", ").join(self.orders)
+            if self.limit_count is not None:
+                inner += sql.SQL(" LIMIT {}").format(sql.Literal(int(self.limit_count)))
+            count = sql.SQL("(SELECT count(*) FROM {}{})").format(source, where) if count_mode else sql.SQL("NULL")
+            query = sql.SQL("SELECT coalesce(json_agg(_r), '[]'::json), {} FROM ({}) _r").format(count, inner)
+            return query, params + (list(params) if count_mode else [])
+
+        statement, params = self._write()
+        inner = sql.SQL("SELECT {} FROM _w {}").format(projection, sql.Identifier(ROOT))
+        if self.limit_count is not None:
+            inner += sql.SQL(" LIMIT {}").format(sql.Literal(int(self.limit_count)))
+        count = sql.SQL("(SELECT count(*) FROM _w)") if count_mode else sql.SQL("NULL")
+        query = sql.SQL("WITH _w AS ({}) SELECT coalesce(json_agg(_r), '[]'::json), {} FROM ({}) _r").format(
+            statement, count, inner)
+        return query, params
+
+    # ---- ejecución ----
+    def execute(self) -> Optional[PostgresResponse]:
+        query, params = self.compile()
+        self.db.count_call()
+        with self.db.connection() as conn:
+            data, count = conn.execute(query, params).fetchone()
+
+        if self.single_mode:
+            if len(data) > 1:
+                raise PostgresAPIError("JSON object requested, multiple (or no) rows returned")
+            if not data:
+                if self.single_mode == "maybe":
+                    return None
+                raise PostgresAPIError("JSON object requested, multiple (or no) rows returned")
+            return PostgresResponse(data[0], count)
+        return PostgresResponse(data, count)
+
+
+class PostgresClient:
+    """Sustituto de supabase.Client: table()/from_() más fetch() y transaction()."""
+
+    def __init__(self, dsn: str, **pool_options: Any):
+        self.db = PostgresDatabase(dsn, **pool_options)
+
+    def table(self, table_name: str) -> PostgresQueryBuilder:
+        return PostgresQueryBuilder(self.db, table_name)
+
+    def from_(self, table_name: str) -> PostgresQueryBuilder:
+        return self.table(table_name)
+
+    def fetch(self, query: Any, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        return self.db.fetch(query, params)
+
+    def transaction(self):
+        return self.db.transaction()
@@ -0,0 +1,48 @@
+import logging
+from typing import Optional, Dict
+
+from app.repositories.supabase import retry
+from app.repositories.supabase.reservation_repo import ReservationRepository
+
+logger = logging.getLogger(__name__)
+
+_CONFLICT_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM reservations
+        WHERE space_id = %s
+          AND date = %s
+          AND status IN ('pending', 'approved')
+          AND start_time < %s::time
+          AND %s::time < end_time
+          AND id IS DISTINCT FROM %s::uuid
+    ) AS conflict
+"""
+
+_COUNT_BY_STATUS_SQL = "SELECT status, count(*) AS total FROM reservations GROUP BY status"
+
+
+class PostgresReservationRepository(ReservationRepository):
+    """Reservas con SQL directo en las rutas pesadas; el resto usa el builder heredado"""
+
+    def transaction(self):
+        """Las escrituras de todos los repositorios dentro del bloque van en una sola transacción"""
+        return self.client.transaction()
+
+    @retry.idempotent
+    def check_time_conflict(self, space_id: str, date: str, start_time: str, end_time: str, exclude_id: Optional[str] = None) -> bool:
+        """Verifica si hay conflicto de horario (EXISTS con el solape resuelto en la base de datos)"""
+        try:
+            rows = self.client.fetch(_CONFLICT_SQL, (space_id, date, end_time, start_time, exclude_id))
+            return bool(rows and rows[0]['conflict'])
+        except Exception as e:
+            logger.exception("Error verificando conflicto de horario: %s", e)
+            return True  # En caso de error, asumir conflicto por seguridad
+
+    @retry.idempotent
+    def count_by_status(self) -> Dict[str, int]:
+        """Cantidad de reservas por estado con un GROUP BY"""
+        try:
+            return {r['status']: r['total'] for r in self.client.fetch(_COUNT_BY_STATUS_SQL)}
+        except Exception as e:
+            logger.error("Error contando reservas por estado: %s", e)
+            return {}
@@ -0,0 +1,34 @@
+import logging
+from typing import Optional, Dict, Any, List
+
+from app.repositories.supabase import retry
+from app.repositories.supabase.space_repo import SpaceRepository
+
+logger = logging.getLogger(__name__)
+
+# json_agg: las filas llegan con la misma forma que las del builder (uuid y fechas como texto)
+_FREE_SPACES_SQL = """
+    SELECT coalesce(json_agg(s ORDER BY s.name), '[]'::json) AS spaces
+    FROM spaces s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM class_schedules c WHERE c.space_id = s.id AND c.weekday = %s
+    )
+    AND NOT EXISTS (
+        SELECT 1 FROM reservations r
+        WHERE r.space_id = s.id AND r.date = %s AND r.status IN ('pending', 'approved')
+    )
+"""
+
+
+class PostgresSpaceRepository(SpaceRepository):
+    """Espacios con SQL directo en las rutas pesadas; el resto usa el builder heredado"""
+
+    @retry.idempotent(budget_ms=2000)
+    def get_free_spaces(self, date: str, weekday: Optional[int]) -> List[Dict[str, Any]]:
+        """Espacios libres en una sola consulta (NOT EXISTS sobre clases y reservas)"""
+        try:
+            rows = self.client.fetch(_FREE_SPACES_SQL, (weekday, date))
+            return rows[0]['spaces'] if rows else []
+        except Exception as e:
+            logger.error("Error obteniendo espacios libres: %s", e)
+            return []
@@ -0,0 +1,97 @@
+"""
+Sintaxis de select de PostgREST y relaciones del esquema, compartidas por los backends.
+
+Los repositorios piden columnas y embeds con la sintaxis de PostgREST
+(``id, spaces(name), users!reservations_user_id_fkey(name)``). El cliente en memoria,
+el driver directo de Postgres y la réplica local de lectura la interpretan con
+parse_select y resuelven los embeds con las claves foráneas de FOREIGN_KEYS.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# (tabla, columna, tabla_referenciada, on_delete) según app/scripts/01_schema.sql
+FOREIGN_KEYS = [
+    ("class_schedules", "space_id", "spaces", "cascade"),
+    ("reservations", "user_id", "users", "cascade"),
+    ("reservations", "space_id", "spaces", "cascade"),
+    ("reservations", "admin_id", "users", "set null"),
+    ("notifications", "user_id", "users", "cascade"),
+]
+
+
+class UnknownRelation(ValueError):
+    """El select pide un embed sin clave foránea entre las dos tablas."""
+
+
+class QueryParams:
+    """Parámetros inmutables con .set()/.get(), como httpx.QueryParams.
+
+    Los builders de los clientes memory y postgres lo usan como ``query.params`` para que
+    reservation_repo._returning funcione igual que con postgrest-py.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Optional[Dict[str, str]] = None):
+        self._items = dict(items or {})
+
+    def set(self, key: str, value: str) -> "QueryParams":
+        items = dict(self._items)
+        items[key] = value
+        return QueryParams(items)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self._items.get(key, default)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Separa por comas que no estén dentro de paréntesis."""
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    tail = "".join(current).strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+
+def parse_select(text: str) -> List[Tuple[str, Any]]:
+    """Convierte un select de PostgREST en [('*', None) | ('col', alias) | ('embed', (...))]."""
+    fields = []
+    for part in _split_top_level(text or "*"):
+        alias = None
+        if ":" in part.split("(", 1)[0]:
+            alias, part = part.split(":", 1)
+            alias = alias.strip()
+            part = part.strip()
+        if "(" in part:
+            head, inner = part.split("(", 1)
+            inner = inner[:-1] if inner.endswith(")") else inner
+            relation, _, hint = head.strip().partition("!")
+            fields.append(("embed", (alias or relation, relation, hint or None, parse_select(inner))))
+        elif part == "*":
+            fields.append(("*", None))
+        else:
+            fields.append(("col", (alias or part, part)))
+    return fields
+
+
+def resolve_embed(table: str, relation: str, hint: Optional[str]) -> Tuple[str, str, str]:
+    """Retorna (modo, columna_local, columna_remota) para un embed o lanza UnknownRelation."""
+    for fk_table, column, ref_table, _ in FOREIGN_KEYS:
+        constraint = f"{fk_table}_{column}_fkey"
+        if fk_table == table and ref_table == relation and hint in (None, constraint, column):
+            return "one", column, "id"
+    for fk_table, column, ref_table, _ in FOREIGN_KEYS:
+        constraint = f"{fk_table}_{column}_fkey"
+        if fk_table == relation and ref_table == table and hint in (None, constraint, column):
+            return "many", "id", column
+    raise UnknownRelation(f"No hay relación entre '{table}' y '{relation}'")
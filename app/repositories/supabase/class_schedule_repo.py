@@ -1,6 +1,11 @@
+import logging
+from app.models.class_schedule import ClassSchedule
 from app.repositories.supabase.client import get_supabase_client
+from app.repositories.supabase import identity_map, invalidation, read_replica, retry, shared_snapshot, single_flight
 from typing import Optional, Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
 
 class ClassScheduleRepository:
     """Repositorio para horarios fijos de aulas (bloqueos por clases)."""
@@ -9,11 +14,27 @@ class ClassScheduleRepository:
         self.client = get_supabase_client()
         self.table = "class_schedules"
 
+    @single_flight.coalesced
+    @retry.idempotent
     def get_schedules(
         self,
         space_id: Optional[str] = None,
         weekday: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
+        snapshot = shared_snapshot.current(self.client)
+        if snapshot is not None:
+            return snapshot.schedules(space_id, weekday)
+        conditions, params = [], []
+        if space_id:
+            conditions.append("r.space_id = ?")
+            params.append(space_id)
+        if weekday is not None:
+            conditions.append("r.weekday = ?")
+            params.append(weekday)
+        rows = read_replica.select(self.client, self.table, "*", " AND ".join(conditions), params,
+                                   "r.weekday, r.start_time")
+        if rows is not None:
+            return rows
         try:
             query = self.client.table(self.table).select("*")
             if space_id:
@@ -23,10 +44,38 @@ class ClassScheduleRepository:
             response = query.order("weekday").order("start_time").execute()
             return response.data or []
         except Exception as e:
-            print(f"Error obteniendo horarios de clase: {e}")
+            logger.error("Error obteniendo horarios de clase: %s", e)
             return []
 
+    @retry.idempotent
+    def get_schedules_for_spaces(
+        self,
+        space_ids: List[str],
+        weekday: Optional[int] = None,
+    ) -> Optional[List[ClassSchedule]]:
+        """Horarios de varios espacios en una sola consulta, ya decodificados. None si la consulta falla.
+
+        Lo usan las validaciones de conflictos: siempre consulta la base de datos, sin
+        snapshot ni réplica local (son por máquina y pueden no ver lo que escribió otra
+        instancia) ni coalescencia con lecturas en curso.
+        """
+        if not space_ids:
+            return []
+        try:
+            query = self.client.table(self.table).select("*").in_("space_id", space_ids)
+            if weekday is not None:
+                query = query.eq("weekday", weekday)
+            response = query.order("start_time").execute()
+            return ClassSchedule.from_rows(response.data or [])
+        except Exception as e:
+            logger.error("Error obteniendo horarios de clase por espacios: %s", e)
+            return None
+
+    @retry.idempotent
     def get_by_id(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        cached = identity_map.lookup(self.table, schedule_id)
+        if cached is not None:
+            return cached
         try:
             response = (
                 self.client.table(self.table)
@@ -35,9 +84,9 @@ class ClassScheduleRepository:
                 .maybe_single()
                 .execute()
             )
-            return response.data
+            return identity_map.remember(self.table, schedule_id, response.data)
         except Exception as e:
-            print(f"Error obteniendo horario por id: {e}")
+            logger.error("Error obteniendo horario por id: %s", e)
             return None
 
     def create_schedule(
@@ -57,11 +106,41 @@ class ClassScheduleRepository:
                 "description": description or None,
             }
             response = self.client.table(self.table).insert(data).execute()
+            invalidation.publish(self.table, [r.get("id") for r in (response.data or [])])
             return response.data[0] if response.data else None
         except Exception as e:
-            print(f"Error creando horario de clase: {e}")
+            logger.error("Error creando horario de clase: %s", e)
             return None
 
+    def create_schedules(
+        self, schedules: List[Dict[str, Any]], batch_size: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Inserta horarios en lotes de batch_size filas. Retorna las filas creadas.
+
+        Si un lote falla se detienen los siguientes: el llamador detecta la falla
+        porque se retornan menos filas que las pedidas.
+        """
+        created: List[Dict[str, Any]] = []
+        for i in range(0, len(schedules), batch_size):
+            batch = [
+                {
+                    "space_id": s["space_id"],
+                    "weekday": s["weekday"],
+                    "start_time": s["start_time"],
+                    "end_time": s["end_time"],
+                    "description": s.get("description") or None,
+                }
+                for s in schedules[i:i + batch_size]
+            ]
+            try:
+                response = self.client.table(self.table).insert(batch).execute()
+                invalidation.publish(self.table, [r.get("id") for r in (response.data or [])])
+                created.extend(response.data or [])
+            except Exception as e:
+                logger.error("Error creando lote de horarios de clase: %s", e)
+                break
+        return created
+
     def update_schedule(
         self,
         schedule_id: str,
@@ -85,9 +164,10 @@ class ClassScheduleRepository:
                 .eq("id", schedule_id)
                 .execute()
             )
+            invalidation.publish(self.table, [schedule_id])
             return response.data[0] if response.data else None
         except Exception as e:
-            print(f"Error actualizando horario de clase: {e}")
+            logger.error("Error actualizando horario de clase: %s", e)
             return None
 
     def delete_schedule(self, schedule_id: str) -> bool:
@@ -95,7 +175,8 @@ class ClassScheduleRepository:
             response = (
                 self.client.table(self.table).delete().eq("id", schedule_id).execute()
             )
+            invalidation.publish(self.table, [schedule_id])
             return bool(response.data is not None)
         except Exception as e:
-            print(f"Error eliminando horario de clase: {e}")
+            logger.error("Error eliminando horario de clase: %s", e)
             return False
@@ -1,23 +1,103 @@
-from supabase import create_client, Client
+import logging
+import threading
+from typing import TYPE_CHECKING
 from app.config import Config
+from app.repositories.supabase.instrumentation import InstrumentedClient
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
 
 class SupabaseClient:
-    """Cliente singleton para Supabase"""
+    """Cliente singleton para Supabase.
+
+    Se comparte entre hilos y greenlets: cada table() crea un builder nuevo y httpx.Client
+    es seguro entre hilos, así que solo la creación perezosa necesita el lock.
+    """
     _instance = None
     _client = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SupabaseClient, cls).__new__(cls)
         return cls._instance
     
-    def get_client(self) -> Client:
+    def get_client(self) -> 'Client':
         """Obtiene el cliente de Supabase"""
-        if self._client is None:
-            self._client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                self._client = self._create_client()
         return self._client
 
-def get_supabase_client() -> Client:
+    def _create_client(self):
+        if Config.DATA_BACKEND == 'memory':
+            # Tablas en memoria con la misma API de builder (benchmarks y pruebas sin red)
+            from app.repositories.memory.client import MemoryClient
+            client = MemoryClient(
+                latency_ms=Config.MEMORY_BACKEND_LATENCY_MS,
+                seed_path=Config.MEMORY_BACKEND_SEED or None,
+            )
+        elif Config.DATA_BACKEND == 'postgres':
+            # Conexión directa con pool; psycopg es opcional y solo se importa con este backend
+            from app.repositories.postgres.client import PostgresClient
+            if not Config.DATABASE_URL:
+                raise ValueError("DATABASE_URL no configurada para DATA_BACKEND=postgres")
+            threshold = Config.POSTGRES_PREPARE_THRESHOLD
+            client = PostgresClient(
+                Config.DATABASE_URL,
+                min_size=Config.POSTGRES_POOL_MIN,
+                max_size=Config.POSTGRES_POOL_MAX,
+                timeout=Config.POSTGRES_POOL_TIMEOUT,
+                statement_timeout_ms=Config.POSTGRES_STATEMENT_TIMEOUT_MS,
+                prepare_threshold=None if threshold.lower() == 'none' else int(threshold),
+            )
+        else:
+            # supabase arrastra httpx/postgrest: se importa con la primera consulta
+            from supabase import create_client
+            client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+            # postgrest se crea perezosamente en la primera table(); crearlo aquí (bajo el
+            # lock) evita que dos hilos creen cada uno su propia sesión httpx
+            _configure_http_session(client.postgrest)
+        # Registra cada llamada por petición (X-Backend-Calls, detector de N+1)
+        return InstrumentedClient(client)
+
+def _configure_http_session(postgrest):
+    """Reemplaza la sesión httpx por defecto (sin límites ni timeouts propios) por la de Config.
+
+    La app no usa el auth de supabase, así que el cliente de postgrest (y esta sesión) no
+    se recrea después.
+    """
+    import httpx
+
+    session = postgrest.session
+    options = dict(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=httpx.Timeout(
+            Config.SUPABASE_READ_TIMEOUT,
+            connect=Config.SUPABASE_CONNECT_TIMEOUT,
+            pool=Config.SUPABASE_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=Config.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    try:
+        tuned = type(session)(http2=Config.SUPABASE_HTTP2, **options)
+    except ImportError:
+        logger.warning("SUPABASE_HTTP2=True requiere el paquete h2; se usa HTTP/1.1")
+        tuned = type(session)(**options)
+    postgrest.session = tuned
+    session.close()
+
+
+def get_supabase_client() -> 'Client':
     """Función helper para obtener el cliente de Supabase"""
     client = SupabaseClient()
     return client.get_client()
@@ -0,0 +1,51 @@
+"""
+Identity map por petición: cada entidad leída por ID se guarda en ``g`` y las lecturas
+siguientes de la misma fila dentro de la petición no vuelven al backend.
+
+Solo lo usan las lecturas por ID (get_reservation_by_id, get_user_by_id, get_space_by_id,
+get_by_id de horarios); las escrituras sacan la fila del mapa vía invalidation.publish.
+Fuera de una petición (scripts, hilos de correo) no hace nada.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from flask import g, has_request_context
+
+from app.metrics import record_cache
+
+Key = Tuple[str, str]
+
+
+def _entities() -> Optional[Dict[Key, Dict[str, Any]]]:
+    if not has_request_context():
+        return None
+    entities = g.get("_identity_map")
+    if entities is None:
+        entities = g._identity_map = {}
+    return entities
+
+
+def lookup(table: str, key: Any) -> Optional[Dict[str, Any]]:
+    """Fila ya leída en esta petición (None si no está)."""
+    entities = _entities()
+    if entities is None or key is None:
+        return None
+    row = entities.get((table, str(key)))
+    record_cache("identity_map", row is not None)
+    return row
+
+
+def remember(table: str, key: Any, row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Guarda la fila (si existe) y la retorna para encadenar con el return del repositorio."""
+    entities = _entities()
+    if entities is not None and row and key is not None:
+        entities[(table, str(key))] = row
+    return row
+
+
+def evict(table: str, keys: Iterable[Any]):
+    """Saca filas del mapa tras una escritura."""
+    entities = _entities()
+    if entities:
+        for key in keys:
+            entities.pop((table, str(key)), None)
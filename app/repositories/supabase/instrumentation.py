@@ -0,0 +1,178 @@
+"""
+Instrumentación del cliente compartido: registra cada llamada al backend por petición Flask.
+
+Por cada execute() se guarda tabla, operación, forma de la consulta (filtros y columnas,
+nunca valores), duración y filas devueltas en ``g``; la duración también alimenta el
+histograma por repositorio/método de app.metrics. Al final de la petición se agregan
+las cabeceras X-Backend-Calls / X-Backend-Time (modo debug o BACKEND_TRACE) y se avisa
+si la misma forma de consulta se repite más de N_PLUS_ONE_THRESHOLD veces (patrón N+1).
+Las lecturas de los métodos marcados con ``@retry.idempotent`` se reintentan (ver retry.py).
+"""
+
+import sys
+import time
+from collections import Counter
+from typing import Any, List, Optional
+
+from flask import Flask, g, has_request_context, request
+
+from app.metrics import BACKEND_ERRORS, BACKEND_LATENCY
+from app.repositories.supabase import retry
+
+OPERATIONS = {"select", "insert", "update", "delete", "upsert", "rpc"}
+
+
+class BackendCall:
+    """Una llamada al backend dentro de una petición."""
+
+    __slots__ = ("table", "operation", "shape", "duration_ms", "rows")
+
+    def __init__(self, table: str, operation: str, shape: str, duration_ms: float, rows: int):
+        self.table = table
+        self.operation = operation
+        self.shape = shape
+        self.duration_ms = duration_ms
+        self.rows = rows
+
+    def __repr__(self) -> str:
+        return f"BackendCall({self.shape}, {self.duration_ms:.1f}ms, rows={self.rows})"
+
+
+def get_request_backend_calls() -> Optional[List[BackendCall]]:
+    """Llamadas registradas en la petición actual (None fuera de una petición)."""
+    if not has_request_context():
+        return None
+    calls = g.get("_backend_calls")
+    if calls is None:
+        calls = g._backend_calls = []
+    return calls
+
+
+def _count_rows(response: Any) -> int:
+    data = getattr(response, "data", None)
+    if isinstance(data, list):
+        return len(data)
+    return 1 if data else 0
+
+
+class _TracedQuery:
+    """Proxy del builder de postgrest que anota la forma de la consulta hasta execute()."""
+
+    __slots__ = ("_query", "_table", "_operation", "_parts")
+
+    def __init__(self, query: Any, table: str):
+        object.__setattr__(self, "_query", query)
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_operation", "select")
+        object.__setattr__(self, "_parts", [])
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._query, name)
+        if name == "execute":
+            return self._execute
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if name in OPERATIONS:
+                object.__setattr__(self, "_operation", name)
+                if name == "select" and args:
+                    self._parts.append(f"select({','.join(args)})")
+            elif args and isinstance(args[0], str):
+                # Solo la columna: los valores no forman parte de la forma
+                self._parts.append(f"{name}({args[0]})")
+            else:
+                self._parts.append(name)
+            object.__setattr__(self, "_query", result)
+            return self
+        return call
+
+    def __setattr__(self, name: str, value: Any):
+        # query.params = query.params.set(...) debe llegar al builder real
+        setattr(self._query, name, value)
+
+    def _execute(self):
+        # Repositorio y método que llamó a execute() (etiquetas de las métricas)
+        caller = sys._getframe(1)
+        repository = caller.f_globals.get("__name__", "").rsplit(".", 1)[-1]
+        method = caller.f_code.co_name
+        calls = get_request_backend_calls()
+        rows = 0
+        t0 = time.perf_counter()
+        try:
+            response = retry.run(self._query.execute, self._operation, repository, method)
+            rows = _count_rows(response)
+            return response
+        except Exception:
+            BACKEND_ERRORS.inc(repository, method)
+            raise
+        finally:
+            shape = f"{self._table}.{self._operation} {' '.join(self._parts)}".strip()
+            _record(calls, self._table, self._operation, shape, repository, method,
+                    time.perf_counter() - t0, rows)
+
+
+def _record(calls: Optional[List[BackendCall]], table: str, operation: str, shape: str,
+            repository: str, method: str, elapsed: float, rows: int):
+    BACKEND_LATENCY.observe(elapsed, repository, method, operation)
+    if calls is not None:
+        calls.append(BackendCall(table, operation, shape, elapsed * 1000, rows))
+
+
+class InstrumentedClient:
+    """Envuelve el cliente de Supabase (o el de memoria) sin cambiar su API."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, table_name: str) -> _TracedQuery:
+        return _TracedQuery(self._client.table(table_name), table_name)
+
+    def from_(self, table_name: str) -> _TracedQuery:
+        return self.table(table_name)
+
+    def fetch(self, query: Any, params: Any = ()) -> List[Any]:
+        """SQL propio (solo DATA_BACKEND=postgres); se registra como operación 'sql'."""
+        caller = sys._getframe(1)
+        repository = caller.f_globals.get("__name__", "").rsplit(".", 1)[-1]
+        method = caller.f_code.co_name
+        calls = get_request_backend_calls()
+        rows: List[Any] = []
+        t0 = time.perf_counter()
+        try:
+            rows = retry.run(lambda: self._client.fetch(query, params), "sql", repository, method)
+            return rows
+        except Exception:
+            BACKEND_ERRORS.inc(repository, method)
+            raise
+        finally:
+            # La forma es el método que la ejecuta: el texto SQL no aporta al detector de N+1
+            _record(calls, repository, "sql", f"{repository}.sql {method}", repository, method,
+                    time.perf_counter() - t0, len(rows))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def register_backend_tracing(app: Flask):
+    """Registra los hooks que resumen las llamadas al backend de cada petición."""
+    threshold = int(app.config.get("N_PLUS_ONE_THRESHOLD", 5))
+
+    @app.before_request
+    def _start_backend_trace():
+        g._backend_calls = []
+
+    @app.after_request
+    def _finish_backend_trace(response):
+        calls = g.pop("_backend_calls", None) or []
+        if app.debug or app.config.get("BACKEND_TRACE"):
+            response.headers["X-Backend-Calls"] = str(len(calls))
+            response.headers["X-Backend-Time"] = f"{sum(c.duration_ms for c in calls):.1f}ms"
+        repeated = [(shape, n) for shape, n in Counter(c.shape for c in calls).items() if n > threshold]
+        for shape, n in repeated:
+            app.logger.warning(
+                "Posible N+1 en %s %s: '%s' se ejecutó %d veces (%d llamadas en total)",
+                request.method, request.path, shape, n, len(calls),
+            )
+        return response
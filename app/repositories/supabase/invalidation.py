@@ -0,0 +1,292 @@
+"""
+Bus de invalidación de cachés entre instancias.
+
+Los métodos de escritura de los repositorios llaman a ``publish(tabla, claves)``. El bus
+aplica la invalidación en este proceso (identity map, single-flight, snapshot compartido,
+réplica de lectura) y la envía por el transporte configurado a las demás instancias, que
+la aplican al recibirla.
+``claves=None`` significa "cambió la tabla completa" (inserciones, cambios masivos).
+
+Transportes (INVALIDATION_TRANSPORT):
+  local     solo este proceso (por defecto; también sirve para simular nodos en pruebas)
+  sqlite    tabla en un archivo SQLite compartido (INVALIDATION_SQLITE_PATH) que cada
+            proceso consulta cada INVALIDATION_POLL_INTERVAL segundos; para pruebas y
+            varias instancias en la misma máquina
+  postgres  NOTIFY/LISTEN sobre INVALIDATION_DATABASE_URL (requiere ``pip install
+            "psycopg[binary]"``); app/scripts/02_invalidation_notify.sql agrega triggers
+            para que también se publiquen los cambios hechos desde el panel de Supabase
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+Handler = Callable[[str, Optional[List[str]]], None]
+
+# Tablas con cachés que dependen de ellas; tras perder mensajes se invalidan completas
+TABLES = ("spaces", "class_schedules", "users", "reservations", "notifications")
+
+# NOTIFY acepta payloads de hasta 8000 bytes
+MAX_PAYLOAD = 7900
+
+
+class LocalTransport:
+    """Entrega los mensajes a los buses suscritos en este mismo proceso."""
+
+    def __init__(self):
+        self._listeners: List[Callable[[Message], None]] = []
+        self._lock = threading.Lock()
+
+    def send(self, message: Message):
+        with self._lock:
+            listeners = list(self._listeners)
+        for deliver in listeners:
+            deliver(message)
+
+    def listen(self, deliver: Callable[[Message], None]):
+        with self._lock:
+            self._listeners.append(deliver)
+
+    def close(self):
+        with self._lock:
+            self._listeners.clear()
+
+
+class SQLiteTransport:
+    """Mensajes en una tabla SQLite; cada proceso lee los nuevos por id."""
+
+    def __init__(self, path: str, poll_interval: float = 0.5, retention: float = 3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._sent = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        return conn
+
+    def send(self, message: Message):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            now = time.time()
+            self._conn.execute("INSERT INTO invalidations (payload, created_at) VALUES (?, ?)",
+                               (json.dumps(message), now))
+            self._sent += 1
+            if self._sent % 100 == 0:
+                self._conn.execute("DELETE FROM invalidations WHERE created_at < ?", (now - self.retention,))
+
+    def listen(self, deliver: Callable[[Message], None]):
+        conn = self._connect()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+
+        def poll():
+            nonlocal last_id
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    rows = conn.execute("SELECT id, payload FROM invalidations WHERE id > ? ORDER BY id",
+                                        (last_id,)).fetchall()
+                except sqlite3.Error as e:
+                    logger.error("Error leyendo invalidaciones de SQLite: %s", e)
+                    continue
+                for row_id, payload in rows:
+                    last_id = row_id
+                    deliver(json.loads(payload))
+            conn.close()
+
+        self._thread = threading.Thread(target=poll, name="invalidation-sqlite", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class PostgresTransport:
+    """NOTIFY para publicar y una conexión dedicada con LISTEN para recibir."""
+
+    def __init__(self, dsn: str, channel: str):
+        import psycopg  # dependencia opcional
+
+        self._psycopg = psycopg
+        self.dsn = dsn
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def send(self, message: Message):
+        payload = json.dumps(message)
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD:
+            payload = json.dumps(dict(message, keys=None))
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None or self._conn.closed:
+                        self._conn = self._psycopg.connect(self.dsn, autocommit=True)
+                    self._conn.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except self._psycopg.OperationalError:
+                    # Conexión cortada (reinicio del pooler, idle timeout): reconectar una vez
+                    self._conn = None
+                    if attempt:
+                        raise
+
+    def listen(self, deliver: Callable[[Message], None]):
+        from psycopg import sql
+
+        def run():
+            backoff = 1.0
+            connected_before = False
+            while not self._stop.is_set():
+                try:
+                    with self._psycopg.connect(self.dsn, autocommit=True) as conn:
+                        conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                        if connected_before:
+                            # Lo publicado mientras no escuchábamos se perdió: invalidar todo
+                            for table in TABLES:
+                                deliver({"origin": None, "table": table, "keys": None})
+                        connected_before = True
+                        backoff = 1.0
+                        while not self._stop.is_set():
+                            for notify in conn.notifies(timeout=1.0):
+                                deliver(json.loads(notify.payload))
+                except Exception as e:
+                    logger.error("Conexión LISTEN de invalidaciones perdida: %s", e)
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 30.0)
+
+        self._thread = threading.Thread(target=run, name="invalidation-listen", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class InvalidationBus:
+    """Publica invalidaciones y las aplica con los handlers suscritos."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.origin = uuid.uuid4().hex
+        self._handlers: List[Handler] = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Handler):
+        self._handlers.append(handler)
+
+    def start(self):
+        """Empieza a recibir las invalidaciones de otras instancias."""
+        with self._lock:
+            if not self._started:
+                self.transport.listen(self._receive)
+                self._started = True
+
+    def close(self):
+        self.transport.close()
+
+    def _apply(self, table: str, keys: Optional[List[str]]):
+        for handler in self._handlers:
+            try:
+                handler(table, keys)
+            except Exception as e:
+                logger.error("Error invalidando caché de %s: %s", table, e)
+
+    def _receive(self, message: Message):
+        if message.get("origin") == self.origin:
+            return
+        table = message.get("table")
+        if table:
+            self._apply(table, message.get("keys"))
+
+    def publish(self, table: str, keys: Optional[Iterable[Any]] = None):
+        keys = None if keys is None else [str(k) for k in keys if k is not None]
+        self._apply(table, keys)
+        try:
+            self.transport.send({"origin": self.origin, "table": table, "keys": keys})
+        except Exception as e:
+            # La escritura ya se hizo; las otras instancias se ponen al día por TTL
+            logger.error("No se pudo publicar la invalidación de %s: %s", table, e)
+
+
+def _invalidate_local_caches(table: str, keys: Optional[List[str]]):
+    from app.repositories.supabase import identity_map, read_replica, shared_snapshot, single_flight
+
+    if keys:
+        identity_map.evict(table, keys)
+    single_flight.forget(table)
+    shared_snapshot.invalidate(table, keys)
+    read_replica.invalidate(table, keys)
+
+
+def _create_transport():
+    kind = Config.INVALIDATION_TRANSPORT
+    if kind == "sqlite":
+        return SQLiteTransport(Config.INVALIDATION_SQLITE_PATH, Config.INVALIDATION_POLL_INTERVAL)
+    if kind == "postgres":
+        if not Config.INVALIDATION_DATABASE_URL:
+            raise ValueError("INVALIDATION_DATABASE_URL no configurada")
+        return PostgresTransport(Config.INVALIDATION_DATABASE_URL, Config.INVALIDATION_CHANNEL)
+    return LocalTransport()
+
+
+_bus: Optional[InvalidationBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_bus() -> InvalidationBus:
+    """Bus del proceso; si el transporte configurado no está disponible usa el local."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                try:
+                    transport = _create_transport()
+                except Exception as e:
+                    logger.error("Transporte de invalidación '%s' no disponible, se usa el local: %s",
+                                 Config.INVALIDATION_TRANSPORT, e)
+                    transport = LocalTransport()
+                bus = InvalidationBus(transport)
+                bus.subscribe(_invalidate_local_caches)
+                _bus = bus
+    return _bus
+
+
+def publish(table: str, keys: Optional[Iterable[Any]] = None):
+    """Llamar tras escribir en la tabla; keys=None invalida la tabla completa."""
+    get_bus().publish(table, keys)
+
+
+def init_app(app):
+    """Arranca la escucha de invalidaciones remotas al crear la app."""
+    if Config.INVALIDATION_TRANSPORT != "local":
+        get_bus().start()
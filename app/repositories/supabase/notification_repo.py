@@ -1,8 +1,16 @@
+import logging
 from app.repositories.supabase.client import get_supabase_client
+from app.repositories.supabase import invalidation, retry
 from typing import Optional, Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
 class NotificationRepository:
-    """Repositorio para operaciones de notificaciones"""
+    """Repositorio para operaciones de notificaciones.
+
+    Las invalidaciones de esta tabla usan el user_id como clave (los contadores de no
+    leídas son por usuario).
+    """
     
     def __init__(self):
         self.client = get_supabase_client()
@@ -23,13 +31,42 @@ class NotificationRepository:
                 data['link'] = link
             
             response = self.client.table(self.table).insert(data).execute()
+            invalidation.publish(self.table, [user_id])
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creando notificación: {e}")
+            logger.error("Error creando notificación: %s", e)
             return None
     
+    def create_notifications(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Crea varias notificaciones en un solo insert.
+
+        Cada elemento usa las mismas claves que create_notification
+        (user_id, title, message, type, link).
+        """
+        if not notifications:
+            return []
+        try:
+            rows = []
+            for n in notifications:
+                data = {
+                    'user_id': n['user_id'],
+                    'title': n['title'],
+                    'message': n['message'],
+                    'type': n.get('type', 'info'),
+                    'read': False,
+                    'link': n.get('link')
+                }
+                rows.append(data)
+            response = self.client.table(self.table).insert(rows).execute()
+            invalidation.publish(self.table, {r['user_id'] for r in rows})
+            return response.data if response.data else []
+        except Exception as e:
+            logger.error("Error creando notificaciones: %s", e)
+            return []
+    
+    @retry.idempotent
     def get_user_notifications(self, user_id: str, unread_only: bool = False) -> List[Dict[str, Any]]:
         """Obtiene las notificaciones de un usuario"""
         try:
@@ -39,34 +76,37 @@ class NotificationRepository:
             response = query.order('created_at', desc=True).execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error obteniendo notificaciones: {e}")
+            logger.error("Error obteniendo notificaciones: %s", e)
             return []
     
     def mark_as_read(self, notification_id: str) -> Optional[Dict[str, Any]]:
         """Marca una notificación como leída"""
         try:
             response = self.client.table(self.table).update({'read': True}).eq('id', notification_id).execute()
+            invalidation.publish(self.table, [r.get('user_id') for r in (response.data or [])])
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error marcando notificación como leída: {e}")
+            logger.error("Error marcando notificación como leída: %s", e)
             return None
     
     def mark_all_as_read(self, user_id: str) -> bool:
         """Marca todas las notificaciones de un usuario como leídas"""
         try:
             response = self.client.table(self.table).update({'read': True}).eq('user_id', user_id).eq('read', False).execute()
+            invalidation.publish(self.table, [user_id])
             return True
         except Exception as e:
-            print(f"Error marcando todas las notificaciones como leídas: {e}")
+            logger.error("Error marcando todas las notificaciones como leídas: %s", e)
             return False
     
+    @retry.idempotent(budget_ms=1000)
     def get_unread_count(self, user_id: str) -> int:
         """Obtiene el conteo de notificaciones no leídas"""
         try:
             response = self.client.table(self.table).select('id', count='exact').eq('user_id', user_id).eq('read', False).execute()
             return response.count if response.count else 0
         except Exception as e:
-            print(f"Error obteniendo conteo de notificaciones no leídas: {e}")
+            logger.error("Error obteniendo conteo de notificaciones no leídas: %s", e)
             return 0
@@ -0,0 +1,400 @@
+"""
+Réplica local de solo lectura (SQLite) de reservations, spaces, class_schedules y un
+resumen de users (sin password_hash ni códigos de verificación).
+
+Los repositorios sirven desde aquí las lecturas de listados (calendario, mis reservas,
+ocupación del chatbot, listados de admin) y consultan Supabase solo para sincronizar. Las
+validaciones de conflicto y las lecturas previas a una escritura siguen yendo al primario.
+
+Sincronización (como mucho cada READ_REPLICA_MAX_STALENESS segundos, en la petición que
+la encuentra vencida):
+  - filas con updated_at >= marca de agua de cada tabla (03_updated_at_triggers.sql
+    mantiene updated_at al día en Postgres)
+  - reservation_deletions con created_at >= marca de agua: se borran de la réplica
+  - las claves publicadas en el bus de invalidación se releen por id (así también se ven
+    borrados de horarios/espacios y las escrituras propias en la siguiente lectura)
+  - cada READ_REPLICA_FULL_SYNC_INTERVAL segundos se recarga todo (cascadas, borrados
+    hechos desde el panel)
+
+El archivo se comparte entre los workers de la máquina (WAL); las marcas de agua viven en
+la tabla sync_state del mismo archivo.
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.config import Config
+from app.metrics import record_cache
+from app.repositories.select_parser import FOREIGN_KEYS, parse_select
+
+logger = logging.getLogger(__name__)
+
+# Columnas replicadas por tabla (id siempre primero)
+MIRRORED: Dict[str, Tuple[str, ...]] = {
+    "spaces": ("id", "name", "type", "lab_category", "floor", "capacity", "description",
+               "created_at", "updated_at"),
+    "class_schedules": ("id", "space_id", "weekday", "start_time", "end_time", "description",
+                        "created_at", "updated_at"),
+    "users": ("id", "name", "email", "student_id", "role", "created_at", "updated_at"),
+    "reservations": ("id", "user_id", "space_id", "date", "start_time", "end_time", "justification",
+                     "status", "booking_id", "admin_id", "reviewed_at", "created_at", "updated_at"),
+}
+# Tablas con todas sus columnas replicadas: select('*') se puede servir desde la réplica
+FULL_TABLES = {"spaces", "class_schedules"}
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_reservations_space_date ON reservations(space_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_reservations_user_date ON reservations(user_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_reservations_status_created ON reservations(status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_class_schedules_space_weekday ON class_schedules(space_id, weekday)",
+)
+
+PAGE_SIZE = 1000
+# NOW() en Postgres es la hora de inicio de la transacción: una fila puede confirmarse con un
+# updated_at algo anterior al último visto. Cada sync incremental relee este margen.
+OVERLAP = timedelta(seconds=10)
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _max_ts(current: Optional[str], rows: List[Dict[str, Any]], column: str) -> Optional[str]:
+    values = [r[column] for r in rows if r.get(column)]
+    if current:
+        values.append(current)
+    return max(values, key=_parse_ts) if values else None
+
+
+def _fetch_pages(build: Callable[[Optional[Any]], Any], cursor_column: str) -> Optional[List[Dict[str, Any]]]:
+    """Pagina con PAGE_SIZE filas por consulta usando la última fila como cursor.
+
+    Retorna None si una página entera comparte el mismo valor de cursor (no se puede
+    avanzar sin saltar filas: quien llama recarga la tabla completa).
+    """
+    rows: List[Dict[str, Any]] = []
+    cursor = None
+    while True:
+        page = build(cursor).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        if page[0][cursor_column] == page[-1][cursor_column]:
+            return None
+        cursor = page[-1][cursor_column]
+
+
+class ReadReplica:
+    """Archivo SQLite con las tablas replicadas y sus marcas de agua."""
+
+    def __init__(self, path: str, max_staleness: float, full_sync_interval: float,
+                 full_on_start: bool = False):
+        self.path = path
+        self.max_staleness = max_staleness
+        self.full_sync_interval = full_sync_interval
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._touched: Dict[str, Set[str]] = {}
+        self._stale = full_on_start
+        self._needs_full = full_on_start
+        self._last_sync = 0.0
+        self._compiled: Dict[Tuple[str, str], Tuple[str, Callable[[Sequence[Any]], Dict[str, Any]]]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_schema(self._conn())
+
+    # ---- conexión y esquema ----
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _init_schema(conn: sqlite3.Connection):
+        for table, columns in MIRRORED.items():
+            others = ", ".join(f'"{c}"' for c in columns[1:])
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ("id" TEXT PRIMARY KEY, {others})')
+        for statement in INDEXES:
+            conn.execute(statement)
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value TEXT)")
+
+    # ---- invalidación ----
+    def invalidate(self, table: str, keys: Optional[List[str]]):
+        """Handler del bus: relee esas claves por id en la siguiente lectura (keys=None: sync completa)."""
+        if table not in MIRRORED:
+            return
+        with self._pending_lock:
+            if keys:
+                self._touched.setdefault(table, set()).update(keys)
+            else:
+                self._stale = True
+
+    # ---- sincronización ----
+    def ensure_fresh(self, client: Any) -> bool:
+        """Sincroniza si hace falta. Retorna True si la lectura se sirve sin consultar Supabase.
+
+        Las claves tocadas se releen por id (una consulta); el resto de la sincronización
+        corre solo cuando vence READ_REPLICA_MAX_STALENESS o llega una invalidación sin claves.
+        """
+        with self._sync_lock:
+            now = time.time()
+            with self._pending_lock:
+                stale = self._stale or now - self._last_sync >= self.max_staleness
+                if not stale and not self._touched:
+                    return True
+            if stale and not self._stale:
+                # Otro worker de la máquina pudo sincronizar el archivo hace poco
+                row = self._conn().execute("SELECT value FROM sync_state WHERE name = 'last_sync'").fetchone()
+                if row and now - float(row[0]) < self.max_staleness:
+                    self._last_sync = float(row[0])
+                    stale = False
+            with self._pending_lock:
+                touched, self._touched = self._touched, {}
+                self._stale = False
+            if not stale and not touched:
+                return True
+            try:
+                self._sync(client, touched, stale)
+            except Exception:
+                with self._pending_lock:
+                    self._stale = self._stale or stale
+                    for table, keys in touched.items():
+                        self._touched.setdefault(table, set()).update(keys)
+                raise
+            return False
+
+    def _sync(self, client: Any, touched: Dict[str, Set[str]], stale: bool):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = dict(conn.execute("SELECT name, value FROM sync_state").fetchall())
+            now = time.time()
+            full = stale and (self._needs_full or not state.get("last_full_sync")
+                              or now - float(state["last_full_sync"]) > self.full_sync_interval)
+            if stale:
+                for table in MIRRORED:
+                    if full or not self._sync_changed(client, conn, table, state):
+                        self._load_table(client, conn, table, state)
+            if full:
+                latest = (client.table("reservation_deletions").select("created_at")
+                          .order("created_at", desc=True).limit(1).execute().data or [])
+                state["reservation_deletions"] = latest[0]["created_at"] if latest else None
+                state["last_full_sync"] = now
+            else:
+                if stale:
+                    self._apply_deletions(client, conn, state)
+                for table, keys in touched.items():
+                    self._refresh_keys(client, conn, table, keys)
+            if stale:
+                state["last_sync"] = now
+            conn.executemany("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+                             [(k, v) for k, v in state.items() if v is not None])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if stale:
+            self._needs_full = False
+            self._last_sync = now
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, table: str, rows: List[Dict[str, Any]]):
+        columns = MIRRORED[table]
+        placeholders = ", ".join("?" for _ in columns)
+        names = ", ".join(f'"{c}"' for c in columns)
+        conn.executemany(f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({placeholders})",
+                         [tuple(r.get(c) for c in columns) for r in rows])
+
+    def _load_table(self, client: Any, conn: sqlite3.Connection, table: str, state: Dict[str, Any]):
+        """Recarga la tabla completa (paginando por id, que es único)."""
+        select = ", ".join(MIRRORED[table])
+
+        def build(last_id):
+            query = client.table(table).select(select).order("id").limit(PAGE_SIZE)
+            return query.gt("id", last_id) if last_id is not None else query
+
+        rows = _fetch_pages(build, "id")
+        conn.execute(f"DELETE FROM {table}")
+        self._upsert(conn, table, rows)
+        state[table] = _max_ts(None, rows, "updated_at")
+
+    def _sync_changed(self, client: Any, conn: sqlite3.Connection, table: str, state: Dict[str, Any]) -> bool:
+        """Trae las filas con updated_at desde la marca de agua. False si hay que recargar."""
+        watermark = state.get(table)
+        if not watermark:
+            return False
+        since = (_parse_ts(watermark) - OVERLAP).isoformat()
+        select = ", ".join(MIRRORED[table])
+
+        def build(cursor):
+            return (client.table(table).select(select).gte("updated_at", cursor or since)
+                    .order("updated_at").order("id").limit(PAGE_SIZE))
+
+        rows = _fetch_pages(build, "updated_at")
+        if rows is None:
+            return False
+        self._upsert(conn, table, rows)
+        state[table] = _max_ts(watermark, rows, "updated_at")
+        return True
+
+    def _apply_deletions(self, client: Any, conn: sqlite3.Connection, state: Dict[str, Any]):
+        watermark = state.get("reservation_deletions")
+
+        def build(cursor):
+            query = (client.table("reservation_deletions").select("reservation_id, created_at")
+                     .order("created_at").limit(PAGE_SIZE))
+            start = cursor or ((_parse_ts(watermark) - OVERLAP).isoformat() if watermark else None)
+            return query.gte("created_at", start) if start else query
+
+        rows = _fetch_pages(build, "created_at")
+        if rows is None:
+            # Más de PAGE_SIZE borrados en el mismo instante: la próxima sync será completa
+            self._needs_full = True
+            return
+        ids = [(r["reservation_id"],) for r in rows if r.get("reservation_id")]
+        conn.executemany("DELETE FROM reservations WHERE id = ?", ids)
+        state["reservation_deletions"] = _max_ts(watermark, rows, "created_at")
+
+    def _refresh_keys(self, client: Any, conn: sqlite3.Connection, table: str, keys: Iterable[str]):
+        """Relee por id las filas tocadas: actualiza las que siguen y borra las que no."""
+        keys = list(keys)
+        select = ", ".join(MIRRORED[table])
+        for i in range(0, len(keys), 200):
+            chunk = keys[i:i + 200]
+            rows = client.table(table).select(select).in_("id", chunk).execute().data or []
+            self._upsert(conn, table, rows)
+            found = {str(r["id"]) for r in rows}
+            conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(k,) for k in chunk if k not in found])
+
+    # ---- lectura ----
+    def _compile(self, table: str, columns: str):
+        """Traduce un select de PostgREST (columnas y embeds muchos-a-uno) a SQL y un armador de filas."""
+        key = (table, columns)
+        if key in self._compiled:
+            return self._compiled[key]
+
+        def expand(tbl: str, fields) -> List[Tuple[str, str]]:
+            out = []
+            for kind, spec in fields:
+                if kind == "*":
+                    if tbl not in FULL_TABLES:
+                        raise ValueError(f"{tbl}: la réplica no tiene todas las columnas")
+                    out.extend((c, c) for c in MIRRORED[tbl])
+                elif kind == "col":
+                    alias, column = spec
+                    if column not in MIRRORED[tbl]:
+                        raise ValueError(f"{tbl}.{column} no está replicada")
+                    out.append((alias, column))
+                else:
+                    raise ValueError("embeds anidados no soportados")
+            return out
+
+        selects: List[str] = []
+        joins: List[str] = []
+        layout: List[Tuple[Optional[str], List[str]]] = []  # (alias de embed o None, claves)
+        for kind, spec in parse_select(columns):
+            if kind != "embed":
+                cols = expand(table, [(kind, spec)])
+                selects.extend(f'r."{c}"' for _, c in cols)
+                layout.append((None, [a for a, _ in cols]))
+                continue
+            alias, relation, hint, inner = spec
+            local = next((column for fk_table, column, ref_table, _ in FOREIGN_KEYS
+                          if fk_table == table and ref_table == relation
+                          and hint in (None, f"{fk_table}_{column}_fkey", column)), None)
+            if local is None or relation not in MIRRORED:
+                raise ValueError(f"embed {relation} no soportado en la réplica")
+            join_alias = f"j{len(joins)}"
+            joins.append(f'LEFT JOIN {relation} {join_alias} ON {join_alias}.id = r."{local}"')
+            cols = expand(relation, inner)
+            selects.append(f"{join_alias}.id")
+            selects.extend(f'{join_alias}."{c}"' for _, c in cols)
+            layout.append((alias, [a for a, _ in cols]))
+
+        def shape(row: Sequence[Any]) -> Dict[str, Any]:
+            out: Dict[str, Any] = {}
+            i = 0
+            for alias, keys in layout:
+                if alias is None:
+                    for k in keys:
+                        out[k] = row[i]
+                        i += 1
+                else:
+                    present = row[i] is not None
+                    i += 1
+                    values = row[i:i + len(keys)]
+                    i += len(keys)
+                    out[alias] = dict(zip(keys, values)) if present else None
+            return out
+
+        sql = f"SELECT {', '.join(selects)} FROM {table} r {' '.join(joins)}"
+        self._compiled[key] = (sql, shape)
+        return sql, shape
+
+    def select(self, client: Any, table: str, columns: str, where: str = "", params: Sequence[Any] = (),
+               order: str = "") -> List[Dict[str, Any]]:
+        """Filas con la forma de PostgREST. where/order en SQL sobre el alias ``r`` de la tabla."""
+        sql, shape = self._compile(table, columns)
+        record_cache("read_replica", self.ensure_fresh(client))
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        return [shape(row) for row in self._conn().execute(sql, tuple(params)).fetchall()]
+
+
+_replica: Optional[ReadReplica] = None
+_replica_lock = threading.Lock()
+
+
+def _default_path() -> Optional[str]:
+    if Config.READ_REPLICA_PATH:
+        return Config.READ_REPLICA_PATH
+    if Config.DATA_BACKEND == "memory":
+        return None
+    import hashlib
+    project = hashlib.sha1((Config.SUPABASE_URL or Config.DATABASE_URL).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"reservaspuce-replica-{project}.sqlite3")
+
+
+def get_replica() -> Optional[ReadReplica]:
+    """Réplica del proceso, o None si está desactivada."""
+    global _replica
+    if _replica is None and Config.READ_REPLICA_ENABLED:
+        with _replica_lock:
+            path = _default_path()
+            if _replica is None and path:
+                # En memoria cada proceso arranca con datos nuevos: recargar todo al inicio
+                _replica = ReadReplica(path, Config.READ_REPLICA_MAX_STALENESS,
+                                       Config.READ_REPLICA_FULL_SYNC_INTERVAL,
+                                       full_on_start=Config.DATA_BACKEND == "memory")
+    return _replica
+
+
+def select(client: Any, table: str, columns: str, where: str = "", params: Sequence[Any] = (),
+           order: str = "") -> Optional[List[Dict[str, Any]]]:
+    """Filas desde la réplica, o None (desactivada o error: el repositorio consulta Supabase)."""
+    replica = get_replica()
+    if replica is None:
+        return None
+    try:
+        return replica.select(client, table, columns, where, params, order)
+    except Exception as e:
+        logger.error("Réplica de lectura no disponible para %s: %s", table, e)
+        return None
+
+
+def invalidate(table: str, keys: Optional[List[str]]):
+    """Handler del bus de invalidación."""
+    if _replica is not None:
+        _replica.invalidate(table, keys)
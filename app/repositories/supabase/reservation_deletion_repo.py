@@ -1,5 +1,9 @@
-from typing import Optional, Dict, Any
+import logging
+from typing import Optional, Dict, Any, List
 from app.repositories.supabase.client import get_supabase_client
+from app.repositories.supabase import retry
+
+logger = logging.getLogger(__name__)
 
 
 class ReservationDeletionRepository:
@@ -9,6 +13,23 @@ class ReservationDeletionRepository:
         self.client = get_supabase_client()
         self.table = "reservation_deletions"
 
+    def _deletion_row(
+        self,
+        reservation: Dict[str, Any],
+        admin_id: Optional[str],
+        reason: str,
+    ) -> Dict[str, Any]:
+        return {
+            "reservation_id": reservation.get("id"),
+            "user_id": reservation.get("user_id"),
+            "space_id": reservation.get("space_id"),
+            "date": reservation.get("date"),
+            "start_time": reservation.get("start_time"),
+            "end_time": reservation.get("end_time"),
+            "admin_id": admin_id,
+            "reason": reason,
+        }
+
     def log_deletion(
         self,
         reservation: Dict[str, Any],
@@ -16,22 +37,46 @@ class ReservationDeletionRepository:
         reason: str,
     ) -> Optional[Dict[str, Any]]:
         try:
-            data = {
-                "reservation_id": reservation.get("id"),
-                "user_id": reservation.get("user_id"),
-                "space_id": reservation.get("space_id"),
-                "date": reservation.get("date"),
-                "start_time": reservation.get("start_time"),
-                "end_time": reservation.get("end_time"),
-                "admin_id": admin_id,
-                "reason": reason,
-            }
+            data = self._deletion_row(reservation, admin_id, reason)
             resp = self.client.table(self.table).insert(data).execute()
             return resp.data[0] if resp.data else None
         except Exception as e:
-            print(f"Error registrando eliminación de reserva: {e}")
+            logger.error("Error registrando eliminación de reserva: %s", e)
+            return None
+
+    def log_deletions(
+        self,
+        reservations: List[Dict[str, Any]],
+        admin_id: Optional[str],
+        reason: str,
+    ) -> List[Dict[str, Any]]:
+        """Registra varias eliminaciones en un solo insert."""
+        if not reservations:
+            return []
+        try:
+            rows = [self._deletion_row(r, admin_id, reason) for r in reservations]
+            resp = self.client.table(self.table).insert(rows).execute()
+            return resp.data or []
+        except Exception as e:
+            logger.error("Error registrando eliminaciones de reservas: %s", e)
+            return []
+
+    @retry.idempotent
+    def get_deleted_since(self, since: str) -> Optional[List[Dict[str, Any]]]:
+        """IDs de reservas eliminadas desde since (tombstones del calendario). None si falla."""
+        try:
+            resp = (
+                self.client.table(self.table)
+                .select("reservation_id, created_at")
+                .gte("created_at", since)
+                .execute()
+            )
+            return resp.data or []
+        except Exception as e:
+            logger.error("Error obteniendo eliminaciones recientes: %s", e)
             return None
 
+    @retry.idempotent
     def get_logs(
         self,
         limit: int = 100,
@@ -57,5 +102,5 @@ class ReservationDeletionRepository:
             resp = query.order("created_at", desc=True).limit(limit).execute()
             return resp.data or []
         except Exception as e:
-            print(f"Error obteniendo bitácora de eliminaciones: {e}")
+            logger.error("Error obteniendo bitácora de eliminaciones: %s", e)
             return []
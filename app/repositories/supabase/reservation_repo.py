@@ -1,6 +1,56 @@
+import logging
+from contextlib import nullcontext
 from app.repositories.supabase.client import get_supabase_client
+from app.repositories.supabase import identity_map, invalidation, read_replica, retry, single_flight
+from app.models.reservation import Reservation, normalize_embeds
+from app.models.time_range import TimeRange, find_overlap
 from typing import Optional, Dict, Any, List
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+
+logger = logging.getLogger(__name__)
+
+# Proyecciones explícitas por caso de uso. Nunca se embebe users(*): password_hash,
+# verification_code y verification_expires_at no deben salir de la base de datos.
+_RESERVATION_COLUMNS = 'id, user_id, space_id, date, start_time, end_time, justification, status, booking_id, created_at'
+_USER_SUMMARY = 'users!reservations_user_id_fkey(id, name, email, student_id)'
+_SPACE_SUMMARY = 'spaces(id, name, type, lab_category, floor, capacity)'
+
+READ_MODELS = {
+    # Eventos de FullCalendar: solo lo que se pinta en el calendario
+    'calendar': 'id, space_id, date, start_time, end_time, status, justification, created_at, '
+                'spaces(name, type, floor), users!reservations_user_id_fkey(name)',
+    # Filas de los listados de admin (y correos de aprobación/rechazo)
+    'admin_list': f'{_RESERVATION_COLUMNS}, {_SPACE_SUMMARY}, {_USER_SUMMARY}',
+    # Pantallas de detalle
+    'detail': f'{_RESERVATION_COLUMNS}, admin_id, reviewed_at, updated_at, '
+              f'spaces(id, name, type, lab_category, floor, capacity, description), {_USER_SUMMARY}',
+    # Recordatorios por correo
+    'reminder': 'id, user_id, date, start_time, end_time, justification, '
+                'spaces(name), users!reservations_user_id_fkey(name, email)',
+    # Conteos del dashboard
+    'status': 'id, status',
+}
+# Cambios incrementales del calendario: además updated_at para avanzar el cursor
+READ_MODELS['calendar_changes'] = f"{READ_MODELS['calendar']}, updated_at"
+
+
+def _returning(query: Any, columns: str) -> Any:
+    """Pide que la escritura devuelva columns (con embeds) en lugar de la fila plana.
+
+    postgrest-py 0.13.x (el que instala supabase==2.0.0) no tiene select() en los
+    builders de update/delete: se fija el parámetro select sobre query.params, un
+    httpx.QueryParams interno. Los clientes memory y postgres imitan ese atributo.
+    Revisar este helper al actualizar supabase/postgrest.
+    """
+    query.params = query.params.set('select', columns)
+    return query
+
+
+class _Autocommit:
+    """Lo que entrega transaction() sin transacción real: cada sentencia ya quedó confirmada."""
+
+    committed = True
+
 
 class ReservationRepository:
     """Repositorio para operaciones de reservas"""
@@ -8,6 +58,13 @@ class ReservationRepository:
     def __init__(self):
         self.client = get_supabase_client()
         self.table = 'reservations'
+
+    def transaction(self):
+        """Agrupa escrituras en una transacción; PostgREST no las permite, aquí no hace nada.
+
+        El valor del with tiene committed: con DATA_BACKEND=postgres es False si hubo ROLLBACK.
+        """
+        return nullcontext(_Autocommit())
     
     def create_reservation(self, user_id: str, space_id: str, date: str, start_time: str, 
                           end_time: str, justification: str, status: str = 'pending') -> Optional[Dict[str, Any]]:
@@ -23,134 +80,311 @@ class ReservationRepository:
                 'status': status
             }
             response = self.client.table(self.table).insert(data).execute()
+            invalidation.publish(self.table, [r.get('id') for r in (response.data or [])])
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creando reserva: {e}")
+            logger.error("Error creando reserva: %s", e)
             return None
     
+    def create_reservations(self, reservations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Crea varias reservas en un solo insert (todas o ninguna)"""
+        if not reservations:
+            return []
+        try:
+            response = self.client.table(self.table).insert(reservations).execute()
+            invalidation.publish(self.table, [r.get('id') for r in (response.data or [])])
+            return response.data if response.data else []
+        except Exception as e:
+            logger.error("Error creando reservas: %s", e)
+            return []
+    
+    @retry.idempotent
     def get_reservation_by_id(self, reservation_id: str) -> Optional[Dict[str, Any]]:
         """Obtiene una reserva por ID con información relacionada"""
+        cached = identity_map.lookup(self.table, reservation_id)
+        if cached is not None:
+            return cached
         try:
             # Especificar la relación correcta: users!reservations_user_id_fkey es el usuario que hizo la reserva
-            response = self.client.table(self.table).select('*, spaces(*), users!reservations_user_id_fkey(*)').eq('id', reservation_id).execute()
+            response = self.client.table(self.table).select(READ_MODELS['detail']).eq('id', reservation_id).execute()
             if response.data and len(response.data) > 0:
-                reservation = response.data[0]
-                # Agregar el usuario como 'user' para facilitar el acceso en templates
-                if reservation.get('users'):
-                    reservation['user'] = reservation['users']
-                return reservation
+                reservation = normalize_embeds(response.data[0])
+                return identity_map.remember(self.table, reservation_id, reservation)
             
             # Si no funciona con joins, intentar sin joins
-            response = self.client.table(self.table).select('*').eq('id', reservation_id).execute()
+            response = self.client.table(self.table).select(_RESERVATION_COLUMNS).eq('id', reservation_id).execute()
             if response.data and len(response.data) > 0:
-                return response.data[0]
+                return identity_map.remember(self.table, reservation_id, response.data[0])
             
             return None
         except Exception as e:
-            print(f"Error obteniendo reserva por ID '{reservation_id}': {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error obteniendo reserva por ID '%s': %s", reservation_id, e)
             return None
     
+    @retry.idempotent
     def get_reservations_by_user(self, user_id: str) -> List[Dict[str, Any]]:
         """Obtiene todas las reservas de un usuario"""
+        columns = f'{_RESERVATION_COLUMNS}, {_SPACE_SUMMARY}'
+        rows = read_replica.select(self.client, self.table, columns, 'r.user_id = ?', [user_id],
+                                   'r.date DESC, r.start_time')
         try:
-            response = self.client.table(self.table).select('*, spaces(*)').eq('user_id', user_id).order('date', desc=True).order('start_time').execute()
-            reservations = response.data if response.data else []
-            # Agregar 'user' para consistencia
-            for res in reservations:
-                if not res.get('user'):
-                    res['user'] = None
+            if rows is None:
+                response = self.client.table(self.table).select(columns).eq('user_id', user_id).order('date', desc=True).order('start_time').execute()
+                rows = response.data or []
+            return [normalize_embeds(r) for r in rows]
+        except Exception as e:
+            logger.exception("Error obteniendo reservas por usuario: %s", e)
+            return []
+    
+    @retry.idempotent
+    def get_reservations_by_booking(self, booking_id: str) -> List[Dict[str, Any]]:
+        """Obtiene las reservas que comparten un booking_id (reserva de varios espacios)"""
+        try:
+            response = (
+                self.client.table(self.table)
+                .select(READ_MODELS['admin_list'])
+                .eq('booking_id', booking_id)
+                .order('created_at')
+                .execute()
+            )
+            reservations = [normalize_embeds(r) for r in (response.data or [])]
             return reservations
         except Exception as e:
-            print(f"Error obteniendo reservas por usuario: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Error obteniendo reservas por booking_id: %s", e)
             return []
     
+    @retry.idempotent
     def get_reservations_by_space_and_date(self, space_id: str, date: str) -> List[Dict[str, Any]]:
         """Obtiene reservas de un espacio en una fecha específica"""
+        reservations = read_replica.select(self.client, self.table, _RESERVATION_COLUMNS,
+                                           'r.space_id = ? AND r.date = ?', [space_id, date])
         try:
-            response = self.client.table(self.table).select('*').eq('space_id', space_id).eq('date', date).execute()
+            if reservations is None:
+                response = self.client.table(self.table).select(_RESERVATION_COLUMNS).eq('space_id', space_id).eq('date', date).execute()
+                reservations = response.data if response.data else []
             # Filtrar solo las reservas aprobadas o pendientes
-            reservations = response.data if response.data else []
             return [r for r in reservations if r.get('status') in ['pending', 'approved']]
         except Exception as e:
-            print(f"Error obteniendo reservas por espacio y fecha: {e}")
+            logger.error("Error obteniendo reservas por espacio y fecha: %s", e)
             return []
     
+    @retry.idempotent
+    def get_active_reservations_for_spaces(
+        self,
+        space_ids: List[str],
+        date_from: str,
+        date_to: str
+    ) -> Optional[List[Reservation]]:
+        """Obtiene reservas pendientes/aprobadas de varios espacios en un rango de fechas (una sola consulta).
+
+        Se retornan decodificadas (con su TimeRange) para validar conflictos. Retorna None si la
+        consulta falla, para que quien valida conflictos no lo tome como "sin reservas".
+        """
+        if not space_ids:
+            return []
+        try:
+            response = (
+                self.client.table(self.table)
+                .select('id, space_id, date, start_time, end_time, status')
+                .in_('space_id', space_ids)
+                .gte('date', date_from)
+                .lte('date', date_to)
+                .in_('status', ['pending', 'approved'])
+                .execute()
+            )
+            return Reservation.from_rows(response.data or [])
+        except Exception as e:
+            logger.error("Error obteniendo reservas activas por rango: %s", e)
+            return None
+    
+    @retry.idempotent
     def get_pending_reservations(self) -> List[Dict[str, Any]]:
         """Obtiene todas las reservas pendientes"""
+        rows = read_replica.select(self.client, self.table, READ_MODELS['admin_list'], "r.status = 'pending'",
+                                   order='r.created_at DESC')
         try:
-            # Especificar la relación correcta: users!reservations_user_id_fkey es el usuario que hizo la reserva
-            response = self.client.table(self.table).select('*, spaces(*), users!reservations_user_id_fkey(*)').eq('status', 'pending').order('created_at', desc=True).execute()
-            reservations = response.data if response.data else []
-            # Agregar 'user' para facilitar acceso en templates
-            for res in reservations:
-                if res.get('users'):
-                    res['user'] = res['users']
+            if rows is None:
+                # Especificar la relación correcta: users!reservations_user_id_fkey es el usuario que hizo la reserva
+                response = self.client.table(self.table).select(READ_MODELS['admin_list']).eq('status', 'pending').order('created_at', desc=True).execute()
+                rows = response.data or []
+            reservations = [normalize_embeds(r) for r in rows]
             return reservations
         except Exception as e:
-            print(f"Error obteniendo reservas pendientes: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error obteniendo reservas pendientes: %s", e)
             return []
     
-    def update_reservation_status(self, reservation_id: str, status: str, admin_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Actualiza el estado de una reserva"""
+    def update_reservation_status(
+        self,
+        reservation_id: str,
+        status: str,
+        admin_id: Optional[str] = None,
+        expected_status: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Actualiza el estado de una reserva.
+
+        Si se indica expected_status, la transición es condicional (una sola sentencia
+        UPDATE ... WHERE status = expected_status): si otro admin ya la procesó no se
+        actualiza nada y se retorna None. La fila retornada incluye spaces/users.
+        """
         try:
             data = {'status': status}
             if admin_id:
                 data['admin_id'] = admin_id
             if status == 'approved' or status == 'rejected':
                 data['reviewed_at'] = datetime.now().isoformat()
+            # El calendario sincroniza por updated_at (el trigger de 03_updated_at_triggers.sql lo fija igual)
+            data['updated_at'] = datetime.now(timezone.utc).isoformat()
             
-            response = self.client.table(self.table).update(data).eq('id', reservation_id).execute()
+            query = self.client.table(self.table).update(data).eq('id', reservation_id)
+            if expected_status:
+                query = query.eq('status', expected_status)
+            # PostgREST devuelve la representación con los embeds pedidos en select
+            response = _returning(query, READ_MODELS['admin_list']).execute()
+            invalidation.publish(self.table, [reservation_id])
             if response.data:
-                return response.data[0]
+                reservation = normalize_embeds(response.data[0])
+                return reservation
             return None
         except Exception as e:
-            print(f"Error actualizando estado de reserva: {e}")
+            logger.error("Error actualizando estado de reserva: %s", e)
             return None
     
-    def get_all_reservations(self) -> List[Dict[str, Any]]:
-        """Obtiene todas las reservas"""
+    def update_reservations_status(
+        self,
+        reservation_ids: List[str],
+        status: str,
+        admin_id: Optional[str] = None,
+        expected_status: str = 'pending'
+    ) -> List[Dict[str, Any]]:
+        """Actualiza el estado de varias reservas en una sola sentencia.
+
+        Solo se actualizan las que siguen en expected_status; las filas retornadas
+        (con spaces/users) son las que efectivamente cambiaron.
+        """
+        if not reservation_ids:
+            return []
         try:
-            # Especificar la relación correcta: users!reservations_user_id_fkey es el usuario que hizo la reserva
-            response = self.client.table(self.table).select('*, spaces(*), users!reservations_user_id_fkey(*)').order('created_at', desc=True).execute()
-            reservations = response.data if response.data else []
-            # Agregar 'user' para facilitar acceso en templates
-            for res in reservations:
-                if res.get('users'):
-                    res['user'] = res['users']
+            data = {'status': status}
+            if admin_id:
+                data['admin_id'] = admin_id
+            if status == 'approved' or status == 'rejected':
+                data['reviewed_at'] = datetime.now().isoformat()
+            # El calendario sincroniza por updated_at (el trigger de 03_updated_at_triggers.sql lo fija igual)
+            data['updated_at'] = datetime.now(timezone.utc).isoformat()
+
+            query = (
+                self.client.table(self.table)
+                .update(data)
+                .in_('id', reservation_ids)
+                .eq('status', expected_status)
+            )
+            response = _returning(query, READ_MODELS['admin_list']).execute()
+            invalidation.publish(self.table, reservation_ids)
+            reservations = [normalize_embeds(r) for r in (response.data or [])]
             return reservations
         except Exception as e:
-            print(f"Error obteniendo todas las reservas: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("Error actualizando estado de reservas: %s", e)
+            return []
+
+    @retry.idempotent
+    def get_reservations_by_ids(self, reservation_ids: List[str]) -> List[Dict[str, Any]]:
+        """Obtiene varias reservas por ID con información relacionada"""
+        if not reservation_ids:
             return []
+        try:
+            response = (
+                self.client.table(self.table)
+                .select(READ_MODELS['admin_list'])
+                .in_('id', reservation_ids)
+                .execute()
+            )
+            reservations = [normalize_embeds(r) for r in (response.data or [])]
+            return reservations
+        except Exception as e:
+            logger.error("Error obteniendo reservas por IDs: %s", e)
+            return []
+
+    @single_flight.coalesced
+    @retry.idempotent
+    def get_all_reservations(self, read_model: str = 'admin_list') -> List[Dict[str, Any]]:
+        """Obtiene todas las reservas con la proyección indicada (ver READ_MODELS)"""
+        rows = read_replica.select(self.client, self.table, READ_MODELS[read_model], order='r.created_at DESC')
+        try:
+            if rows is None:
+                response = self.client.table(self.table).select(READ_MODELS[read_model]).order('created_at', desc=True).execute()
+                rows = response.data or []
+            reservations = [normalize_embeds(r) for r in rows]
+            return reservations
+        except Exception as e:
+            logger.exception("Error obteniendo todas las reservas: %s", e)
+            return []
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Cantidad de reservas por estado (dashboard); el reintento ya lo hace get_all_reservations"""
+        counts: Dict[str, int] = {}
+        for reservation in self.get_all_reservations(read_model='status'):
+            status = reservation.get('status')
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    @single_flight.coalesced
+    @retry.idempotent
+    def get_calendar_reservations(self) -> List[Reservation]:
+        """Obtiene las reservas pendientes/aprobadas con la proyección del calendario, decodificadas"""
+        rows = read_replica.select(self.client, self.table, READ_MODELS['calendar'],
+                                   "r.status IN ('pending', 'approved')", order='r.created_at DESC')
+        try:
+            if rows is None:
+                response = (
+                    self.client.table(self.table)
+                    .select(READ_MODELS['calendar'])
+                    .in_('status', ['pending', 'approved'])
+                    .order('created_at', desc=True)
+                    .execute()
+                )
+                rows = response.data or []
+            return Reservation.from_rows(rows)
+        except Exception as e:
+            logger.error("Error obteniendo reservas del calendario: %s", e)
+            return []
+
+    @retry.idempotent
+    def get_calendar_changes(self, since: str) -> Optional[List[Reservation]]:
+        """Reservas creadas o modificadas (incluido el cambio de estado) desde since, en cualquier estado.
 
-    def get_approved_reservations_by_date(self, date: str, only_without_reminder: bool = True) -> List[Dict[str, Any]]:
-        """Obtiene reservas aprobadas de una fecha específica"""
+        Retorna None si la consulta falla, para no confundirlo con "sin cambios".
+        """
+        try:
+            response = (
+                self.client.table(self.table)
+                .select(READ_MODELS['calendar_changes'])
+                .gte('updated_at', since)
+                .order('updated_at')
+                .execute()
+            )
+            return Reservation.from_rows(response.data or [])
+        except Exception as e:
+            logger.error("Error obteniendo cambios del calendario: %s", e)
+            return None
+
+    @retry.idempotent
+    def get_approved_reservations_by_date(self, date: str, only_without_reminder: bool = True) -> List[Reservation]:
+        """Obtiene reservas aprobadas de una fecha específica (decodificadas, para recordatorios)"""
         try:
             query = (
                 self.client.table(self.table)
-                .select('*, spaces(*), users!reservations_user_id_fkey(*)')
+                .select(READ_MODELS['reminder'])
                 .eq('status', 'approved')
                 .eq('date', date)
             )
             if only_without_reminder:
                 query = query.is_('reminder_sent_at', None)
             response = query.execute()
-            reservations = response.data if response.data else []
-            for res in reservations:
-                if res.get('users'):
-                    res['user'] = res['users']
-            return reservations
+            return Reservation.from_rows(response.data or [])
         except Exception as e:
-            print(f"Error obteniendo reservas aprobadas por fecha: {e}")
+            logger.error("Error obteniendo reservas aprobadas por fecha: %s", e)
             return []
 
     def mark_confirmation_sent(self, reservation_id: str) -> bool:
@@ -160,7 +394,7 @@ class ReservationRepository:
             response = self.client.table(self.table).update(data).eq('id', reservation_id).execute()
             return bool(response.data)
         except Exception as e:
-            print(f"Error marcando confirmación enviada: {e}")
+            logger.error("Error marcando confirmación enviada: %s", e)
             return False
 
     def mark_reminder_sent(self, reservation_id: str) -> bool:
@@ -170,29 +404,21 @@ class ReservationRepository:
             response = self.client.table(self.table).update(data).eq('id', reservation_id).execute()
             return bool(response.data)
         except Exception as e:
-            print(f"Error marcando recordatorio enviado: {e}")
+            logger.error("Error marcando recordatorio enviado: %s", e)
             return False
     
+    @retry.idempotent
     def check_time_conflict(self, space_id: str, date: str, start_time: str, end_time: str, exclude_id: Optional[str] = None) -> bool:
         """Verifica si hay conflicto de horario"""
         try:
-            # Función auxiliar para convertir tiempo string a datetime para comparación
-            def time_to_datetime(time_str: str) -> datetime:
-                """Convierte un string de tiempo HH:MM:SS o HH:MM a datetime para comparación"""
-                if not time_str:
-                    return datetime.min
-                # Normalizar formato: puede venir como HH:MM:SS o HH:MM
-                parts = str(time_str).strip().split(':')
-                if len(parts) >= 2:
-                    hour = int(parts[0])
-                    minute = int(parts[1])
-                    # Crear datetime base para comparación
-                    base_date = datetime(2000, 1, 1)  # Fecha dummy para comparar solo horas
-                    return base_date.replace(hour=hour, minute=minute)
-                return datetime.min
-            
-            # Obtener todas las reservas para el espacio y fecha
-            query = self.client.table(self.table).select('*').eq('space_id', space_id).eq('date', date)
+            # Obtener las reservas activas para el espacio y fecha
+            query = (
+                self.client.table(self.table)
+                .select('id, start_time, end_time')
+                .eq('space_id', space_id)
+                .eq('date', date)
+                .in_('status', ['pending', 'approved'])
+            )
             if exclude_id:
                 query = query.neq('id', exclude_id)
             
@@ -200,37 +426,10 @@ class ReservationRepository:
             if not response.data:
                 return False
             
-            # Filtrar solo las reservas aprobadas o pendientes
-            active_reservations = [r for r in response.data if r.get('status') in ['pending', 'approved']]
-            
-            if not active_reservations:
-                return False
-            
-            # Convertir los tiempos de la nueva reserva a datetime para comparación
-            new_start = time_to_datetime(start_time)
-            new_end = time_to_datetime(end_time)
-            
-            # Verificar conflictos de horario
-            for reservation in active_reservations:
-                res_start_str = reservation.get('start_time', '')
-                res_end_str = reservation.get('end_time', '')
-                
-                if not res_start_str or not res_end_str:
-                    continue
-                
-                res_start = time_to_datetime(res_start_str)
-                res_end = time_to_datetime(res_end_str)
-                
-                # Verificar solapamiento: hay conflicto si los intervalos se solapan
-                # Dos intervalos se solapan si: start1 < end2 AND start2 < end1
-                if new_start < res_end and res_start < new_end:
-                    return True
-            
-            return False
+            # Dos intervalos se solapan si: start1 < end2 AND start2 < end1 (comparando minutos)
+            return find_overlap(TimeRange.parse(start_time, end_time), response.data) is not None
         except Exception as e:
-            print(f"Error verificando conflicto de horario: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error verificando conflicto de horario: %s", e)
             return True  # En caso de error, asumir conflicto por seguridad
 
     def update_reservation(
@@ -251,7 +450,8 @@ class ReservationRepository:
                 'start_time': start_time,
                 'end_time': end_time,
                 'justification': justification,
-                'updated_at': datetime.now().isoformat()
+                # En UTC: el calendario sincroniza por updated_at
+                'updated_at': datetime.now(timezone.utc).isoformat()
             }
             response = (
                 self.client.table(self.table)
@@ -261,18 +461,32 @@ class ReservationRepository:
                 .eq('status', 'pending')
                 .execute()
             )
+            invalidation.publish(self.table, [reservation_id])
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error actualizando reserva: {e}")
+            logger.error("Error actualizando reserva: %s", e)
             return None
 
     def delete_reservation(self, reservation_id: str) -> bool:
         """Elimina una reserva (admin)"""
         try:
             response = self.client.table(self.table).delete().eq('id', reservation_id).execute()
+            invalidation.publish(self.table, [reservation_id])
             return bool(response.data is not None)
         except Exception as e:
-            print(f"Error eliminando reserva: {e}")
-            return False
\ No newline at end of file
+            logger.error("Error eliminando reserva: %s", e)
+            return False
+
+    def delete_reservations(self, reservation_ids: List[str]) -> List[str]:
+        """Elimina varias reservas (admin). Retorna los IDs efectivamente eliminados."""
+        if not reservation_ids:
+            return []
+        try:
+            response = self.client.table(self.table).delete().in_('id', reservation_ids).execute()
+            invalidation.publish(self.table, reservation_ids)
+            return [r.get('id') for r in (response.data or [])]
+        except Exception as e:
+            logger.error("Error eliminando reservas: %s", e)
+            return []
@@ -0,0 +1,111 @@
+"""
+Reintentos con jitter para lecturas idempotentes y presupuesto de latencia por método.
+
+Un método de repositorio decorado con ``@retry.idempotent`` declara que sus consultas se
+pueden repetir: si una lectura falla por un error transitorio (conexión cortada, timeout,
+502/503/504 o pool agotado en PostgREST, OperationalError en Postgres directo) se reintenta
+hasta BACKEND_READ_RETRIES veces, esperando un tiempo aleatorio entre 0 y
+min(BACKEND_RETRY_MAX_MS, BACKEND_RETRY_BASE_MS * 2^intento) ("full jitter": los workers
+que fallaron a la vez no reintentan juntos). Las escrituras nunca se reintentan.
+
+``@retry.idempotent(budget_ms=800)`` además fija un presupuesto de latencia para la
+llamada completa: no se reintenta si la espera no cabe en lo que queda, y una consulta
+que empezaría con el presupuesto ya agotado falla con LatencyBudgetExceeded, que el
+repositorio trata como cualquier error (retorna []/None). Cada consulta individual sigue
+acotada por SUPABASE_READ_TIMEOUT / POSTGRES_STATEMENT_TIMEOUT_MS.
+
+La ejecución pasa por aquí desde instrumentation._TracedQuery.
+"""
+
+import contextvars
+import functools
+import random
+import sys
+import time
+from typing import Any, Callable, Optional
+
+from app.config import Config
+from app.metrics import BACKEND_RETRIES
+
+WRITE_OPERATIONS = {"insert", "update", "delete", "upsert"}
+
+# Códigos de postgrest.APIError que indican un fallo de infraestructura, no de la consulta
+TRANSIENT_CODES = {"502", "503", "504", "PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+
+
+class LatencyBudgetExceeded(TimeoutError):
+    """El método agotó su presupuesto de latencia antes de terminar sus consultas."""
+
+
+class _Policy:
+    __slots__ = ("deadline",)
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+
+
+_policy: contextvars.ContextVar[Optional[_Policy]] = contextvars.ContextVar("backend_retry_policy", default=None)
+
+
+def is_transient(error: BaseException) -> bool:
+    """True si vale la pena repetir la consulta."""
+    # httpx y psycopg solo se miran si ya están importados (no se cargan en el arranque)
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    psycopg = sys.modules.get("psycopg")
+    if psycopg is not None and isinstance(error, psycopg.OperationalError):
+        # statement_timeout también es OperationalError: repetirla solo duplica la espera
+        return not isinstance(error, psycopg.errors.QueryCanceled)
+    return str(getattr(error, "code", "")) in TRANSIENT_CODES
+
+
+def _backoff(attempt: int) -> float:
+    cap = min(Config.BACKEND_RETRY_MAX_MS, Config.BACKEND_RETRY_BASE_MS * (2 ** attempt))
+    return random.uniform(0, cap) / 1000.0
+
+
+def run(execute: Callable[[], Any], operation: str, repository: str, method: str) -> Any:
+    """Ejecuta la consulta aplicando la política del método que la llama (si tiene una)."""
+    policy = _policy.get()
+    if policy is None or operation in WRITE_OPERATIONS:
+        return execute()
+
+    attempt = 0
+    while True:
+        if policy.deadline is not None and time.monotonic() >= policy.deadline:
+            BACKEND_RETRIES.inc(repository, method, "budget_exhausted")
+            raise LatencyBudgetExceeded(f"{repository}.{method}: presupuesto de latencia agotado")
+        try:
+            return execute()
+        except Exception as e:
+            if attempt >= Config.BACKEND_READ_RETRIES or not is_transient(e):
+                raise
+            delay = _backoff(attempt)
+            if policy.deadline is not None and time.monotonic() + delay >= policy.deadline:
+                BACKEND_RETRIES.inc(repository, method, "budget_exhausted")
+                raise
+            BACKEND_RETRIES.inc(repository, method, "retry")
+            time.sleep(delay)
+            attempt += 1
+
+
+def idempotent(method: Optional[Callable] = None, *, budget_ms: Optional[float] = None) -> Callable:
+    """Marca un método de lectura como reintentable; budget_ms acota su duración total."""
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            deadline = time.monotonic() + budget_ms / 1000.0 if budget_ms else None
+            outer = _policy.get()
+            if outer is not None and outer.deadline is not None:
+                # Un método con presupuesto llamado desde otro no puede extender el del exterior
+                deadline = outer.deadline if deadline is None else min(deadline, outer.deadline)
+            token = _policy.set(_Policy(deadline))
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                _policy.reset(token)
+        return wrapper
+
+    return decorate(method) if method is not None else decorate
@@ -0,0 +1,314 @@
+"""
+Snapshot compartido entre workers del catálogo de espacios, horarios de clase y admins.
+
+Un worker construye el snapshot con tres consultas y lo escribe en SHARED_SNAPSHOT_DIR;
+el resto lo abre con mmap, así las páginas las comparte el sistema operativo y la
+memoria no crece al agregar workers. Las escrituras en spaces/class_schedules y en admins
+(vía el bus de invalidación) incrementan un contador de generación en otro archivo mapeado; un
+snapshot de una generación anterior o más viejo que SHARED_SNAPSHOT_TTL (cambios hechos
+desde otra instancia o desde el panel de Supabase) se reconstruye en la siguiente lectura.
+
+Formato (little endian):
+  cabecera   '<4sHHQdI'  magic, versión, 0, generación, creado (epoch), n secciones
+  tabla      '<8sQQ' por sección: nombre, offset, largo
+  spaces     JSON de las filas de spaces (ordenadas por nombre)
+  admins     JSON [{id, name, email, role}]
+  skeys      JSON {space_id: índice}
+  matrix     registros '<HBHHII' ordenados: espacio, día, inicio, fin (minutos),
+             offset y largo de la fila en rows
+  rows       filas de class_schedules en JSON, una tras otra
+
+get_schedules(space_id, weekday) busca en matrix sin copiar (búsqueda binaria sobre el
+mmap) y solo decodifica las filas de ese espacio/día.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin locks entre procesos, se consulta directo
+    fcntl = None
+
+from app.config import Config
+from app.metrics import record_cache
+from app.models.time_range import to_minutes
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RPSN"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQdI")
+SECTION = struct.Struct("<8sQQ")
+RECORD = struct.Struct("<HBHHII")
+GENERATION = struct.Struct("<Q")
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def encode_snapshot(generation: int, spaces: List[Dict[str, Any]], schedules: List[Dict[str, Any]],
+                    admins: List[Dict[str, Any]]) -> bytes:
+    """Serializa el snapshot en el formato descrito arriba."""
+    skeys = {space["id"]: i for i, space in enumerate(spaces)}
+    rows = bytearray()
+    records = []
+    for row in schedules:
+        index = skeys.get(row.get("space_id"))
+        if index is None:
+            continue
+        blob = _dumps(row)
+        records.append((index, int(row.get("weekday") or 0), to_minutes(row["start_time"]),
+                        to_minutes(row["end_time"]), len(rows), len(blob)))
+        rows += blob
+    records.sort()
+    matrix = b"".join(RECORD.pack(*r) for r in records)
+
+    sections = [
+        (b"spaces", _dumps(spaces)),
+        (b"admins", _dumps(admins)),
+        (b"skeys", _dumps(skeys)),
+        (b"matrix", matrix),
+        (b"rows", bytes(rows)),
+    ]
+    offset = HEADER.size + SECTION.size * len(sections)
+    table = []
+    for name, data in sections:
+        table.append(SECTION.pack(name, offset, len(data)))
+        offset += len(data)
+    header = HEADER.pack(MAGIC, VERSION, 0, generation, time.time(), len(sections))
+    return header + b"".join(table) + b"".join(data for _, data in sections)
+
+
+class Snapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria."""
+
+    def __init__(self, buffer):
+        self._buf = memoryview(buffer)
+        magic, version, _, self.generation, self.created_at, count = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("snapshot con formato desconocido")
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(self._buf, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b"\0").decode()] = self._buf[offset:offset + length]
+        # Índice pequeño (un entero por espacio); el resto se lee del mmap bajo demanda
+        self._skeys: Dict[str, int] = json.loads(bytes(self._sections["skeys"]))
+        self._matrix = self._sections["matrix"]
+        self._count = len(self._matrix) // RECORD.size
+
+    def _load(self, name: str) -> Any:
+        return json.loads(bytes(self._sections[name]))
+
+    def spaces(self) -> List[Dict[str, Any]]:
+        return self._load("spaces")
+
+    def admins(self) -> List[Dict[str, Any]]:
+        return self._load("admins")
+
+    def _key(self, i: int) -> Tuple[int, int]:
+        space, weekday = RECORD.unpack_from(self._matrix, i * RECORD.size)[:2]
+        return space, weekday
+
+    def _lower_bound(self, key: Tuple[int, int]) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _rows(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        rows_buf = self._sections["rows"]
+        result = []
+        for i in range(start, stop):
+            _, _, _, _, offset, length = RECORD.unpack_from(self._matrix, i * RECORD.size)
+            result.append(json.loads(bytes(rows_buf[offset:offset + length])))
+        return result
+
+    def schedules(self, space_id: Optional[str] = None, weekday: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Equivale a ClassScheduleRepository.get_schedules (orden weekday, start_time)."""
+        if space_id is None:
+            rows = self._rows(0, self._count)
+            if weekday is not None:
+                rows = [r for r in rows if r.get("weekday") == weekday]
+            rows.sort(key=lambda r: (r.get("weekday"), str(r.get("start_time"))))
+            return rows
+        index = self._skeys.get(space_id)
+        if index is None:
+            return []
+        if weekday is None:
+            return self._rows(self._lower_bound((index, 0)), self._lower_bound((index + 1, 0)))
+        return self._rows(self._lower_bound((index, weekday)), self._lower_bound((index, weekday + 1)))
+
+
+class SharedSnapshotStore:
+    """Archivos del snapshot y del contador de generación en un directorio compartido."""
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+        self.path = os.path.join(directory, "snapshot.bin")
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._generation_map: Optional[mmap.mmap] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation_file(self) -> mmap.mmap:
+        if self._generation_map is None:
+            path = os.path.join(self.directory, "generation")
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < GENERATION.size:
+                    os.write(fd, GENERATION.pack(0))
+                self._generation_map = mmap.mmap(fd, GENERATION.size)
+            finally:
+                os.close(fd)
+        return self._generation_map
+
+    def generation(self) -> int:
+        return GENERATION.unpack_from(self._generation_file(), 0)[0]
+
+    def bump(self):
+        """Invalida el snapshot en todos los workers (llamar tras escribir)."""
+        with self._file_lock():
+            gen_map = self._generation_file()
+            GENERATION.pack_into(gen_map, 0, GENERATION.unpack_from(gen_map, 0)[0] + 1)
+
+    @contextmanager
+    def _file_lock(self):
+        fd = os.open(os.path.join(self.directory, "snapshot.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _is_fresh(self, snapshot: Optional[Snapshot], generation: int) -> bool:
+        return (snapshot is not None and snapshot.generation == generation
+                and time.time() - snapshot.created_at < self.ttl)
+
+    def _open_file(self) -> Optional[Snapshot]:
+        try:
+            with open(self.path, "rb") as fh:
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        # El mmap anterior se libera cuando ya nadie usa su Snapshot
+        return Snapshot(mapped)
+
+    def current(self, client: Any) -> Snapshot:
+        """Snapshot vigente; lo reconstruye (un solo worker a la vez) si está desactualizado."""
+        generation = self.generation()
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot, generation):
+            record_cache("shared_snapshot", True)
+            return snapshot
+
+        with self._lock:
+            snapshot = self._open_file()
+            if not self._is_fresh(snapshot, generation):
+                with self._file_lock():
+                    # Otro worker pudo reconstruirlo mientras esperábamos el lock
+                    snapshot = self._open_file()
+                    generation = self.generation()
+                    if not self._is_fresh(snapshot, generation):
+                        record_cache("shared_snapshot", False)
+                        self._write(encode_snapshot(generation, *_fetch(client)))
+                        snapshot = self._open_file()
+            self._snapshot = snapshot
+        return snapshot
+
+    def admin_ids(self) -> Optional[Set[str]]:
+        """IDs de admin del último snapshot que abrió este worker (None si aún no hay)."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return {a.get("id") for a in snapshot.admins()}
+
+    def _write(self, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix="snapshot-", suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        # os.replace es atómico: los lectores ven el archivo anterior o el nuevo completo
+        os.replace(tmp, self.path)
+
+
+def _fetch(client: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    spaces = client.table("spaces").select("*").order("name").execute().data or []
+    schedules = client.table("class_schedules").select("*").execute().data or []
+    admins = client.table("users").select("id, name, email, role").eq("role", "admin").execute().data or []
+    return spaces, schedules, admins
+
+
+_store: Optional[SharedSnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def _default_dir() -> Optional[str]:
+    if Config.SHARED_SNAPSHOT_DIR:
+        return Config.SHARED_SNAPSHOT_DIR
+    if Config.DATA_BACKEND == "memory":
+        # Cada proceso tiene sus propias tablas en memoria: no hay nada que compartir
+        return None
+    import hashlib
+    project = hashlib.sha1((Config.SUPABASE_URL or Config.DATABASE_URL).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"reservaspuce-snapshot-{project}")
+
+
+def get_store() -> Optional[SharedSnapshotStore]:
+    """Store del proceso, o None si el snapshot compartido está desactivado."""
+    global _store
+    if _store is None and Config.SHARED_SNAPSHOT_ENABLED and fcntl is not None:
+        with _store_lock:
+            directory = _default_dir()
+            if _store is None and directory:
+                _store = SharedSnapshotStore(directory, Config.SHARED_SNAPSHOT_TTL)
+    return _store
+
+
+def current(client: Any) -> Optional[Snapshot]:
+    """Snapshot vigente o None (desactivado o error: el repositorio consulta directo)."""
+    store = get_store()
+    if store is None:
+        return None
+    try:
+        return store.current(client)
+    except Exception as e:
+        logger.error("Snapshot compartido no disponible: %s", e)
+        return None
+
+
+def bump():
+    store = get_store()
+    if store is not None:
+        try:
+            store.bump()
+        except OSError as e:
+            logger.error("No se pudo invalidar el snapshot compartido: %s", e)
+
+
+def invalidate(table: str, keys: Optional[List[str]]):
+    """Handler del bus de invalidación: solo los cambios que afectan al snapshot lo invalidan."""
+    store = get_store()
+    if store is None:
+        return
+    if table in ("spaces", "class_schedules"):
+        bump()
+    elif table == "users":
+        # Del directorio de usuarios solo se guardan los admins
+        admin_ids = store.admin_ids()
+        if keys is None or admin_ids is None or not admin_ids.isdisjoint(keys):
+            bump()
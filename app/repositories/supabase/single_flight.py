@@ -0,0 +1,102 @@
+"""
+Single-flight para lecturas costosas de los repositorios.
+
+Si varias peticiones piden a la vez la misma consulta (mismo método y argumentos), solo la
+primera va al backend; las demás esperan esa llamada en curso y reciben su resultado. No
+hay caché: al terminar la llamada la clave se libera y la siguiente lectura vuelve a
+consultar. Las escrituras llaman a forget(tabla) vía invalidation.publish: quien lea
+después de escribir no se une a una llamada que empezó antes de la escritura, así que no
+se agrega desactualización.
+"""
+
+import copy
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from app.metrics import record_cache
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _share(result: Any) -> Any:
+    # Cada seguidor recibe su propia lista y copias de primer nivel de cada fila o modelo
+    # (Reservation, ClassSchedule): los servicios les asignan campos y no deben pisar
+    # los de otra petición. copy.copy devuelve tal cual los valores inmutables
+    if isinstance(result, list):
+        return [copy.copy(r) for r in result]
+    return copy.copy(result)
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            record_cache("single_flight", True)
+            if call.error is not None:
+                raise call.error
+            return _share(call.result)
+
+        record_cache("single_flight", False)
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def forget(self, table: str):
+        """Las llamadas en curso sobre la tabla dejan de aceptar nuevos seguidores."""
+        with self._lock:
+            for key in [k for k in self._calls if k[0] == table]:
+                del self._calls[key]
+
+
+_flights = SingleFlight()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def coalesced(method: Callable) -> Callable:
+    """Decora un método de repositorio para que sus llamadas concurrentes idénticas se agrupen."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (self.table, method.__qualname__, _freeze(args), _freeze(kwargs))
+        return _flights.do(key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
+def forget(table: str):
+    """Llamar tras escribir en la tabla (ver SingleFlight.forget)."""
+    _flights.forget(table)
@@ -1,6 +1,10 @@
+import logging
 from app.repositories.supabase.client import get_supabase_client
+from app.repositories.supabase import identity_map, invalidation, read_replica, retry, shared_snapshot, single_flight
 from typing import Optional, Dict, Any, List
 
+logger = logging.getLogger(__name__)
+
 class SpaceRepository:
     """Repositorio para operaciones de espacios"""
     
@@ -8,33 +12,72 @@ class SpaceRepository:
         self.client = get_supabase_client()
         self.table = 'spaces'
     
+    @single_flight.coalesced
+    @retry.idempotent
     def get_all_spaces(self) -> List[Dict[str, Any]]:
         """Obtiene todos los espacios"""
+        snapshot = shared_snapshot.current(self.client)
+        if snapshot is not None:
+            return snapshot.spaces()
+        rows = read_replica.select(self.client, self.table, '*', order='r.name')
+        if rows is not None:
+            return rows
         try:
             response = self.client.table(self.table).select('*').order('name').execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error obteniendo espacios: {e}")
+            logger.error("Error obteniendo espacios: %s", e)
             return []
     
+    @retry.idempotent
     def get_space_by_id(self, space_id: str) -> Optional[Dict[str, Any]]:
         """Obtiene un espacio por ID"""
+        cached = identity_map.lookup(self.table, space_id)
+        if cached is not None:
+            return cached
         try:
             response = self.client.table(self.table).select('*').eq('id', space_id).execute()
             if response.data:
-                return response.data[0]
+                return identity_map.remember(self.table, space_id, response.data[0])
             return None
         except Exception as e:
-            print(f"Error obteniendo espacio por ID: {e}")
+            logger.error("Error obteniendo espacio por ID: %s", e)
             return None
     
+    @retry.idempotent(budget_ms=2000)
+    def get_free_spaces(self, date: str, weekday: Optional[int]) -> List[Dict[str, Any]]:
+        """Espacios sin clases ese día de la semana ni reservas pendientes/aprobadas en la fecha"""
+        spaces = self.get_all_spaces()
+        try:
+            busy = set()
+            if weekday is not None:
+                snapshot = shared_snapshot.current(self.client)
+                if snapshot is not None:
+                    schedules = snapshot.schedules(weekday=weekday)
+                else:
+                    schedules = self.client.table('class_schedules').select('space_id').eq('weekday', weekday).execute().data
+                busy.update(r.get('space_id') for r in (schedules or []))
+            response = (
+                self.client.table('reservations')
+                .select('space_id')
+                .eq('date', date)
+                .in_('status', ['pending', 'approved'])
+                .execute()
+            )
+            busy.update(r.get('space_id') for r in (response.data or []))
+            return [s for s in spaces if s.get('id') not in busy]
+        except Exception as e:
+            logger.error("Error obteniendo espacios libres: %s", e)
+            return []
+
+    @retry.idempotent
     def get_spaces_by_type(self, space_type: str) -> List[Dict[str, Any]]:
         """Obtiene espacios por tipo (aula, laboratorio, auditorio)"""
         try:
             response = self.client.table(self.table).select('*').eq('type', space_type).order('name').execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error obteniendo espacios por tipo: {e}")
+            logger.error("Error obteniendo espacios por tipo: %s", e)
             return []
     
     def create_space(
@@ -58,9 +101,10 @@ class SpaceRepository:
             if lab_category:
                 data['lab_category'] = lab_category
             response = self.client.table(self.table).insert(data).execute()
+            invalidation.publish(self.table, [r.get('id') for r in (response.data or [])])
             if response.data:
                 return response.data[0]
             return None
         except Exception as e:
-            print(f"Error creando espacio: {e}")
+            logger.error("Error creando espacio: %s", e)
             return None
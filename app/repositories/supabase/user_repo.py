@@ -1,5 +1,9 @@
+import logging
 from app.repositories.supabase.client import get_supabase_client
-from typing import Optional, Dict, Any
+from app.repositories.supabase import identity_map, invalidation, retry, shared_snapshot
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
 
 class UserRepository:
     """Repositorio para operaciones de usuarios"""
@@ -7,30 +11,33 @@ class UserRepository:
     def __init__(self):
         self.client = get_supabase_client()
         self.table = 'users'
-        self.last_error = None
     
+    @retry.idempotent
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Obtiene un usuario por email"""
         try:
             response = self.client.table(self.table).select('*').eq('email', email).execute()
             if response.data:
-                return response.data[0]
+                user = response.data[0]
+                return identity_map.remember(self.table, user.get('id'), user)
             return None
         except Exception as e:
-            self.last_error = str(e)
-            print(f"Error obteniendo usuario por email: {e}")
+            logger.error("Error obteniendo usuario por email: %s", e)
             return None
     
+    @retry.idempotent
     def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Obtiene un usuario por ID"""
+        cached = identity_map.lookup(self.table, user_id)
+        if cached is not None:
+            return cached
         try:
             response = self.client.table(self.table).select('*').eq('id', user_id).execute()
             if response.data:
-                return response.data[0]
+                return identity_map.remember(self.table, user_id, response.data[0])
             return None
         except Exception as e:
-            self.last_error = str(e)
-            print(f"Error obteniendo usuario por ID: {e}")
+            logger.error("Error obteniendo usuario por ID: %s", e)
             return None
     
     def create_user(
@@ -43,10 +50,9 @@ class UserRepository:
         email_verified: bool = False,
         verification_code: Optional[str] = None,
         verification_expires_at: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
-        """Crea un nuevo usuario"""
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Crea un nuevo usuario. Retorna (usuario, error) para que el servicio explique el fallo"""
         try:
-            self.last_error = None
             data = {
                 'email': email,
                 'password_hash': password_hash,
@@ -58,13 +64,14 @@ class UserRepository:
                 'verification_expires_at': verification_expires_at
             }
             response = self.client.table(self.table).insert(data).execute()
+            # Un admin nuevo cambia el directorio de admins completo (snapshot compartido)
+            invalidation.publish(self.table, None if role == 'admin' else [r.get('id') for r in (response.data or [])])
             if response.data:
-                return response.data[0]
-            return None
+                return response.data[0], None
+            return None, None
         except Exception as e:
-            self.last_error = str(e)
-            print(f"Error creando usuario: {e}")
-            return None
+            logger.error("Error creando usuario: %s", e)
+            return None, str(e)
 
     def update_verification_code(self, user_id: str, code: str, expires_at: str) -> bool:
         """Actualiza el código y expiración de verificación"""
@@ -74,10 +81,10 @@ class UserRepository:
                 'verification_expires_at': expires_at
             }
             response = self.client.table(self.table).update(data).eq('id', user_id).execute()
+            invalidation.publish(self.table, [user_id])
             return bool(response.data)
         except Exception as e:
-            self.last_error = str(e)
-            print(f"Error actualizando verificación: {e}")
+            logger.error("Error actualizando verificación: %s", e)
             return False
 
     def mark_email_verified(self, user_id: str) -> bool:
@@ -89,17 +96,41 @@ class UserRepository:
                 'verification_expires_at': None
             }
             response = self.client.table(self.table).update(data).eq('id', user_id).execute()
+            invalidation.publish(self.table, [user_id])
             return bool(response.data)
         except Exception as e:
-            self.last_error = str(e)
-            print(f"Error marcando email como verificado: {e}")
+            logger.error("Error marcando email como verificado: %s", e)
             return False
     
+    @retry.idempotent
+    def count_users(self) -> int:
+        """Cantidad de usuarios registrados (sin traer las filas)"""
+        try:
+            response = self.client.table(self.table).select('id', count='exact').limit(1).execute()
+            return response.count or 0
+        except Exception as e:
+            logger.error("Error contando usuarios: %s", e)
+            return 0
+
+    @retry.idempotent
     def get_all_users(self) -> list:
         """Obtiene todos los usuarios"""
         try:
             response = self.client.table(self.table).select('id, email, name, student_id, role, created_at').execute()
             return response.data if response.data else []
         except Exception as e:
-            print(f"Error obteniendo usuarios: {e}")
+            logger.error("Error obteniendo usuarios: %s", e)
+            return []
+
+    @retry.idempotent
+    def get_admins(self) -> list:
+        """Obtiene los administradores (id, name, email, role) para notificaciones"""
+        snapshot = shared_snapshot.current(self.client)
+        if snapshot is not None:
+            return snapshot.admins()
+        try:
+            response = self.client.table(self.table).select('id, name, email, role').eq('role', 'admin').execute()
+            return response.data if response.data else []
+        except Exception as e:
+            logger.error("Error obteniendo administradores: %s", e)
             return []
@@ -1,27 +1,38 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app.services.admin_service import AdminService
-from app.services.reservation_service import ReservationService
-from app.services.auth_service import AuthService
-from app.services.class_schedule_service import ClassScheduleService
-from app.services.space_service import SpaceService
-from app.repositories.supabase.reservation_deletion_repo import ReservationDeletionRepository
+import logging
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, send_from_directory
+from app.services.container import services
 from app.deps import admin_required
+from app.profiling import list_profiles, profile_file
+
+logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__)
-admin_service = AdminService()
-reservation_service = ReservationService()
-auth_service = AuthService()
-class_schedule_service = ClassScheduleService()
-space_service = SpaceService()
-reservation_deletion_repo = ReservationDeletionRepository()
+
+
+def _flash_bulk_results(results):
+    """Resume en mensajes flash el resultado por reserva de una acción masiva"""
+    ok = [rid for rid, (success, _) in results.items() if success]
+    failed = {rid: message for rid, (success, message) in results.items() if not success}
+    if ok:
+        flash(f'{len(ok)} reserva(s) procesada(s) correctamente', 'success')
+    if failed:
+        details = '; '.join(f'{rid[:8]}: {message}' for rid, message in failed.items())
+        flash(f'{len(failed)} reserva(s) no se pudieron procesar ({details})', 'error')
+    if not results:
+        flash('No se encontraron reservas para procesar', 'error')
+
+
+def _booking_id_of(reservation_id):
+    reservation = services.reservation_service.get_reservation_by_id(reservation_id)
+    return reservation.get('booking_id') if reservation else None
 
 @admin_bp.route('/dashboard')
 @admin_required
 def dashboard():
     """Dashboard del administrador"""
     try:
-        stats = admin_service.get_dashboard_stats()
-        pending_reservations = admin_service.get_pending_reservations()
+        stats = services.admin_service.get_dashboard_stats()
+        pending_reservations = services.admin_service.get_pending_reservations()
         
         # Asegurar que es una lista
         if not isinstance(pending_reservations, list):
@@ -31,9 +42,7 @@ def dashboard():
         pending_reservations = pending_reservations[:5]
         
     except Exception as e:
-        print(f"Error cargando dashboard: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error cargando dashboard: %s", e)
         stats = {
             'total_reservations': 0,
             'pending_reservations': 0,
@@ -54,15 +63,15 @@ def reservations():
     status_filter = request.args.get('status', 'all')
     
     if status_filter == 'pending':
-        reservations = reservation_service.get_pending_reservations()
+        reservations = services.reservation_service.get_pending_reservations()
     elif status_filter == 'approved':
-        all_reservations = reservation_service.get_all_reservations()
+        all_reservations = services.reservation_service.get_all_reservations()
         reservations = [r for r in all_reservations if r.get('status') == 'approved']
     elif status_filter == 'rejected':
-        all_reservations = reservation_service.get_all_reservations()
+        all_reservations = services.reservation_service.get_all_reservations()
         reservations = [r for r in all_reservations if r.get('status') == 'rejected']
     else:
-        reservations = reservation_service.get_all_reservations()
+        reservations = services.reservation_service.get_all_reservations()
     
     return render_template('admin/reservations.html', reservations=reservations, status_filter=status_filter)
 
@@ -78,7 +87,7 @@ def reservation_detail(reservation_id):
         flash('ID de reserva inválido', 'error')
         return redirect(url_for('admin.reservations'))
     
-    reservation = reservation_service.get_reservation_by_id(reservation_id)
+    reservation = services.reservation_service.get_reservation_by_id(reservation_id)
     if not reservation:
         flash(f'Reserva no encontrada (ID: {reservation_id})', 'error')
         return redirect(url_for('admin.reservations'))
@@ -88,8 +97,13 @@ def reservation_detail(reservation_id):
 @admin_bp.route('/reservations/<reservation_id>/approve', methods=['POST'])
 @admin_required
 def approve_reservation(reservation_id):
-    """Aprueba una reserva"""
-    success, message = reservation_service.approve_reservation(reservation_id, session['user_id'])
+    """Aprueba una reserva (o todos los espacios de su reserva múltiple)"""
+    booking_id = _booking_id_of(reservation_id) if request.form.get('apply_to_booking') else None
+    if booking_id:
+        _flash_bulk_results(services.reservation_service.approve_booking(booking_id, session['user_id']))
+        return redirect(url_for('admin.reservation_detail', reservation_id=reservation_id))
+
+    success, message = services.reservation_service.approve_reservation(reservation_id, session['user_id'])
     
     if success:
         flash(message, 'success')
@@ -109,7 +123,12 @@ def reject_reservation(reservation_id):
         flash('Debes proporcionar una razón del rechazo de al menos 10 caracteres', 'error')
         return redirect(url_for('admin.reservation_detail', reservation_id=reservation_id))
     
-    success, message = reservation_service.reject_reservation(reservation_id, session['user_id'], rejection_reason)
+    booking_id = _booking_id_of(reservation_id) if request.form.get('apply_to_booking') else None
+    if booking_id:
+        _flash_bulk_results(services.reservation_service.reject_booking(booking_id, session['user_id'], rejection_reason))
+        return redirect(url_for('admin.reservation_detail', reservation_id=reservation_id))
+
+    success, message = services.reservation_service.reject_reservation(reservation_id, session['user_id'], rejection_reason)
     
     if success:
         flash(message, 'success')
@@ -126,7 +145,7 @@ def delete_reservation(reservation_id):
     if not reason or len(reason) < 5:
         flash('Proporciona una justificación (mínimo 5 caracteres) para eliminar la reserva.', 'error')
         return redirect(url_for('admin.reservation_detail', reservation_id=reservation_id))
-    success, message = reservation_service.delete_reservation_admin(reservation_id, session['user_id'], reason)
+    success, message = services.reservation_service.delete_reservation_admin(reservation_id, session['user_id'], reason)
     # Podríamos almacenar la razón en logs/notifications si se desea, por ahora solo mensaje.
     if success:
         flash(f'{message}. Motivo: {reason}', 'success')
@@ -135,6 +154,38 @@ def delete_reservation(reservation_id):
     return redirect(url_for('admin.reservations'))
 
 
+@admin_bp.route('/reservations/bulk', methods=['POST'])
+@admin_required
+def bulk_reservations():
+    """Aprueba, rechaza o elimina varias reservas seleccionadas"""
+    action = request.form.get('action', '')
+    reservation_ids = request.form.getlist('reservation_ids')
+    reason = request.form.get('bulk_reason', '').strip()
+    status_filter = request.form.get('status_filter', 'all')
+
+    if not reservation_ids:
+        flash('Selecciona al menos una reserva', 'warning')
+        return redirect(url_for('admin.reservations', status=status_filter))
+
+    if action == 'approve':
+        results = services.reservation_service.approve_many(reservation_ids, session['user_id'])
+    elif action == 'reject':
+        if len(reason) < 10:
+            flash('Debes proporcionar una razón del rechazo de al menos 10 caracteres', 'error')
+            return redirect(url_for('admin.reservations', status=status_filter))
+        results = services.reservation_service.reject_many(reservation_ids, session['user_id'], reason)
+    elif action == 'delete':
+        if len(reason) < 5:
+            flash('Proporciona una justificación (mínimo 5 caracteres) para eliminar las reservas.', 'error')
+            return redirect(url_for('admin.reservations', status=status_filter))
+        results = services.reservation_service.delete_many(reservation_ids, session['user_id'], reason)
+    else:
+        flash('Acción inválida', 'error')
+        return redirect(url_for('admin.reservations', status=status_filter))
+
+    _flash_bulk_results(results)
+    return redirect(url_for('admin.reservations', status=status_filter))
+
 @admin_bp.route('/deletions')
 @admin_required
 def deletions_log():
@@ -145,7 +196,7 @@ def deletions_log():
     date_from = request.args.get('date_from') or None
     date_to = request.args.get('date_to') or None
 
-    logs = reservation_deletion_repo.get_logs(
+    logs = services.reservation_deletion_repo.get_logs(
         limit=200,
         space_id=space_id,
         user_id=user_id,
@@ -153,8 +204,8 @@ def deletions_log():
         date_from=date_from,
         date_to=date_to,
     )
-    spaces = {s['id']: s for s in space_service.get_all_spaces()}
-    users = {u['id']: u for u in auth_service.user_repo.get_all_users()} if hasattr(auth_service, 'user_repo') else {}
+    spaces = {s['id']: s for s in services.space_service.get_all_spaces()}
+    users = {u['id']: u for u in services.auth_service.user_repo.get_all_users()} if hasattr(services.auth_service, 'user_repo') else {}
     return render_template(
         'admin/deletions.html',
         logs=logs,
@@ -207,7 +258,7 @@ def create_admin():
         password_hash = generate_password_hash(password)
         
         # Crear usuario como admin
-        user = user_repo.create_user(
+        user, _ = user_repo.create_user(
             email,
             password_hash,
             name,
@@ -229,7 +280,7 @@ def create_admin():
 @admin_required
 def schedules():
     """Gestión de horarios fijos de aulas"""
-    spaces = space_service.get_all_spaces()
+    spaces = services.space_service.get_all_spaces()
     spaces_by_id = {s['id']: s for s in spaces}
     selected_space_id = request.args.get('space_id') or None
 
@@ -250,13 +301,13 @@ def schedules():
             flash('Día inválido.', 'error')
             return redirect(url_for('admin.schedules', space_id=space_id or selected_space_id))
 
-        success, message, _ = class_schedule_service.create_schedule(
+        success, message, _ = services.class_schedule_service.create_schedule(
             space_id, weekday, start_time, end_time, description
         )
         flash(message, 'success' if success else 'error')
         return redirect(url_for('admin.schedules', space_id=space_id))
 
-    schedules_list = class_schedule_service.get_schedules(selected_space_id)
+    schedules_list = services.class_schedule_service.get_schedules(selected_space_id)
     return render_template(
         'admin/schedules.html',
         schedules=schedules_list,
@@ -266,15 +317,45 @@ def schedules():
     )
 
 
+@admin_bp.route('/schedules/import', methods=['GET', 'POST'])
+@admin_required
+def import_schedules():
+    """Importación masiva de horarios desde CSV/XLSX (vista previa y luego importación)"""
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Selecciona un archivo CSV o XLSX', 'error')
+            return redirect(url_for('admin.import_schedules'))
+        rows, error = services.class_schedule_service.parse_import_file(upload.filename, upload.read())
+        if error:
+            flash(error, 'error')
+            return redirect(url_for('admin.import_schedules'))
+        dry_run = request.form.get('action') != 'import'
+        report = services.class_schedule_service.import_schedules(rows, dry_run=dry_run)
+        if not dry_run:
+            if report['errors'] or report['conflicts']:
+                flash('No se importó nada: corrige los errores y conflictos del archivo.', 'error')
+            elif report['failed']:
+                flash(
+                    f"Se importaron {report['created']} de {len(report['to_create'])} horarios; "
+                    f"{report['failed']} no se guardaron por un error. Vuelve a importar el archivo: "
+                    "los ya guardados aparecerán como sin cambios.",
+                    'error'
+                )
+            else:
+                flash(f"Horarios importados: {report['created']}", 'success')
+    return render_template('admin/schedules_import.html', report=report)
+
 @admin_bp.route('/schedules/<schedule_id>/edit', methods=['GET', 'POST'])
 @admin_required
 def edit_schedule(schedule_id):
-    schedule = class_schedule_service.get_by_id(schedule_id)
+    schedule = services.class_schedule_service.get_by_id(schedule_id)
     if not schedule:
         flash('Horario no encontrado', 'error')
         return redirect(url_for('admin.schedules'))
 
-    spaces = space_service.get_all_spaces()
+    spaces = services.space_service.get_all_spaces()
 
     if request.method == 'POST':
         space_id = request.form.get('space_id')
@@ -289,7 +370,7 @@ def edit_schedule(schedule_id):
             flash('Día inválido.', 'error')
             return redirect(url_for('admin.edit_schedule', schedule_id=schedule_id))
 
-        success, message, _ = class_schedule_service.update_schedule(
+        success, message, _ = services.class_schedule_service.update_schedule(
             schedule_id, space_id, weekday, start_time, end_time, description
         )
         flash(message, 'success' if success else 'error')
@@ -302,6 +383,30 @@ def edit_schedule(schedule_id):
 @admin_bp.route('/schedules/<schedule_id>/delete', methods=['POST'])
 @admin_required
 def delete_schedule(schedule_id):
-    deleted = class_schedule_service.delete_schedule(schedule_id)
+    deleted = services.class_schedule_service.delete_schedule(schedule_id)
     flash('Horario eliminado' if deleted else 'No se pudo eliminar el horario', 'success' if deleted else 'error')
     return redirect(url_for('admin.schedules'))
+
+@admin_bp.route('/profiles')
+@admin_required
+def profiles():
+    """Perfiles de peticiones guardados (?_profile=1 en cualquier URL)"""
+    profile_dir = current_app.config.get('PROFILE_DIR', '')
+    return render_template(
+        'admin/profiles.html',
+        profiles=list_profiles(profile_dir),
+        profile_dir=profile_dir,
+        enabled=current_app.config.get('PROFILING_ENABLED', False),
+    )
+
+@admin_bp.route('/profiles/<profile_id>/<kind>')
+@admin_required
+def profile_download(profile_id, kind):
+    """Descarga un archivo de perfil (speedscope, collapsed o alloc)"""
+    profile_dir = current_app.config.get('PROFILE_DIR', '')
+    filename = profile_file(profile_dir, profile_id, kind)
+    if not filename:
+        flash('Perfil no encontrado', 'error')
+        return redirect(url_for('admin.profiles'))
+    return send_from_directory(profile_dir, filename, as_attachment=kind == 'speedscope')
+
@@ -1,9 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from app.services.auth_service import AuthService
+from app.services.container import services
 from app.deps import login_required
 
 auth_bp = Blueprint('auth', __name__)
-auth_service = AuthService()
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -16,7 +15,7 @@ def login():
             flash('Por favor completa todos los campos', 'error')
             return render_template('auth/login.html')
         
-        success, message, user = auth_service.login_user(email, password)
+        success, message, user = services.auth_service.login_user(email, password)
         
         if success:
             session['user_id'] = user['id']
@@ -56,7 +55,7 @@ def register():
             flash('La contraseña debe tener al menos 6 caracteres', 'error')
             return render_template('auth/register.html')
         
-        success, message, user = auth_service.register_user(email, password, name, student_id)
+        success, message, user = services.auth_service.register_user(email, password, name, student_id)
         
         if success:
             flash(message, 'success')
@@ -81,7 +80,7 @@ def verify_email():
     email = request.args.get('email') or request.form.get('email') or ''
     if request.method == 'POST':
         code = request.form.get('code', '').strip()
-        success, message = auth_service.verify_email(email, code)
+        success, message = services.auth_service.verify_email(email, code)
         if success:
             flash(message, 'success')
             return redirect(url_for('auth.login'))
@@ -93,6 +92,6 @@ def verify_email():
 def resend_verification():
     """Reenvía el código de verificación"""
     email = request.form.get('email', '').strip()
-    success, message = auth_service.resend_verification_code(email)
+    success, message = services.auth_service.resend_verification_code(email)
     flash(message, 'success' if success else 'error')
     return redirect(url_for('auth.verify_email', email=email))
@@ -0,0 +1,27 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, request, session
+from app.metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+INTERNAL_ADDRS = {'127.0.0.1', '::1'}
+
+
+def _metrics_allowed() -> bool:
+    """Admins con sesión, peticiones locales o con el token METRICS_TOKEN."""
+    if session.get('role') == 'admin':
+        return True
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        auth = request.headers.get('Authorization', '')
+        return hmac.compare_digest(auth, f'Bearer {token}')
+    return request.remote_addr in INTERNAL_ADDRS and not request.headers.get('X-Forwarded-For')
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Métricas del proceso en formato de exposición de Prometheus"""
+    if not _metrics_allowed():
+        abort(404)
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,21 +1,17 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from app.services.reservation_service import ReservationService
-from app.services.space_service import SpaceService
-from app.services.class_schedule_service import ClassScheduleService
-from app.services.chatbot_service import ChatbotService
+from app.services.container import services
 from app.deps import login_required
+from app.models.reservation import Reservation, calendar_cursor
+from app.models.time_range import format_minutes
+from typing import Any, Dict, List
 
 user_bp = Blueprint('user', __name__)
-reservation_service = ReservationService()
-space_service = SpaceService()
-class_schedule_service = ClassScheduleService()
-chatbot_service = ChatbotService()
 
 @user_bp.route('/calendar')
 @login_required
 def calendar():
     """Vista del calendario de reservas"""
-    spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+    spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
     return render_template('user/calendar.html', spaces_by_floor=spaces_by_floor)
 
 @user_bp.route('/reserve', methods=['GET', 'POST'])
@@ -39,25 +35,41 @@ def reserve():
         
         if not all([space_id, reservation_date, start_time, end_time, justification]):
             flash('Por favor completa todos los campos', 'error')
-            spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+            spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
             min_date = date_module.today().isoformat()
             return render_template('user/reserve_form.html', spaces_by_floor=spaces_by_floor, min_date=min_date)
         
         # Validar que end_time sea mayor que start_time
         if end_time <= start_time:
             flash('La hora de finalización debe ser mayor que la hora de inicio', 'error')
-            spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+            spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
             min_date = date_module.today().isoformat()
             return render_template('user/reserve_form.html', spaces_by_floor=spaces_by_floor, min_date=min_date)
         
-        success, message, reservation = reservation_service.create_reservation(
-            user_id=session['user_id'],
-            space_id=space_id,
-            date=reservation_date,  # Usar la variable renombrada
-            start_time=start_time,
-            end_time=end_time,
-            justification=justification
-        )
+        recurrence = request.form.get('recurrence', 'none')
+        if recurrence in ('weekly', 'biweekly'):
+            recurrence_until = request.form.get('recurrence_until', '')
+            skip_dates = [d.strip() for d in request.form.get('skip_dates', '').split(',') if d.strip()]
+            success, message, _ = services.reservation_service.create_reservation_series(
+                user_id=session['user_id'],
+                space_id=space_id,
+                start_date=reservation_date,
+                until_date=recurrence_until,
+                start_time=start_time,
+                end_time=end_time,
+                justification=justification,
+                interval_weeks=2 if recurrence == 'biweekly' else 1,
+                skip_dates=skip_dates
+            )
+        else:
+            success, message, reservation = services.reservation_service.create_reservation(
+                user_id=session['user_id'],
+                space_id=space_id,
+                date=reservation_date,  # Usar la variable renombrada
+                start_time=start_time,
+                end_time=end_time,
+                justification=justification
+            )
         
         if success:
             flash(message, 'success')
@@ -65,7 +77,7 @@ def reserve():
         else:
             flash(message, 'error')
     
-    spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+    spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
     min_date = date_module.today().isoformat()  # Usar date_module en lugar de date
     return render_template(
         'user/reserve_form.html',
@@ -78,11 +90,60 @@ def reserve():
         justification_val=pre_just
     )
 
+@user_bp.route('/reserve/multi', methods=['GET', 'POST'])
+@login_required
+def reserve_multi():
+    """Reserva de varios espacios a la vez (eventos): todo o nada"""
+    from datetime import date as date_module
+
+    form = request.form if request.method == 'POST' else {}
+    selected_space_ids = request.form.getlist('space_ids') if request.method == 'POST' else []
+
+    if request.method == 'POST':
+        reservation_date = form.get('date')
+        start_time = form.get('start_time')
+        end_time = form.get('end_time')
+        justification = form.get('justification')
+
+        if not all([selected_space_ids, reservation_date, start_time, end_time, justification]):
+            flash('Por favor completa todos los campos', 'error')
+        elif end_time <= start_time:
+            flash('La hora de finalización debe ser mayor que la hora de inicio', 'error')
+        else:
+            success, message, result = services.reservation_service.create_multi_space_booking(
+                user_id=session['user_id'],
+                space_ids=selected_space_ids,
+                date=reservation_date,
+                start_time=start_time,
+                end_time=end_time,
+                justification=justification
+            )
+            if success:
+                flash(message, 'success')
+                return redirect(url_for('user.my_reservations'))
+            flash(message, 'error')
+            if result.get('conflicts'):
+                names = {s['id']: s.get('name') for s in services.space_service.get_all_spaces()}
+                details = '; '.join(f"{names.get(c['space_id'], 'Espacio')}: {c['reason']}" for c in result['conflicts'])
+                flash(f'Conflictos: {details}', 'warning')
+
+    spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
+    return render_template(
+        'user/reserve_multi.html',
+        spaces_by_floor=spaces_by_floor,
+        min_date=date_module.today().isoformat(),
+        selected_space_ids=selected_space_ids,
+        selected_date=form.get('date'),
+        selected_start=form.get('start_time'),
+        selected_end=form.get('end_time'),
+        justification_val=form.get('justification')
+    )
+
 @user_bp.route('/my_reservations')
 @login_required
 def my_reservations():
     """Vista de mis reservas"""
-    reservations = reservation_service.get_user_reservations(session['user_id'])
+    reservations = services.reservation_service.get_user_reservations(session['user_id'])
     return render_template('user/my_reservations.html', reservations=reservations)
 
 @user_bp.route('/my_reservations/<reservation_id>/edit', methods=['GET', 'POST'])
@@ -90,7 +151,7 @@ def my_reservations():
 def edit_reservation(reservation_id):
     """Editar una reserva pendiente del usuario"""
     from datetime import date as date_module
-    reservation = reservation_service.get_reservation_by_id(reservation_id)
+    reservation = services.reservation_service.get_reservation_by_id(reservation_id)
     if not reservation:
         flash('Reserva no encontrada', 'error')
         return redirect(url_for('user.my_reservations'))
@@ -110,7 +171,7 @@ def edit_reservation(reservation_id):
 
         if not all([space_id, reservation_date, start_time, end_time, justification]):
             flash('Por favor completa todos los campos', 'error')
-            spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+            spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
             min_date = date_module.today().isoformat()
             return render_template(
                 'user/reserve_edit.html',
@@ -126,7 +187,7 @@ def edit_reservation(reservation_id):
 
         if end_time <= start_time:
             flash('La hora de finalización debe ser mayor que la hora de inicio', 'error')
-            spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+            spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
             min_date = date_module.today().isoformat()
             return render_template(
                 'user/reserve_edit.html',
@@ -140,7 +201,7 @@ def edit_reservation(reservation_id):
                 justification_val=justification
             )
 
-        success, message, updated = reservation_service.update_reservation(
+        success, message, updated = services.reservation_service.update_reservation(
             reservation_id=reservation_id,
             user_id=session['user_id'],
             space_id=space_id,
@@ -153,7 +214,7 @@ def edit_reservation(reservation_id):
         if success:
             return redirect(url_for('user.reservation_detail', reservation_id=reservation_id))
 
-    spaces_by_floor = space_service.get_spaces_grouped_by_floor()
+    spaces_by_floor = services.space_service.get_spaces_grouped_by_floor()
     min_date = date_module.today().isoformat()
     return render_template(
         'user/reserve_edit.html',
@@ -175,14 +236,20 @@ def cancel_reservation(reservation_id):
     if not reason or len(reason) < 5:
         flash('Proporciona un motivo (mínimo 5 caracteres) para cancelar.', 'error')
         return redirect(url_for('user.reservation_detail', reservation_id=reservation_id))
-    success, message = reservation_service.cancel_reservation_by_user(reservation_id, session['user_id'], reason)
+    if request.form.get('cancel_booking'):
+        reservation = services.reservation_service.get_reservation_by_id(reservation_id)
+        if reservation and reservation.get('booking_id'):
+            success, message = services.reservation_service.cancel_booking_by_user(reservation['booking_id'], session['user_id'], reason)
+            flash(message, 'success' if success else 'error')
+            return redirect(url_for('user.my_reservations'))
+    success, message = services.reservation_service.cancel_reservation_by_user(reservation_id, session['user_id'], reason)
     flash(message, 'success' if success else 'error')
     return redirect(url_for('user.my_reservations'))
 @user_bp.route('/my_reservations/<reservation_id>')
 @login_required
 def reservation_detail(reservation_id):
     """Detalle de una reserva específica"""
-    reservation = reservation_service.get_reservation_by_id(reservation_id)
+    reservation = services.reservation_service.get_reservation_by_id(reservation_id)
     if not reservation:
         flash('Reserva no encontrada', 'error')
         return redirect(url_for('user.my_reservations'))
@@ -194,107 +261,37 @@ def reservation_detail(reservation_id):
     
     return render_template('user/reservation_detail.html', reservation=reservation)
 
-@user_bp.route('/api/reservations')
-@login_required
-def get_reservations_api():
-    """API endpoint para obtener reservas (para el calendario) - muestra TODAS las reservas aprobadas"""
-    space_id = request.args.get('space_id')
-    floor = request.args.get('floor')
-    date_filter = request.args.get('date')
-    
-    # Obtener TODAS las reservas aprobadas para el calendario general
-    all_reservations = reservation_service.get_all_reservations()
-    
-    # Filtrar solo las aprobadas y pendientes para mostrar en el calendario
-    visible_reservations = [r for r in all_reservations if r.get('status') in ['approved', 'pending']]
-    
-    # Si se especifica un espacio, filtrar por espacio
-    if space_id:
-        visible_reservations = [r for r in visible_reservations if r.get('space_id') == space_id]
-
-    # Si se especifica una fecha exacta, filtrar por esa fecha
-    if date_filter:
-        visible_reservations = [r for r in visible_reservations if str(r.get('date')) == date_filter]
-    
-    def resolve_floor(reservation):
-        spaces = reservation.get('spaces')
-        space = None
-        if isinstance(spaces, dict):
-            space = spaces
-        elif isinstance(spaces, list) and spaces:
-            space = spaces[0]
-        if not space:
-            return None
-        floor_value = space.get('floor')
-        if floor_value:
-            return floor_value
-        name = (space.get('name') or '').upper()
-        if name.startswith('A-0'):
-            return 'planta_baja'
-        if name.startswith('A-1'):
-            return 'piso_1'
-        if name.startswith('A-2'):
-            return 'piso_2'
-        if (space.get('type') or '').lower() == 'auditorio':
-            return 'planta_baja'
-        return None
-    
-    if floor:
-        visible_reservations = [
-            r for r in visible_reservations if resolve_floor(r) == floor
-        ]
-    
-    # Formatear para el calendario
+def _format_calendar_events(reservations: List[Reservation]) -> List[Dict[str, Any]]:
+    """Convierte reservas decodificadas en eventos de FullCalendar"""
     events = []
-    for res in visible_reservations:
-        space_name = 'Espacio'
-        if res.get('spaces'):
-            if isinstance(res.get('spaces'), dict):
-                space_name = res.get('spaces', {}).get('name', 'Espacio')
-            elif isinstance(res.get('spaces'), list) and len(res.get('spaces', [])) > 0:
-                space_name = res.get('spaces')[0].get('name', 'Espacio')
-        
-        status = res.get('status', 'pending')
+    for res in reservations:
+        space_name = res.space_name('Espacio')
+        status = res.status
         status_text = 'Aprobada' if status == 'approved' else 'Pendiente'
-        user_name = 'Usuario'
-        if res.get('users'):
-            if isinstance(res.get('users'), dict):
-                user_name = res.get('users', {}).get('name', 'Usuario')
-            elif isinstance(res.get('users'), list) and len(res.get('users', [])) > 0:
-                user_name = res.get('users')[0].get('name', 'Usuario')
-        
-        # Formatear fecha y hora correctamente para FullCalendar
-        date_str = str(res['date'])  # Asegurar que sea string
-        start_time = str(res['start_time']) if res.get('start_time') else '00:00:00'
-        end_time = str(res['end_time']) if res.get('end_time') else '23:59:59'
-        
-        # Normalizar formato de hora (asegurar HH:MM:SS)
-        if ':' in start_time:
-            parts = start_time.split(':')
-            if len(parts) == 2:
-                start_time = f"{parts[0]}:{parts[1]}:00"
-            elif len(parts) == 3:
-                start_time = f"{parts[0]}:{parts[1]}:{parts[2]}"
+        user_name = res.user_name()
+        approved = status == 'approved'
         
-        if ':' in end_time:
-            parts = end_time.split(':')
-            if len(parts) == 2:
-                end_time = f"{parts[0]}:{parts[1]}:00"
-            elif len(parts) == 3:
-                end_time = f"{parts[0]}:{parts[1]}:{parts[2]}"
+        # Formatear fecha y hora correctamente para FullCalendar (HH:MM:SS)
+        if res.time_range is not None:
+            start_time = format_minutes(res.time_range.start, with_seconds=True)
+            end_time = format_minutes(res.time_range.end, with_seconds=True)
+        else:
+            start_time, end_time = '00:00:00', '23:59:59'
         
         # Crear fecha/hora completa en formato ISO 8601
         # Formato: YYYY-MM-DDTHH:MM:SS
-        start_datetime = f"{date_str}T{start_time}"
-        end_datetime = f"{date_str}T{end_time}"
+        start_datetime = f"{res.date}T{start_time}"
+        end_datetime = f"{res.date}T{end_time}"
         
         # Para la vista de mes, mostrar solo el día (sin hora en el título)
         # La hora se mostrará en tooltips y al hacer clic
         title = f"{space_name}"
         
         events.append({
-            'id': res['id'],
+            'id': res.id,
             'title': title,
+            'spaceId': res.space_id,
+            'floor': res.space.resolved_floor if res.space else None,
             'start': start_datetime,
             'end': end_datetime,
             'allDay': False,  # NO es evento de todo el día - tiene hora específica
@@ -305,21 +302,69 @@ def get_reservations_api():
             'userName': user_name,
             'startTime': start_time[:5],  # Solo HH:MM para mostrar
             'endTime': end_time[:5],
-            'color': '#28a745' if status == 'approved' else '#ffc107',  # Verde para aprobadas
-            'backgroundColor': '#28a745' if status == 'approved' else '#ffc107',  # Verde para aprobadas
-            'borderColor': '#218838' if status == 'approved' else '#e0a800',  # Verde oscuro para borde
+            'color': '#28a745' if approved else '#ffc107',  # Verde para aprobadas
+            'backgroundColor': '#28a745' if approved else '#ffc107',  # Verde para aprobadas
+            'borderColor': '#218838' if approved else '#e0a800',  # Verde oscuro para borde
             'textColor': 'white',
             'extendedProps': {
                 'status': status,
                 'spaceName': space_name,
                 'userName': user_name,
-                'justification': res.get('justification', ''),
+                'justification': res.justification,
                 'startTime': start_time[:5],
                 'endTime': end_time[:5]
             }
         })
+    return events
+
+@user_bp.route('/api/reservations')
+@login_required
+def get_reservations_api():
+    """API endpoint para obtener reservas (para el calendario) - muestra TODAS las reservas aprobadas.
+
+    Sin since devuelve la lista completa y el cursor en la cabecera X-Calendar-Cursor.
+    Con since devuelve solo el delta: {'events': creados/modificados, 'removed': ids a
+    quitar (rechazadas, canceladas o eliminadas), 'cursor': siguiente since}.
+    """
+    space_id = request.args.get('space_id')
+    floor = request.args.get('floor')
+    date_filter = request.args.get('date')
+    since = request.args.get('since')
+
+    if since:
+        try:
+            changes = services.reservation_service.get_calendar_changes(since)
+        except ValueError:
+            return jsonify({"error": "since inválido"}), 400
+        if changes is None:
+            return jsonify({"error": "No se pudieron obtener los cambios del calendario"}), 503
+        visible_reservations = changes['changed']
+    else:
+        # El cursor se toma antes de leer: lo escrito durante la lectura llega en el siguiente delta
+        cursor = calendar_cursor()
+        # Reservas aprobadas y pendientes con la proyección del calendario (decodificadas en el repositorio)
+        visible_reservations = services.reservation_service.get_calendar_reservations()
+    
+    # Si se especifica un espacio, filtrar por espacio
+    if space_id:
+        visible_reservations = [r for r in visible_reservations if r.space_id == space_id]
+
+    # Si se especifica una fecha exacta, filtrar por esa fecha
+    if date_filter:
+        visible_reservations = [r for r in visible_reservations if r.date == date_filter]
     
-    return jsonify(events)
+    if floor:
+        visible_reservations = [
+            r for r in visible_reservations if r.space and r.space.resolved_floor == floor
+        ]
+    
+    # Formatear para el calendario
+    events = _format_calendar_events(visible_reservations)
+    if since:
+        return jsonify({'events': events, 'removed': changes['removed'], 'cursor': changes['cursor']})
+    response = jsonify(events)
+    response.headers['X-Calendar-Cursor'] = cursor
+    return response
 
 
 @user_bp.route('/api/spaces/<space_id>/schedule')
@@ -335,7 +380,7 @@ def get_space_schedule(space_id):
                 return jsonify({"error": "weekday debe estar entre 0 y 6"}), 400
         except ValueError:
             return jsonify({"error": "weekday inválido"}), 400
-    schedules = class_schedule_service.get_schedules(space_id, weekday_int)
+    schedules = services.class_schedule_service.get_schedules(space_id, weekday_int)
     return jsonify(schedules)
 
 
@@ -355,5 +400,5 @@ def chatbot_query():
         ctx = data.get('context', {}) or {}
     else:
         question = request.form.get('question', '')
-    result = chatbot_service.answer(question, context=ctx, page=page, page_size=page_size)
+    result = services.chatbot_service.answer(question, context=ctx, page=page, page_size=page_size)
     return jsonify(result)
@@ -58,11 +58,15 @@ CREATE TABLE IF NOT EXISTS reservations (
     reviewed_at TIMESTAMP WITH TIME ZONE,
     confirmation_sent_at TIMESTAMP WITH TIME ZONE,
     reminder_sent_at TIMESTAMP WITH TIME ZONE,
+    booking_id UUID, -- agrupa reservas de varios espacios solicitadas juntas
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     CONSTRAINT check_time_order CHECK (end_time > start_time)
 );
 
+-- Bases existentes: agregar columna de agrupación de reservas múltiples
+ALTER TABLE reservations ADD COLUMN IF NOT EXISTS booking_id UUID;
+
 -- Bitácora de eliminaciones de reservas (para auditoría)
 CREATE TABLE IF NOT EXISTS reservation_deletions (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -93,7 +97,10 @@ CREATE TABLE IF NOT EXISTS notifications (
 CREATE INDEX IF NOT EXISTS idx_reservations_user_id ON reservations(user_id);
 CREATE INDEX IF NOT EXISTS idx_reservations_space_id ON reservations(space_id);
 CREATE INDEX IF NOT EXISTS idx_reservations_date ON reservations(date);
+CREATE INDEX IF NOT EXISTS idx_reservations_space_date ON reservations(space_id, date);
 CREATE INDEX IF NOT EXISTS idx_reservations_status ON reservations(status);
+CREATE INDEX IF NOT EXISTS idx_reservations_booking_id ON reservations(booking_id) WHERE booking_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_reservation_deletions_created_at ON reservation_deletions(created_at);
 CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications(user_id);
 CREATE INDEX IF NOT EXISTS idx_notifications_read ON notifications(read);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
@@ -0,0 +1,42 @@
+-- Publica en el canal de invalidación los cambios hechos fuera de la app
+-- (panel de Supabase, SQL directo) para que las instancias con
+-- INVALIDATION_TRANSPORT=postgres invaliden sus cachés.
+-- El canal debe coincidir con INVALIDATION_CHANNEL (por defecto reservaspuce_invalidation).
+-- Solo tablas de catálogo: reservas y notificaciones ya se publican desde la app.
+
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_keys JSONB;
+BEGIN
+    row_keys := jsonb_build_array(COALESCE(NEW.id, OLD.id));
+    -- IF anidado: plpgsql valida NEW.role aunque la tabla no sea users
+    IF TG_TABLE_NAME = 'users' THEN
+        IF TG_OP = 'INSERT' OR NEW.role IS DISTINCT FROM OLD.role THEN
+            -- Cambio en el directorio de admins: invalidar la tabla completa
+            row_keys := NULL;
+        END IF;
+    END IF;
+
+    PERFORM pg_notify(
+        'reservaspuce_invalidation',
+        jsonb_build_object('origin', 'db', 'table', TG_TABLE_NAME, 'keys', row_keys)::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS spaces_invalidation ON spaces;
+CREATE TRIGGER spaces_invalidation
+    AFTER INSERT OR UPDATE OR DELETE ON spaces
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS class_schedules_invalidation ON class_schedules;
+CREATE TRIGGER class_schedules_invalidation
+    AFTER INSERT OR UPDATE OR DELETE ON class_schedules
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation();
+
+DROP TRIGGER IF EXISTS users_invalidation ON users;
+CREATE TRIGGER users_invalidation
+    AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation();
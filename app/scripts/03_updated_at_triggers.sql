@@ -0,0 +1,35 @@
+-- Mantiene updated_at al día en cada UPDATE (la réplica de lectura sincroniza por
+-- updated_at; sin esto un cambio de estado hecho por la app o desde el panel no se vería
+-- hasta la siguiente recarga completa).
+
+CREATE OR REPLACE FUNCTION touch_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_touch_updated_at ON users;
+CREATE TRIGGER users_touch_updated_at
+    BEFORE UPDATE ON users
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS spaces_touch_updated_at ON spaces;
+CREATE TRIGGER spaces_touch_updated_at
+    BEFORE UPDATE ON spaces
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS class_schedules_touch_updated_at ON class_schedules;
+CREATE TRIGGER class_schedules_touch_updated_at
+    BEFORE UPDATE ON class_schedules
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+DROP TRIGGER IF EXISTS reservations_touch_updated_at ON reservations;
+CREATE TRIGGER reservations_touch_updated_at
+    BEFORE UPDATE ON reservations
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Índices para la sincronización incremental
+CREATE INDEX IF NOT EXISTS idx_reservations_updated_at ON reservations(updated_at);
+CREATE INDEX IF NOT EXISTS idx_reservation_deletions_created_at ON reservation_deletions(created_at);
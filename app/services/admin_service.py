@@ -1,5 +1,4 @@
-from app.repositories.supabase.reservation_repo import ReservationRepository
-from app.repositories.supabase.space_repo import SpaceRepository
+from app.repositories.backend import reservation_repository, space_repository
 from app.repositories.supabase.user_repo import UserRepository
 from typing import Dict, Any
 
@@ -7,27 +6,22 @@ class AdminService:
     """Servicio para operaciones de administración"""
     
     def __init__(self):
-        self.reservation_repo = ReservationRepository()
-        self.space_repo = SpaceRepository()
+        self.reservation_repo = reservation_repository()
+        self.space_repo = space_repository()
         self.user_repo = UserRepository()
     
     def get_dashboard_stats(self) -> Dict[str, Any]:
         """Obtiene estadísticas para el dashboard"""
-        all_reservations = self.reservation_repo.get_all_reservations()
-        pending = [r for r in all_reservations if r.get('status') == 'pending']
-        approved = [r for r in all_reservations if r.get('status') == 'approved']
-        rejected = [r for r in all_reservations if r.get('status') == 'rejected']
-        
+        by_status = self.reservation_repo.count_by_status()
         all_spaces = self.space_repo.get_all_spaces()
-        all_users = self.user_repo.get_all_users()
         
         return {
-            'total_reservations': len(all_reservations),
-            'pending_reservations': len(pending),
-            'approved_reservations': len(approved),
-            'rejected_reservations': len(rejected),
+            'total_reservations': sum(by_status.values()),
+            'pending_reservations': by_status.get('pending', 0),
+            'approved_reservations': by_status.get('approved', 0),
+            'rejected_reservations': by_status.get('rejected', 0),
             'total_spaces': len(all_spaces),
-            'total_users': len(all_users)
+            'total_users': self.user_repo.count_users()
         }
     
     def get_pending_reservations(self) -> list:
@@ -1,25 +1,25 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.repositories.supabase.user_repo import UserRepository
 from app.services.email_service import EmailService
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta, timezone
 import random
 
 class AuthService:
     """Servicio para operaciones de autenticación"""
     
-    def __init__(self):
+    def __init__(self, email_service: Optional[EmailService] = None):
         self.user_repo = UserRepository()
-        self.email_service = EmailService()
+        self.email_service = email_service or EmailService()
 
     def _generate_verification_code(self) -> str:
         return f"{random.randint(0, 999999):06d}"
 
-    def _send_verification_email(self, user: Dict[str, Any], code: str) -> bool:
+    def _send_verification_email(self, user: Dict[str, Any], code: str) -> Tuple[bool, Optional[str]]:
         name = user.get('name', 'Usuario')
         email = user.get('email')
         if not email:
-            return False
+            return False, None
         subject = "Código de verificación - Reservas PUCE"
         body = (
             f"Hola {name},\n\n"
@@ -43,10 +43,10 @@ class AuthService:
             return "Ya existe un usuario con estos datos"
         return "Error al registrar usuario. Verifica los datos e intenta nuevamente."
 
-    def _humanize_email_error(self) -> str:
-        if not self.email_service.last_error:
+    def _humanize_email_error(self, error: Optional[str]) -> str:
+        if not error:
             return "No se pudo enviar el correo de verificación."
-        return f"No se pudo enviar el correo de verificación: {self.email_service.last_error}"
+        return f"No se pudo enviar el correo de verificación: {error}"
     
     def register_user(self, email: str, password: str, name: str, student_id: str) -> tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
         """Registra un nuevo usuario"""
@@ -62,7 +62,7 @@ class AuthService:
         verification_expires_at = (datetime.utcnow() + timedelta(minutes=30)).isoformat()
         
         # Crear usuario
-        user = self.user_repo.create_user(
+        user, error = self.user_repo.create_user(
             email,
             password_hash,
             name,
@@ -73,12 +73,12 @@ class AuthService:
             verification_expires_at=verification_expires_at
         )
         if not user:
-            return False, self._humanize_registration_error(self.user_repo.last_error or ''), None
+            return False, self._humanize_registration_error(error or ''), None
 
-        email_sent = self._send_verification_email(user, verification_code)
+        email_sent, email_error = self._send_verification_email(user, verification_code)
         if email_sent:
             return True, "Usuario registrado. Revisa tu correo para verificar la cuenta.", user
-        return True, self._humanize_email_error(), user
+        return True, self._humanize_email_error(email_error), user
     
     def login_user(self, email: str, password: str) -> tuple[bool, Optional[str], Optional[Dict[str, Any]]]:
         """Autentica un usuario"""
@@ -144,6 +144,7 @@ class AuthService:
         if not self.user_repo.update_verification_code(user['id'], code, expires_at):
             return False, "No se pudo generar un nuevo código"
 
-        if self._send_verification_email(user, code):
+        email_sent, email_error = self._send_verification_email(user, code)
+        if email_sent:
             return True, "Código de verificación enviado"
-        return False, self._humanize_email_error()
+        return False, self._humanize_email_error(email_error)
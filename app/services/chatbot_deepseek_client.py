@@ -5,10 +5,13 @@ Si DeepSeek falla (créditos, red, timeout) retorna None y el chatbot usa rule-b
 """
 
 import json
+import time
 import urllib.request
 import urllib.error
 from typing import Optional, Dict, Any
 
+from app.metrics import LLM_LATENCY, LLM_REQUESTS
+
 
 SYSTEM_PROMPT = """Eres un clasificador para un sistema de reservas de espacios.
 Tu única tarea es interpretar la pregunta del usuario y devolver un JSON con:
@@ -61,6 +64,8 @@ def extract_slots_deepseek(question: str, context: Optional[Dict[str, Any]] = No
         "max_tokens": 256,
         "temperature": 0.1,
     }
+    started = time.perf_counter()
+    outcome = "error"
     try:
         data = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(
@@ -108,6 +113,7 @@ def extract_slots_deepseek(question: str, context: Optional[Dict[str, Any]] = No
         sec = (parsed.get("secondary_intent") or "").strip().lower() or None
         if sec and sec not in ("capacidad", "ocupacion", "libres", "ayuda"):
             sec = None
+        outcome = "success"
         return {
             "intent": intent,
             "date": date_val,
@@ -118,3 +124,6 @@ def extract_slots_deepseek(question: str, context: Optional[Dict[str, Any]] = No
         }
     except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError, json.JSONDecodeError, KeyError, TypeError, ValueError):
         return None
+    finally:
+        LLM_REQUESTS.inc(outcome)
+        LLM_LATENCY.observe(time.perf_counter() - started)
@@ -4,6 +4,9 @@ import re
 
 from flask import current_app
 
+from app.metrics import CHATBOT_INTENT_SOURCE
+from app.models.class_schedule import ClassSchedule
+from app.models.time_range import TimeRange, free_ranges
 from app.services.space_service import SpaceService
 from app.services.reservation_service import ReservationService
 from app.services.class_schedule_service import ClassScheduleService
@@ -18,6 +21,10 @@ def _get_deepseek_slots(question: str, context: Optional[Dict[str, Any]]) -> Opt
         return None
 
 
+# Jornada sobre la que se calculan bloques libres (07:00-22:00)
+DAY_WINDOW = TimeRange(7 * 60, 22 * 60)
+
+
 def _normalize_for_intent(text: str) -> str:
     """Quita acentos para que 'cuántas' y 'cuantas' coincidan al detectar intents."""
     if not text:
@@ -34,10 +41,12 @@ class ChatbotService:
     se usa rule-based. La IA nunca decide disponibilidad; la respuesta final siempre sale de Supabase.
     """
 
-    def __init__(self):
-        self.space_service = SpaceService()
-        self.reservation_service = ReservationService()
-        self.class_schedule_service = ClassScheduleService()
+    def __init__(self, space_service: Optional[SpaceService] = None,
+                 reservation_service: Optional[ReservationService] = None,
+                 class_schedule_service: Optional[ClassScheduleService] = None):
+        self.space_service = space_service or SpaceService()
+        self.reservation_service = reservation_service or ReservationService()
+        self.class_schedule_service = class_schedule_service or ClassScheduleService()
         self.months = {
             "enero": 1, "ene": 1,
             "febrero": 2, "feb": 2,
@@ -191,30 +200,22 @@ class ChatbotService:
         except Exception:
             weekday = None
         schedules = self.class_schedule_service.get_schedules(space_id, weekday) if weekday is not None else []
-        class_intervals = [
-            ("clase", str(s.get("start_time"))[:5], str(s.get("end_time"))[:5]) for s in schedules
-        ]
+        class_ranges = [c.time_range for c in (ClassSchedule.from_row(s) for s in schedules) if c is not None]
         # Reservas (pending/approved)
         reservations = self.reservation_service.get_reservations_by_space_and_date(space_id, date_str)
-        res_intervals = [
-            ("reserva", str(r.get("start_time"))[:5], str(r.get("end_time"))[:5])
-            for r in reservations
-            if r.get("status") in ["pending", "approved"]
+        res_ranges = [
+            r for r in (
+                TimeRange.from_row(res) for res in reservations
+                if res.get("status") in ["pending", "approved"]
+            ) if r is not None
         ]
+        class_intervals = [("clase", r.start_str, r.end_str) for r in class_ranges]
+        res_intervals = [("reserva", r.start_str, r.end_str) for r in res_ranges]
         all_intervals = class_intervals + res_intervals
-        # Bloques libres en rango 07:00-22:00
-        day_start = "07:00"
-        day_end = "22:00"
-        intervals_sorted = sorted(all_intervals, key=lambda x: x[1])
-        free_blocks = []
-        cursor = day_start
-        for _, s, e in intervals_sorted:
-            if s > cursor:
-                free_blocks.append((cursor, s))
-            if e > cursor:
-                cursor = e
-        if cursor < day_end:
-            free_blocks.append((cursor, day_end))
+        # Bloques libres en rango 07:00-22:00 (comparando minutos)
+        free_blocks = [
+            (r.start_str, r.end_str) for r in free_ranges(class_ranges + res_ranges, DAY_WINDOW)
+        ]
         return {
             "classes": class_intervals,
             "reservations": res_intervals,
@@ -226,23 +227,12 @@ class ChatbotService:
         }
 
     def _get_free_spaces(self, date_str: str) -> List[Dict[str, Any]]:
-        spaces = self.space_service.get_all_spaces()
         weekday = None
         try:
             weekday = date_module.fromisoformat(date_str).weekday()
         except Exception:
             weekday = None
-        free = []
-        for sp in spaces:
-            sid = sp.get("id")
-            schedules = self.class_schedule_service.get_schedules(sid, weekday) if weekday is not None else []
-            if schedules:
-                continue
-            reservations = self.reservation_service.get_reservations_by_space_and_date(sid, date_str)
-            active = [r for r in reservations if r.get("status") in ["pending", "approved"]]
-            if not active:
-                free.append(sp)
-        return free
+        return self.space_service.get_free_spaces(date_str, weekday)
 
     def _clarify(self, message: str, chips: List[Dict[str, str]]):
         return {"answer": message, "type": "clarify", "chips": chips, "data": {}}
@@ -299,6 +289,7 @@ class ChatbotService:
 
         nlp = _get_deepseek_slots(question, context)
         if nlp and nlp.get("confidence", 0) >= threshold and nlp.get("intent"):
+            CHATBOT_INTENT_SOURCE.inc("deepseek")
             intent = nlp.get("intent")
             secondary_intent = nlp.get("secondary_intent")
             # Siempre priorizar la fecha calculada en el servidor desde el texto del usuario
@@ -313,6 +304,7 @@ class ChatbotService:
             return (intent, date_str, space_obj, filters, context_merge, secondary_intent)
 
         # Fallback rule-based
+        CHATBOT_INTENT_SOURCE.inc("rule_based")
         date_str = self._parse_date(ql)
         sp_check = self._find_space(ql)
         if not date_str and sp_check and last_date and last_intent == "libres" and "disponibilidad" in ql:
@@ -1,7 +1,20 @@
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import csv
+import io
 
+from app.models.class_schedule import ClassSchedule
+from app.models.time_range import TimeRange, to_minutes
 from app.repositories.supabase.class_schedule_repo import ClassScheduleRepository
+from app.repositories.backend import space_repository
+
+
+WEEKDAY_NAMES = {
+    "lunes": 0, "martes": 1, "miercoles": 2, "miércoles": 2, "jueves": 3,
+    "viernes": 4, "sabado": 5, "sábado": 5, "domingo": 6,
+}
+
+IMPORT_COLUMNS = ("space", "weekday", "start_time", "end_time", "description")
 
 
 class ClassScheduleService:
@@ -9,49 +22,45 @@ class ClassScheduleService:
 
     def __init__(self):
         self.repo = ClassScheduleRepository()
-
-    def _parse_time(self, time_str: str) -> datetime:
-        """Convierte HH:MM o HH:MM:SS a datetime base para comparar."""
-        parts = str(time_str).strip().split(":")
-        hour = int(parts[0])
-        minute = int(parts[1]) if len(parts) > 1 else 0
-        second = int(parts[2]) if len(parts) > 2 else 0
-        return datetime(2000, 1, 1, hour, minute, second)
+        self.space_repo = space_repository()
 
     def _validate_times(self, start_time: str, end_time: str) -> Optional[str]:
         try:
-            start = self._parse_time(start_time)
-            end = self._parse_time(end_time)
+            time_range = TimeRange.parse(start_time, end_time)
         except Exception:
             return "Horas inválidas, usa formato HH:MM"
-        if end <= start:
+        if not time_range.is_valid:
             return "La hora de fin debe ser mayor que la hora de inicio"
         return None
 
     def _check_overlap(
         self,
-        schedules: List[Dict[str, Any]],
+        schedules: List[ClassSchedule],
         start_time: str,
         end_time: str,
         exclude_id: Optional[str] = None,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[ClassSchedule]:
         """Devuelve el horario con el que se solapa, si existe."""
-        new_start = self._parse_time(start_time)
-        new_end = self._parse_time(end_time)
-        for sch in schedules:
-            if exclude_id and sch.get("id") == exclude_id:
-                continue
-            s_start = self._parse_time(sch.get("start_time"))
-            s_end = self._parse_time(sch.get("end_time"))
-            if new_start < s_end and s_start < new_end:
-                return sch
-        return None
+        target = TimeRange.parse(start_time, end_time)
+        return next(
+            (sch for sch in schedules if sch.id != exclude_id and sch.time_range.overlaps(target)), None
+        )
 
     def get_schedules(
         self, space_id: Optional[str] = None, weekday: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         return self.repo.get_schedules(space_id, weekday)
 
+    def get_schedules_for_spaces(
+        self, space_ids: List[str], weekday: Optional[int] = None
+    ) -> Optional[List[ClassSchedule]]:
+        """Horarios leídos de la base de datos (para validar conflictos). None si falla."""
+        return self.repo.get_schedules_for_spaces(space_ids, weekday)
+
+    def _current_schedules(self, space_id: str, weekday: int) -> List[ClassSchedule]:
+        # Las validaciones no usan get_schedules: el snapshot puede ir atrasado
+        return self.repo.get_schedules_for_spaces([space_id], weekday) or []
+
     def get_by_id(self, schedule_id: str) -> Optional[Dict[str, Any]]:
         return self.repo.get_by_id(schedule_id)
 
@@ -68,14 +77,9 @@ class ClassScheduleService:
         err = self._validate_times(start_time, end_time)
         if err:
             return False, err, None
-        existing = self.repo.get_schedules(space_id, weekday)
-        overlap = self._check_overlap(existing, start_time, end_time)
-        if overlap:
-            return (
-                False,
-                "Existe un horario de clase que se superpone",
-                overlap,
-            )
+        existing = self._current_schedules(space_id, weekday)
+        if self._check_overlap(existing, start_time, end_time):
+            return False, "Existe un horario de clase que se superpone", None
         created = self.repo.create_schedule(
             space_id, weekday, start_time, end_time, description
         )
@@ -97,10 +101,9 @@ class ClassScheduleService:
         err = self._validate_times(start_time, end_time)
         if err:
             return False, err, None
-        existing = self.repo.get_schedules(space_id, weekday)
-        overlap = self._check_overlap(existing, start_time, end_time, exclude_id=schedule_id)
-        if overlap:
-            return False, "Existe un horario de clase que se superpone", overlap
+        existing = self._current_schedules(space_id, weekday)
+        if self._check_overlap(existing, start_time, end_time, exclude_id=schedule_id):
+            return False, "Existe un horario de clase que se superpone", None
         updated = self.repo.update_schedule(
             schedule_id, space_id, weekday, start_time, end_time, description
         )
@@ -117,11 +120,173 @@ class ClassScheduleService:
         date_str: str,
         start_time: str,
         end_time: str,
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[ClassSchedule]:
         """Devuelve el horario de clase que se solapa con la reserva, si existe."""
         try:
             weekday = datetime.strptime(date_str, "%Y-%m-%d").weekday()  # 0 lunes
         except Exception:
             return None
-        schedules = self.repo.get_schedules(space_id, weekday)
+        schedules = self._current_schedules(space_id, weekday)
         return self._check_overlap(schedules, start_time, end_time)
+
+    # ------------------------------------------------------------------
+    # Importación masiva (CSV/XLSX)
+    # ------------------------------------------------------------------
+
+    def parse_import_file(self, filename: str, content: bytes) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Lee un CSV o XLSX con columnas space, weekday, start_time, end_time, description.
+
+        Retorna (filas, error). Cada fila lleva su número de línea en "line".
+        """
+        name = (filename or "").lower()
+        if name.endswith(".xlsx"):
+            try:
+                from openpyxl import load_workbook
+            except ImportError:
+                return [], "Para importar XLSX instala openpyxl o exporta el archivo como CSV"
+            try:
+                sheet = load_workbook(io.BytesIO(content), read_only=True, data_only=True).active
+                raw_rows = [["" if v is None else str(v) for v in row] for row in sheet.iter_rows(values_only=True)]
+            except Exception as e:
+                return [], f"No se pudo leer el archivo XLSX: {e}"
+        elif name.endswith(".csv"):
+            try:
+                text = content.decode("utf-8-sig")
+            except UnicodeDecodeError:
+                text = content.decode("latin-1")
+            dialect = csv.excel
+            try:
+                dialect = csv.Sniffer().sniff(text[:2048], delimiters=",;\t")
+            except csv.Error:
+                pass
+            raw_rows = list(csv.reader(io.StringIO(text), dialect))
+        else:
+            return [], "Formato no soportado, usa .csv o .xlsx"
+
+        if not raw_rows:
+            return [], "El archivo está vacío"
+        header = [h.strip().lower() for h in raw_rows[0]]
+        missing = [c for c in IMPORT_COLUMNS[:4] if c not in header]
+        if missing:
+            return [], f"Faltan columnas: {', '.join(missing)}"
+        idx = {c: header.index(c) for c in IMPORT_COLUMNS if c in header}
+        rows = []
+        for line, raw in enumerate(raw_rows[1:], start=2):
+            if not any((v or "").strip() for v in raw):
+                continue
+            row = {"line": line}
+            for col, i in idx.items():
+                row[col] = (raw[i] if i < len(raw) else "").strip()
+            rows.append(row)
+        return rows, None
+
+    def import_schedules(self, rows: List[Dict[str, Any]], dry_run: bool = True) -> Dict[str, Any]:
+        """Valida e importa horarios en bloque.
+
+        Resuelve espacios con una sola lectura, trae los horarios existentes de esos
+        espacios con otra, y detecta solapamientos (dentro del archivo y contra la BD)
+        en un único barrido ordenado por (espacio, día, inicio). Si dry_run es False y
+        no hay errores ni conflictos, inserta en lotes.
+
+        Retorna un reporte con to_create, unchanged, conflicts, errors, created y
+        failed (filas de to_create que no se pudieron insertar porque falló un lote).
+        """
+        report: Dict[str, Any] = {
+            "to_create": [], "unchanged": [], "conflicts": [], "errors": [], "created": 0, "failed": 0,
+        }
+        spaces = self.space_repo.get_all_spaces()
+        by_name = {(s.get("name") or "").strip().lower(): s for s in spaces}
+        by_id = {s.get("id"): s for s in spaces}
+
+        parsed = []
+        for row in rows:
+            line = row.get("line")
+            space_key = (row.get("space") or "").strip()
+            space = by_id.get(space_key) or by_name.get(space_key.lower())
+            if not space:
+                report["errors"].append({"line": line, "message": f"Espacio desconocido: {space_key or '-'}"})
+                continue
+            weekday_raw = (row.get("weekday") or "").strip().lower()
+            weekday = WEEKDAY_NAMES.get(weekday_raw)
+            if weekday is None:
+                try:
+                    weekday = int(weekday_raw)
+                except ValueError:
+                    weekday = -1
+            if weekday < 0 or weekday > 6:
+                report["errors"].append({"line": line, "message": f"Día inválido: {row.get('weekday') or '-'}"})
+                continue
+            err = self._validate_times(row.get("start_time"), row.get("end_time"))
+            if err:
+                report["errors"].append({"line": line, "message": err})
+                continue
+            parsed.append({
+                "line": line,
+                "space_id": space["id"],
+                "space_name": space.get("name"),
+                "weekday": weekday,
+                "start_time": str(row["start_time"])[:5],
+                "end_time": str(row["end_time"])[:5],
+                "description": row.get("description") or None,
+                "start": to_minutes(row["start_time"]),
+                "end": to_minutes(row["end_time"]),
+            })
+
+        space_ids = list({p["space_id"] for p in parsed})
+        existing = self.repo.get_schedules_for_spaces(space_ids) if space_ids else []
+        if existing is None:
+            report["errors"].append({"line": None, "message": "No se pudieron leer los horarios existentes"})
+            return report
+
+        items = [dict(p, source="file") for p in parsed]
+        for sch in existing:
+            items.append({
+                "line": None,
+                "id": sch.id,
+                "space_id": sch.space_id,
+                "space_name": by_id.get(sch.space_id, {}).get("name"),
+                "weekday": sch.weekday,
+                "start_time": sch.time_range.start_str,
+                "end_time": sch.time_range.end_str,
+                "description": sch.description,
+                "start": sch.time_range.start,
+                "end": sch.time_range.end,
+                "source": "db",
+            })
+        # Existentes primero en empates para que una fila idéntica se marque como sin cambios
+        items.sort(key=lambda it: (it["space_id"], it["weekday"], it["start"], it["source"] != "db", it["end"]))
+
+        group = None
+        active: Optional[Dict[str, Any]] = None
+        for it in items:
+            key = (it["space_id"], it["weekday"])
+            if key != group:
+                group, active = key, None
+            if active is not None and it["start"] < active["end"]:
+                if it["source"] == "file" and active["source"] == "db" \
+                        and (it["start"], it["end"]) == (active["start"], active["end"]):
+                    report["unchanged"].append(it)
+                    continue
+                if it["source"] == "file" or active["source"] == "file":
+                    report["conflicts"].append({"row": it, "with": active})
+                    if it["end"] > active["end"]:
+                        active = it
+                    continue
+            if active is None or it["end"] > active["end"]:
+                active = it
+            if it["source"] == "file":
+                report["to_create"].append(it)
+
+        conflicted_lines = set()
+        for c in report["conflicts"]:
+            for side in (c["row"], c["with"]):
+                if side["source"] == "file":
+                    conflicted_lines.add(side["line"])
+        report["to_create"] = [it for it in report["to_create"] if it["line"] not in conflicted_lines]
+
+        if dry_run or report["errors"] or report["conflicts"]:
+            return report
+        created = self.repo.create_schedules(report["to_create"])
+        report["created"] = len(created)
+        report["failed"] = len(report["to_create"]) - len(created)
+        return report
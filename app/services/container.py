@@ -0,0 +1,108 @@
+"""
+Contenedor de servicios compartido por todos los blueprints.
+
+Cada servicio se construye la primera vez que se pide (no al importar las rutas) y se
+reutiliza en todo el proceso; las dependencias entre servicios se resuelven aquí para
+que exista una sola instancia de cada uno. Los módulos pesados (supabase, chatbot,
+SMTP) se importan dentro de las fábricas, así un arranque en frío de Vercel solo paga
+Flask y las rutas.
+"""
+
+import threading
+from typing import Any, Callable, Dict
+
+
+class ServiceContainer:
+    """Instancias perezosas de servicios y repositorios (una por proceso)."""
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = factory()
+        return instance
+
+    def reset(self):
+        """Descarta las instancias creadas (pruebas, cambio de backend)."""
+        with self._lock:
+            self._instances.clear()
+
+    @property
+    def email_service(self):
+        def build():
+            from app.services.email_service import EmailService
+            return EmailService()
+        return self._get('email_service', build)
+
+    @property
+    def space_service(self):
+        def build():
+            from app.services.space_service import SpaceService
+            return SpaceService()
+        return self._get('space_service', build)
+
+    @property
+    def class_schedule_service(self):
+        def build():
+            from app.services.class_schedule_service import ClassScheduleService
+            return ClassScheduleService()
+        return self._get('class_schedule_service', build)
+
+    @property
+    def reservation_service(self):
+        def build():
+            from app.services.reservation_service import ReservationService
+            return ReservationService(
+                class_schedule_service=self.class_schedule_service,
+                space_service=self.space_service,
+                email_service=self.email_service,
+            )
+        return self._get('reservation_service', build)
+
+    @property
+    def auth_service(self):
+        def build():
+            from app.services.auth_service import AuthService
+            return AuthService(email_service=self.email_service)
+        return self._get('auth_service', build)
+
+    @property
+    def admin_service(self):
+        def build():
+            from app.services.admin_service import AdminService
+            return AdminService()
+        return self._get('admin_service', build)
+
+    @property
+    def notification_service(self):
+        def build():
+            from app.services.notification_service import NotificationService
+            return NotificationService()
+        return self._get('notification_service', build)
+
+    @property
+    def chatbot_service(self):
+        def build():
+            from app.services.chatbot_service import ChatbotService
+            return ChatbotService(
+                space_service=self.space_service,
+                reservation_service=self.reservation_service,
+                class_schedule_service=self.class_schedule_service,
+            )
+        return self._get('chatbot_service', build)
+
+    @property
+    def reservation_deletion_repo(self):
+        def build():
+            from app.repositories.supabase.reservation_deletion_repo import ReservationDeletionRepository
+            return ReservationDeletionRepository()
+        return self._get('reservation_deletion_repo', build)
+
+
+services = ServiceContainer()
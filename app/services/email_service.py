@@ -1,11 +1,24 @@
-import smtplib
+import logging
 import threading
-from email.message import EmailMessage
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
 from app.config import Config
+from app.metrics import EMAIL_LATENCY, EMAIL_SENT
+
+if TYPE_CHECKING:
+    from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+NOT_CONFIGURED = "SMTP no configurado. Revisa SMTP_HOST y SMTP_FROM."
 
 
 class EmailService:
-    """Servicio simple de envío de correos vía SMTP."""
+    """Servicio simple de envío de correos vía SMTP.
+
+    Es compartido entre hilos/greenlets: no guarda estado por envío, cada método retorna
+    su propio error.
+    """
 
     def __init__(self):
         self.host = Config.SMTP_HOST
@@ -15,41 +28,58 @@ class EmailService:
         self.sender = Config.SMTP_FROM
         self.use_tls = Config.SMTP_USE_TLS
         self.use_ssl = Config.SMTP_USE_SSL
-        self.last_error = None
 
     def is_configured(self) -> bool:
         return bool(self.host and self.sender)
 
-    def send_email(self, to_email: str, subject: str, body: str, subtype: str = "plain") -> bool:
-        self.last_error = None
-        if not self.is_configured():
-            self.last_error = "SMTP no configurado. Revisa SMTP_HOST y SMTP_FROM."
-            print(f"EmailService: {self.last_error}")
-            return False
-
+    def _build_message(self, to_email: str, subject: str, body: str, subtype: str = "plain") -> "EmailMessage":
+        # smtplib/email se importan al enviar el primer correo, no en el arranque
+        from email.message import EmailMessage
         message = EmailMessage()
         message["Subject"] = subject
         message["From"] = self.sender
         message["To"] = to_email
         # Permitir cuerpo en HTML (multilinea)
         message.set_content(body, subtype=subtype)
+        return message
+
+    def _open_connection(self):
+        import smtplib
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=15)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=15)
+        try:
+            if self.use_tls and not self.use_ssl:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send_email(self, to_email: str, subject: str, body: str, subtype: str = "plain") -> Tuple[bool, Optional[str]]:
+        """Envía un correo. Retorna (enviado, error)."""
+        if not self.is_configured():
+            logger.warning("EmailService: %s", NOT_CONFIGURED)
+            EMAIL_SENT.inc("not_configured")
+            return False, NOT_CONFIGURED
+
+        message = self._build_message(to_email, subject, body, subtype)
 
+        started = time.perf_counter()
         try:
-            if self.use_ssl:
-                server = smtplib.SMTP_SSL(self.host, self.port, timeout=15)
-            else:
-                server = smtplib.SMTP(self.host, self.port, timeout=15)
-            with server:
-                if self.use_tls and not self.use_ssl:
-                    server.starttls()
-                if self.username and self.password:
-                    server.login(self.username, self.password)
+            with self._open_connection() as server:
                 server.send_message(message)
-            return True
+            EMAIL_SENT.inc("sent")
+            return True, None
         except Exception as e:
-            self.last_error = str(e)
-            print(f"EmailService: error enviando correo: {e}")
-            return False
+            logger.error("EmailService: error enviando correo: %s", e)
+            EMAIL_SENT.inc("error")
+            return False, str(e)
+        finally:
+            EMAIL_LATENCY.observe(time.perf_counter() - started, "single")
 
     def send_email_async(self, to_email: str, subject: str, body: str, subtype: str = "plain"):
         """Dispara el envío en un hilo para no bloquear la petición."""
@@ -58,3 +88,47 @@ class EmailService:
             args=(to_email, subject, body, subtype),
             daemon=True,
         ).start()
+
+    def send_emails(self, messages: List[Tuple[str, str, str, str]]) -> Tuple[int, Optional[str]]:
+        """Envía varios correos (to, subject, body, subtype) reutilizando una sola conexión SMTP.
+
+        Retorna (cuántos se enviaron, último error).
+        """
+        if not messages:
+            return 0, None
+        if not self.is_configured():
+            logger.warning("EmailService: %s", NOT_CONFIGURED)
+            EMAIL_SENT.inc("not_configured", amount=len(messages))
+            return 0, NOT_CONFIGURED
+
+        import smtplib
+        sent = 0
+        last_error = None
+        started = time.perf_counter()
+        try:
+            with self._open_connection() as server:
+                for to_email, subject, body, subtype in messages:
+                    try:
+                        server.send_message(self._build_message(to_email, subject, body, subtype))
+                        sent += 1
+                    except smtplib.SMTPRecipientsRefused as e:
+                        last_error = str(e)
+                        logger.warning("EmailService: destinatario rechazado %s: %s", to_email, e)
+        except Exception as e:
+            last_error = str(e)
+            logger.error("EmailService: error enviando lote de correos: %s", e)
+        EMAIL_LATENCY.observe(time.perf_counter() - started, "batch")
+        EMAIL_SENT.inc("sent", amount=sent)
+        if sent < len(messages):
+            EMAIL_SENT.inc("error", amount=len(messages) - sent)
+        return sent, last_error
+
+    def send_emails_async(self, messages: List[Tuple[str, str, str, str]]):
+        """Encola un lote de correos en un solo hilo (una conexión SMTP para todo el lote)."""
+        if not messages:
+            return
+        threading.Thread(
+            target=self.send_emails,
+            args=(list(messages),),
+            daemon=True,
+        ).start()
@@ -1,22 +1,36 @@
-from app.repositories.supabase.reservation_repo import ReservationRepository
+import logging
+from app.repositories.backend import reservation_repository
 from app.repositories.supabase.notification_repo import NotificationRepository
 from app.repositories.supabase.user_repo import UserRepository
 from app.repositories.supabase.reservation_deletion_repo import ReservationDeletionRepository
 from app.services.class_schedule_service import ClassScheduleService
+from app.services.space_service import SpaceService
 from app.services.email_service import EmailService
+from app.models.reservation import CALENDAR_SYNC_OVERLAP, Reservation, calendar_cursor, space_name_of
+from app.models.time_range import TimeRange
 from typing import Optional, Dict, Any, List
-from datetime import datetime, date as date_module
+import uuid
+from datetime import datetime, date as date_module, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# Límite de ocurrencias por serie para evitar solicitudes desproporcionadas
+MAX_SERIES_OCCURRENCES = 52
+
 
 class ReservationService:
     """Servicio para operaciones de reservas"""
     
-    def __init__(self):
-        self.reservation_repo = ReservationRepository()
+    def __init__(self, class_schedule_service: Optional[ClassScheduleService] = None,
+                 space_service: Optional[SpaceService] = None,
+                 email_service: Optional[EmailService] = None):
+        self.reservation_repo = reservation_repository()
         self.notification_repo = NotificationRepository()
         self.user_repo = UserRepository()
-        self.class_schedule_service = ClassScheduleService()
+        self.class_schedule_service = class_schedule_service or ClassScheduleService()
         self.reservation_deletion_repo = ReservationDeletionRepository()
-        self.email_service = EmailService()
+        self.email_service = email_service or EmailService()
+        self.space_service = space_service or SpaceService()
     
     def create_reservation(self, user_id: str, space_id: str, date: str, start_time: str, 
                           end_time: str, justification: str) -> tuple[bool, str, Optional[Dict[str, Any]]]:
@@ -34,8 +48,8 @@ class ReservationService:
             space_id, date, start_time, end_time
         )
         if class_conflict:
-            conflict_start = str(class_conflict.get('start_time'))[:5]
-            conflict_end = str(class_conflict.get('end_time'))[:5]
+            conflict_start = class_conflict.time_range.start_str
+            conflict_end = class_conflict.time_range.end_str
             return (
                 False,
                 f"El aula está ocupada por clases de {conflict_start} a {conflict_end}.",
@@ -62,33 +76,265 @@ class ReservationService:
         
         return True, "Reserva creada exitosamente. Esperando aprobación del administrador.", reservation
     
-    def _notify_admins_new_reservation(self, reservation: Dict[str, Any]):
-        """Notifica a los administradores sobre una nueva reserva"""
-        from app.services.space_service import SpaceService
-        
-        admins = self.user_repo.get_all_users()
-        admins = [admin for admin in admins if admin.get('role') == 'admin']
+    def _series_dates(
+        self,
+        start_date: date_module,
+        until_date: date_module,
+        interval_weeks: int,
+        skip_dates: Optional[List[str]] = None
+    ) -> List[str]:
+        """Fechas (ISO) de una serie semanal/quincenal, sin las fechas omitidas"""
+        skip = set(skip_dates or [])
+        dates = []
+        current = start_date
+        step = timedelta(weeks=interval_weeks)
+        while current <= until_date:
+            iso = current.isoformat()
+            if iso not in skip:
+                dates.append(iso)
+            current += step
+        return dates
+
+    def create_reservation_series(
+        self,
+        user_id: str,
+        space_id: str,
+        start_date: str,
+        until_date: str,
+        start_time: str,
+        end_time: str,
+        justification: str,
+        interval_weeks: int = 1,
+        skip_dates: Optional[List[str]] = None
+    ) -> tuple[bool, str, Dict[str, Any]]:
+        """Crea una serie de reservas recurrentes (semanal o quincenal hasta una fecha).
+
+        Valida toda la serie con una sola lectura de horarios de clase y una de reservas,
+        luego inserta las ocurrencias sin conflicto en un único insert.
+        Retorna (éxito, mensaje, {'created': [...], 'conflicts': [{'date', 'reason'}]}).
+        """
+        result: Dict[str, Any] = {'created': [], 'conflicts': []}
+        if interval_weeks not in (1, 2):
+            return False, "La recurrencia debe ser semanal o quincenal", result
+        try:
+            first = datetime.strptime(start_date, '%Y-%m-%d').date()
+            last = datetime.strptime(until_date, '%Y-%m-%d').date()
+        except ValueError:
+            return False, "Fecha inválida", result
+        if first < date_module.today():
+            return False, "No puedes reservar fechas pasadas", result
+        if last < first:
+            return False, "La fecha final de la serie debe ser posterior a la inicial", result
+
+        dates = self._series_dates(first, last, interval_weeks, skip_dates)
+        if not dates:
+            return False, "La serie no tiene fechas para reservar", result
+        if len(dates) > MAX_SERIES_OCCURRENCES:
+            return False, f"La serie no puede superar {MAX_SERIES_OCCURRENCES} reservas", result
+
+        try:
+            new_range = TimeRange.parse(start_time, end_time)
+        except ValueError:
+            return False, "Horas inválidas, usa formato HH:MM", result
+
+        # Todas las fechas caen el mismo día de la semana: una sola lectura de clases
+        class_conflict = self.class_schedule_service.find_conflict_with_class(
+            space_id, dates[0], start_time, end_time
+        )
+        if class_conflict:
+            conflict_start = class_conflict.time_range.start_str
+            conflict_end = class_conflict.time_range.end_str
+            result['conflicts'] = [
+                {'date': d, 'reason': f"Clases de {conflict_start} a {conflict_end}"} for d in dates
+            ]
+            return False, f"El aula está ocupada por clases de {conflict_start} a {conflict_end}.", result
+
+        existing = self.reservation_repo.get_active_reservations_for_spaces([space_id], dates[0], dates[-1])
+        if existing is None:
+            return False, "No se pudo verificar la disponibilidad", result
+        busy_by_date: Dict[str, List[TimeRange]] = {}
+        for r in existing:
+            if r.time_range is not None:
+                busy_by_date.setdefault(r.date, []).append(r.time_range)
+
+        accepted = []
+        for d in dates:
+            if any(new_range.overlaps(busy) for busy in busy_by_date.get(d, [])):
+                result['conflicts'].append({'date': d, 'reason': "Ya existe una reserva en ese horario"})
+                continue
+            accepted.append({
+                'user_id': user_id,
+                'space_id': space_id,
+                'date': d,
+                'start_time': start_time,
+                'end_time': end_time,
+                'justification': justification,
+                'status': 'pending'
+            })
+
+        if not accepted:
+            return False, "Todas las fechas de la serie tienen conflictos", result
+
+        created = self.reservation_repo.create_reservations(accepted)
+        if not created:
+            return False, "Error al crear la serie de reservas", result
+        result['created'] = created
+
+        # Un aviso a admins y un correo de confirmación por la serie completa
+        self._notify_admins_new_reservation(created[0], count=len(created))
+        self._send_reservation_confirmation_email(created[0], count=len(created))
+
+        message = f"Serie creada: {len(created)} reserva(s) pendientes de aprobación."
+        if result['conflicts']:
+            omitted = ", ".join(c['date'] for c in result['conflicts'])
+            message += f" Fechas omitidas por conflicto: {omitted}."
+        return True, message, result
+
+    def create_multi_space_booking(
+        self,
+        user_id: str,
+        space_ids: List[str],
+        date: str,
+        start_time: str,
+        end_time: str,
+        justification: str
+    ) -> tuple[bool, str, Dict[str, Any]]:
+        """Reserva varios espacios a la vez (todo o nada) bajo un booking_id común.
+
+        Verifica clases y reservas de todos los espacios con una consulta de cada tipo
+        y crea las filas en un único insert.
+        Retorna (éxito, mensaje, {'booking_id', 'reservations', 'conflicts': [{'space_id', 'reason'}]}).
+        """
+        result: Dict[str, Any] = {'booking_id': None, 'reservations': [], 'conflicts': []}
+        space_ids = list(dict.fromkeys(sid for sid in space_ids if sid))
+        if len(space_ids) < 2:
+            return False, "Selecciona al menos dos espacios", result
+        try:
+            reservation_date = datetime.strptime(date, '%Y-%m-%d').date()
+            if reservation_date < date_module.today():
+                return False, "No puedes reservar fechas pasadas", result
+        except ValueError:
+            return False, "Fecha inválida", result
+
+        try:
+            new_range = TimeRange.parse(start_time, end_time)
+        except ValueError:
+            return False, "Horas inválidas, usa formato HH:MM", result
+
+        schedules = self.class_schedule_service.get_schedules_for_spaces(space_ids, reservation_date.weekday())
+        existing = self.reservation_repo.get_active_reservations_for_spaces(space_ids, date, date)
+        if schedules is None or existing is None:
+            return False, "No se pudo verificar la disponibilidad", result
+
+        for sch in schedules:
+            if new_range.overlaps(sch.time_range):
+                result['conflicts'].append({
+                    'space_id': sch.space_id,
+                    'reason': f"Clases de {sch.time_range.start_str} a {sch.time_range.end_str}"
+                })
+        for r in existing:
+            if r.time_range is not None and new_range.overlaps(r.time_range):
+                result['conflicts'].append({
+                    'space_id': r.space_id,
+                    'reason': f"Reserva de {r.start_str} a {r.end_str}"
+                })
+        if result['conflicts']:
+            return False, "Uno o más espacios no están disponibles en ese horario; no se reservó ninguno", result
+
+        booking_id = str(uuid.uuid4())
+        rows = [
+            {
+                'user_id': user_id,
+                'space_id': sid,
+                'date': date,
+                'start_time': start_time,
+                'end_time': end_time,
+                'justification': justification,
+                'status': 'pending',
+                'booking_id': booking_id
+            }
+            for sid in space_ids
+        ]
+        # Un solo insert de PostgREST es una transacción: se crean todas las filas o ninguna
+        created = self.reservation_repo.create_reservations(rows)
+        if len(created) != len(rows):
+            return False, "Error al crear la reserva múltiple", result
+
+        result['booking_id'] = booking_id
+        result['reservations'] = created
+        self._notify_admins_new_reservation(created[0], count=len(created))
+        self._send_reservation_confirmation_email(created[0], count=len(created))
+        return True, f"Reserva múltiple creada: {len(created)} espacios pendientes de aprobación.", result
+
+    def get_booking_reservations(self, booking_id: str) -> List[Dict[str, Any]]:
+        """Obtiene las reservas de una reserva múltiple"""
+        return self.reservation_repo.get_reservations_by_booking(booking_id)
+
+    def approve_booking(self, booking_id: str, admin_id: str) -> Dict[str, tuple[bool, str]]:
+        """Aprueba todas las reservas pendientes de una reserva múltiple"""
+        ids = [r['id'] for r in self.reservation_repo.get_reservations_by_booking(booking_id)]
+        return self.approve_many(ids, admin_id)
+
+    def reject_booking(self, booking_id: str, admin_id: str, rejection_reason: str) -> Dict[str, tuple[bool, str]]:
+        """Rechaza todas las reservas pendientes de una reserva múltiple"""
+        ids = [r['id'] for r in self.reservation_repo.get_reservations_by_booking(booking_id)]
+        return self.reject_many(ids, admin_id, rejection_reason)
+
+    def cancel_booking_by_user(self, booking_id: str, user_id: str, reason: str) -> tuple[bool, str]:
+        """Cancelación por el usuario de todos los espacios pendientes de su reserva múltiple"""
+        reservations = self.reservation_repo.get_reservations_by_booking(booking_id)
+        if not reservations:
+            return False, "Reserva no encontrada"
+        if any(r.get('user_id') != user_id for r in reservations):
+            return False, "No tienes permisos para cancelar esta reserva"
+        pending = [r for r in reservations if r.get('status') == 'pending']
+        if not pending:
+            return False, "Solo puedes cancelar reservas pendientes"
+        deleted = self.reservation_repo.delete_reservations([r['id'] for r in pending])
+        if not deleted:
+            return False, "No se pudo cancelar la reserva"
+        # Bitácora solo de lo que realmente se eliminó
+        removed = set(deleted)
+        self.reservation_deletion_repo.log_deletions(
+            [r for r in pending if r['id'] in removed], None, f"Cancelada por el usuario: {reason}"
+        )
+        self.notification_repo.create_notification(
+            user_id=user_id,
+            title="Reserva cancelada",
+            message=f"Cancelaste tu reserva de {len(deleted)} espacio(s). Motivo: {reason}",
+            type="info",
+            link="/user/my_reservations"
+        )
+        return True, f"Reserva cancelada ({len(deleted)} espacio(s))"
+
+    def _notify_admins_new_reservation(self, reservation: Dict[str, Any], count: int = 1):
+        """Notifica a los administradores sobre una nueva reserva (o una serie de count reservas)"""
+        admins = self.user_repo.get_admins()
         
         # Obtener el ID de la reserva
         reservation_id = reservation.get('id') if reservation else None
         if not reservation_id:
-            print("Error: No se pudo obtener el ID de la reserva para la notificación")
+            logger.error("Error: No se pudo obtener el ID de la reserva para la notificación")
             return
         
         # Obtener el nombre del espacio
-        space_service = SpaceService()
-        space = space_service.get_space_by_id(reservation.get('space_id', ''))
+        space = self.space_service.get_space_by_id(reservation.get('space_id', ''))
         space_name = space.get('name', 'un espacio') if space else 'un espacio'
         date_str = reservation.get('date', '')
         start_time = str(reservation.get('start_time', ''))[:5]
         end_time = str(reservation.get('end_time', ''))[:5]
-        justification = reservation.get('justification', '')
+        justification = reservation.get('justification') or ''
+        series_txt = f" (primera de {count} fechas)" if count > 1 else ""
         
         for admin in admins:
             self.notification_repo.create_notification(
                 user_id=admin['id'],
                 title='Nueva solicitud de reserva',
-                message=f'Se ha recibido una nueva solicitud de reserva para {space_name}',
+                message=(
+                    f'Se ha recibido una nueva solicitud de reserva para {space_name}'
+                    if count == 1 else
+                    f'Se ha recibido una serie de {count} solicitudes de reserva para {space_name}'
+                ),
                 type='info',
                 link=f'/admin/reservations/{reservation_id}'
             )
@@ -104,7 +350,7 @@ class ReservationService:
                 <p>Se ha recibido una nueva solicitud de reserva.</p>
                 <ul>
                   <li><strong>Espacio:</strong> {space_name}</li>
-                  <li><strong>Fecha:</strong> {date_str}</li>
+                  <li><strong>Fecha:</strong> {date_str}{series_txt}</li>
                   <li><strong>Horario:</strong> {start_time} - {end_time}</li>
                   <li><strong>Justificación:</strong> {justification}</li>
                   <li><strong>ID:</strong> {reservation_id}</li>
@@ -118,24 +364,23 @@ class ReservationService:
                     if to_email:
                         self.email_service.send_email_async(to_email, subject, body, subtype="html")
         except Exception as e:
-            print(f"Error enviando correo a admins: {e}")
+            logger.error("Error enviando correo a admins: %s", e)
 
-    def _send_reservation_confirmation_email(self, reservation: Dict[str, Any]):
-        """Envía correo de confirmación al crear una reserva"""
+    def _send_reservation_confirmation_email(self, reservation: Dict[str, Any], count: int = 1):
+        """Envía correo de confirmación al crear una reserva (o una serie de count reservas)"""
         try:
             user = self.user_repo.get_user_by_id(reservation.get('user_id'))
             if not user or not user.get('email'):
                 return
 
-            from app.services.space_service import SpaceService
-            space_service = SpaceService()
-            space = space_service.get_space_by_id(reservation.get('space_id', ''))
+            space = self.space_service.get_space_by_id(reservation.get('space_id', ''))
             space_name = space.get('name', 'el espacio') if space else 'el espacio'
 
             date_str = reservation.get('date', '')
             start_time = str(reservation.get('start_time', ''))[:5]
             end_time = str(reservation.get('end_time', ''))[:5]
-            justification = reservation.get('justification', '')
+            justification = reservation.get('justification') or ''
+            series_txt = f" (primera de {count} fechas)" if count > 1 else ""
 
             subject = "Confirmación de reserva - Reservas PUCE"
             body = f"""
@@ -145,7 +390,7 @@ class ReservationService:
             <p>Tu solicitud de reserva fue registrada correctamente.</p>
             <ul>
               <li><strong>Espacio:</strong> {space_name}</li>
-              <li><strong>Fecha:</strong> {date_str}</li>
+              <li><strong>Fecha:</strong> {date_str}{series_txt}</li>
               <li><strong>Horario:</strong> {start_time} - {end_time}</li>
               <li><strong>Estado:</strong> Pendiente de aprobación</li>
               <li><strong>Justificación:</strong> {justification}</li>
@@ -159,27 +404,31 @@ class ReservationService:
             # Marcar como enviado (best effort)
             self.reservation_repo.mark_confirmation_sent(reservation.get('id'))
         except Exception as e:
-            print(f"Error enviando confirmación por correo: {e}")
+            logger.error("Error enviando confirmación por correo: %s", e)
     
+    def _status_transition_error(self, reservation_id: str, default: str) -> str:
+        """Mensaje cuando la transición condicional no actualizó ninguna fila"""
+        reservation = self.reservation_repo.get_reservation_by_id(reservation_id)
+        if not reservation:
+            return "Reserva no encontrada"
+        if reservation.get('status') != 'pending':
+            return "Esta reserva ya fue procesada"
+        return default
+
     def approve_reservation(self, reservation_id: str, admin_id: str) -> tuple[bool, str]:
         """Aprueba una reserva"""
-        reservation = self.reservation_repo.get_reservation_by_id(reservation_id)
+        # Transición condicional pending -> approved: si dos admins aprueban a la vez solo uno gana
+        reservation = self.reservation_repo.update_reservation_status(
+            reservation_id, 'approved', admin_id, expected_status='pending'
+        )
         if not reservation:
-            return False, "Reserva no encontrada"
-        
-        if reservation['status'] != 'pending':
-            return False, "Esta reserva ya fue procesada"
-        
-        # Actualizar estado
-        updated = self.reservation_repo.update_reservation_status(reservation_id, 'approved', admin_id)
-        if not updated:
-            return False, "Error al aprobar la reserva"
+            return False, self._status_transition_error(reservation_id, "Error al aprobar la reserva")
         
         # Notificar al usuario
         self.notification_repo.create_notification(
             user_id=reservation['user_id'],
             title='Reserva aprobada',
-            message=f'Tu reserva para {reservation.get("spaces", {}).get("name", "el espacio")} ha sido aprobada',
+            message=f'Tu reserva para {space_name_of(reservation)} ha sido aprobada',
             type='success',
             link=f'/user/my_reservations/{reservation_id}'
         )
@@ -190,29 +439,18 @@ class ReservationService:
     
     def reject_reservation(self, reservation_id: str, admin_id: str, rejection_reason: str = None) -> tuple[bool, str]:
         """Rechaza una reserva"""
-        reservation = self.reservation_repo.get_reservation_by_id(reservation_id)
-        if not reservation:
-            return False, "Reserva no encontrada"
-        
-        if reservation['status'] != 'pending':
-            return False, "Esta reserva ya fue procesada"
-        
         # Validar razón de rechazo
         if not rejection_reason or len(rejection_reason.strip()) < 10:
             return False, "Debes proporcionar una razón del rechazo de al menos 10 caracteres"
         
-        # Actualizar estado
-        updated = self.reservation_repo.update_reservation_status(reservation_id, 'rejected', admin_id)
-        if not updated:
-            return False, "Error al rechazar la reserva"
+        # Transición condicional pending -> rejected
+        reservation = self.reservation_repo.update_reservation_status(
+            reservation_id, 'rejected', admin_id, expected_status='pending'
+        )
+        if not reservation:
+            return False, self._status_transition_error(reservation_id, "Error al rechazar la reserva")
         
-        # Obtener el nombre del espacio
-        space_name = 'el espacio'
-        if reservation.get('spaces'):
-            if isinstance(reservation.get('spaces'), dict):
-                space_name = reservation.get('spaces', {}).get('name', 'el espacio')
-            elif isinstance(reservation.get('spaces'), list) and len(reservation.get('spaces', [])) > 0:
-                space_name = reservation.get('spaces')[0].get('name', 'el espacio')
+        space_name = space_name_of(reservation)
         
         # Crear mensaje con la razón
         notification_message = f'Tu reserva para {space_name} ha sido rechazada.\n\nRazón: {rejection_reason.strip()}'
@@ -230,6 +468,55 @@ class ReservationService:
         
         return True, "Reserva rechazada exitosamente"
 
+    def _build_reservation_status_email(
+        self,
+        reservation: Dict[str, Any],
+        user: Dict[str, Any],
+        status: str,
+        rejection_reason: Optional[str] = None
+    ) -> tuple[str, str]:
+        """Arma asunto y cuerpo del correo de aprobación/rechazo"""
+        space_name = space_name_of(reservation)
+        date_str = reservation.get('date')
+        time_range = TimeRange.from_row(reservation)
+        start_time = time_range.start_str if time_range else ''
+        end_time = time_range.end_str if time_range else ''
+        justification = reservation.get('justification') or ''
+
+        if status == 'approved':
+            subject = "Reserva aprobada - Reservas PUCE"
+            body = f"""
+            <html>
+            <body>
+            <p>Hola {user.get('name', 'Usuario')},</p>
+            <p>Tu reserva fue <strong>aprobada</strong>.</p>
+            <p style="margin:0;"><strong>Espacio:</strong> {space_name}</p>
+            <p style="margin:0;"><strong>Fecha:</strong> {date_str}</p>
+            <p style="margin:0;"><strong>Horario:</strong> {start_time} - {end_time}</p>
+            <p style="margin:0;"><strong>Justificación:</strong> {justification}</p>
+            <p style="margin-top:12px;">¡Gracias!</p>
+            </body>
+            </html>
+            """
+        else:
+            subject = "Reserva rechazada - Reservas PUCE"
+            reason = rejection_reason.strip() if rejection_reason else "Sin detalle"
+            body = f"""
+            <html>
+            <body>
+            <p>Hola {user.get('name', 'Usuario')},</p>
+            <p>Tu reserva fue <strong>rechazada</strong>.</p>
+            <p style="margin:0;"><strong>Espacio:</strong> {space_name}</p>
+            <p style="margin:0;"><strong>Fecha:</strong> {date_str}</p>
+            <p style="margin:0;"><strong>Horario:</strong> {start_time} - {end_time}</p>
+            <p style="margin:0;"><strong>Justificación:</strong> {justification}</p>
+            <p style="margin:0;"><strong>Motivo:</strong> {reason}</p>
+            <p style="margin-top:12px;">Si tienes dudas, contacta al administrador.</p>
+            </body>
+            </html>
+            """
+        return subject, body
+
     def _send_reservation_status_email(
         self,
         reservation: Dict[str, Any],
@@ -238,56 +525,128 @@ class ReservationService:
     ):
         """Envía correo al usuario cuando la reserva es aprobada o rechazada"""
         try:
-            user = self.user_repo.get_user_by_id(reservation.get('user_id'))
+            # La fila actualizada ya trae users(name, email); solo se consulta si falta
+            user = reservation.get('users')
+            if not user or not user.get('email'):
+                user = self.user_repo.get_user_by_id(reservation.get('user_id'))
             if not user or not user.get('email'):
                 return
 
-            space = reservation.get('spaces') or {}
-            if isinstance(space, list):
-                space = space[0] if space else {}
-            space_name = space.get('name', 'el espacio')
+            subject, body = self._build_reservation_status_email(reservation, user, status, rejection_reason)
+            self.email_service.send_email_async(user['email'], subject, body, subtype="html")
+        except Exception as e:
+            logger.error("Error enviando email de estado de reserva: %s", e)
 
-            date_str = str(reservation.get('date', ''))
-            start_time = str(reservation.get('start_time', ''))[:5]
-            end_time = str(reservation.get('end_time', ''))[:5]
-            justification = reservation.get('justification', '')
+    def _bulk_status_change(
+        self,
+        reservation_ids: List[str],
+        admin_id: str,
+        status: str,
+        rejection_reason: Optional[str] = None
+    ) -> Dict[str, tuple[bool, str]]:
+        """Cambia el estado de varias reservas pendientes: un update, un insert de notificaciones y un lote de correos"""
+        ids = list(dict.fromkeys(rid for rid in reservation_ids if rid))
+        updated = self.reservation_repo.update_reservations_status(
+            ids, status, admin_id, expected_status='pending'
+        )
+        updated_by_id = {r['id']: r for r in updated}
 
+        notifications = []
+        emails = []
+        for reservation in updated:
+            space_name = space_name_of(reservation)
             if status == 'approved':
-                subject = "Reserva aprobada - Reservas PUCE"
-                body = f"""
-                <html>
-                <body>
-                <p>Hola {user.get('name', 'Usuario')},</p>
-                <p>Tu reserva fue <strong>aprobada</strong>.</p>
-                <p style="margin:0;"><strong>Espacio:</strong> {space_name}</p>
-                <p style="margin:0;"><strong>Fecha:</strong> {date_str}</p>
-                <p style="margin:0;"><strong>Horario:</strong> {start_time} - {end_time}</p>
-                <p style="margin:0;"><strong>Justificación:</strong> {justification}</p>
-                <p style="margin-top:12px;">¡Gracias!</p>
-                </body>
-                </html>
-                """
+                notifications.append({
+                    'user_id': reservation['user_id'],
+                    'title': 'Reserva aprobada',
+                    'message': f'Tu reserva para {space_name} ha sido aprobada',
+                    'type': 'success',
+                    'link': f"/user/my_reservations/{reservation['id']}"
+                })
             else:
-                subject = "Reserva rechazada - Reservas PUCE"
-                reason = rejection_reason.strip() if rejection_reason else "Sin detalle"
-                body = f"""
-                <html>
-                <body>
-                <p>Hola {user.get('name', 'Usuario')},</p>
-                <p>Tu reserva fue <strong>rechazada</strong>.</p>
-                <p style="margin:0;"><strong>Espacio:</strong> {space_name}</p>
-                <p style="margin:0;"><strong>Fecha:</strong> {date_str}</p>
-                <p style="margin:0;"><strong>Horario:</strong> {start_time} - {end_time}</p>
-                <p style="margin:0;"><strong>Justificación:</strong> {justification}</p>
-                <p style="margin:0;"><strong>Motivo:</strong> {reason}</p>
-                <p style="margin-top:12px;">Si tienes dudas, contacta al administrador.</p>
-                </body>
-                </html>
-                """
-
-            self.email_service.send_email_async(user['email'], subject, body, subtype="html")
+                notifications.append({
+                    'user_id': reservation['user_id'],
+                    'title': 'Reserva rechazada',
+                    'message': f'Tu reserva para {space_name} ha sido rechazada.\n\nRazón: {rejection_reason.strip()}',
+                    'type': 'error',
+                    'link': f"/user/my_reservations/{reservation['id']}"
+                })
+            user = reservation.get('users') or {}
+            if user.get('email'):
+                subject, body = self._build_reservation_status_email(reservation, user, status, rejection_reason)
+                emails.append((user['email'], subject, body, "html"))
+
+        self.notification_repo.create_notifications(notifications)
+        try:
+            self.email_service.send_emails_async(emails)
         except Exception as e:
-            print(f"Error enviando email de estado de reserva: {e}")
+            logger.error("Error encolando correos de estado de reserva: %s", e)
+
+        ok_message = "Reserva aprobada" if status == 'approved' else "Reserva rechazada"
+        results: Dict[str, tuple[bool, str]] = {}
+        missing = [rid for rid in ids if rid not in updated_by_id]
+        existing = {r['id']: r for r in self.reservation_repo.get_reservations_by_ids(missing)} if missing else {}
+        for rid in ids:
+            if rid in updated_by_id:
+                results[rid] = (True, ok_message)
+            elif rid not in existing:
+                results[rid] = (False, "Reserva no encontrada")
+            elif existing[rid].get('status') != 'pending':
+                results[rid] = (False, "Esta reserva ya fue procesada")
+            else:
+                results[rid] = (False, "No se pudo actualizar la reserva")
+        return results
+
+    def approve_many(self, reservation_ids: List[str], admin_id: str) -> Dict[str, tuple[bool, str]]:
+        """Aprueba varias reservas pendientes. Retorna (éxito, mensaje) por ID."""
+        return self._bulk_status_change(reservation_ids, admin_id, 'approved')
+
+    def reject_many(
+        self,
+        reservation_ids: List[str],
+        admin_id: str,
+        rejection_reason: str
+    ) -> Dict[str, tuple[bool, str]]:
+        """Rechaza varias reservas pendientes con la misma razón. Retorna (éxito, mensaje) por ID."""
+        if not rejection_reason or len(rejection_reason.strip()) < 10:
+            message = "Debes proporcionar una razón del rechazo de al menos 10 caracteres"
+            return {rid: (False, message) for rid in reservation_ids}
+        return self._bulk_status_change(reservation_ids, admin_id, 'rejected', rejection_reason)
+
+    def delete_many(self, reservation_ids: List[str], admin_id: str, reason: str) -> Dict[str, tuple[bool, str]]:
+        """Elimina varias reservas (admin): una lectura, un delete, un insert en bitácora y uno de notificaciones"""
+        ids = list(dict.fromkeys(rid for rid in reservation_ids if rid))
+        reservations = self.reservation_repo.get_reservations_by_ids(ids)
+        found = {r['id']: r for r in reservations}
+
+        # Primero el delete: bitácora y avisos solo para lo que realmente se eliminó
+        # (con DATA_BACKEND=postgres además se confirman los tres juntos)
+        with self.reservation_repo.transaction() as tx:
+            deleted = set(self.reservation_repo.delete_reservations(list(found)))
+            removed = [found[rid] for rid in found if rid in deleted]
+            self.reservation_deletion_repo.log_deletions(removed, admin_id, reason)
+            self.notification_repo.create_notifications([
+                {
+                    'user_id': r.get('user_id'),
+                    'title': 'Reserva eliminada',
+                    'message': f"Tu reserva para {space_name_of(r)} fue eliminada por un administrador.\n\nMotivo: {reason}",
+                    'type': 'warning',
+                    'link': '/user/my_reservations'
+                }
+                for r in removed
+            ])
+        if not tx.committed:
+            # Falló la bitácora o los avisos: el ROLLBACK también deshizo el delete
+            deleted = set()
+        results: Dict[str, tuple[bool, str]] = {}
+        for rid in ids:
+            if rid not in found:
+                results[rid] = (False, "Reserva no encontrada")
+            elif rid in deleted:
+                results[rid] = (True, "Reserva eliminada")
+            else:
+                results[rid] = (False, "No se pudo eliminar la reserva")
+        return results
     
     def get_user_reservations(self, user_id: str) -> List[Dict[str, Any]]:
         """Obtiene las reservas de un usuario"""
@@ -309,6 +668,57 @@ class ReservationService:
         """Obtiene todas las reservas"""
         return self.reservation_repo.get_all_reservations()
 
+    def get_calendar_reservations(self) -> List[Reservation]:
+        """Obtiene las reservas pendientes/aprobadas para el calendario (proyección reducida)"""
+        return self.reservation_repo.get_calendar_reservations()
+
+    def get_calendar_changes(self, since: str) -> Optional[Dict[str, Any]]:
+        """Cambios del calendario desde el cursor since.
+
+        Retorna {'changed': reservas pendientes/aprobadas creadas o modificadas,
+        'removed': ids que ya no deben mostrarse (rechazadas/canceladas o eliminadas),
+        'cursor': valor para la siguiente consulta}, o None si alguna lectura falla.
+        Lanza ValueError si since no es una fecha ISO válida.
+        """
+        cursor = datetime.fromisoformat(since.replace('Z', '+00:00'))
+        if cursor.tzinfo is None:
+            cursor = cursor.replace(tzinfo=timezone.utc)
+        window = (cursor - CALENDAR_SYNC_OVERLAP).isoformat()
+
+        reservations = self.reservation_repo.get_calendar_changes(window)
+        deletions = self.reservation_deletion_repo.get_deleted_since(window)
+        if reservations is None or deletions is None:
+            return None
+
+        changed, removed = [], set()
+        for reservation in reservations:
+            if reservation.status in ('pending', 'approved'):
+                changed.append(reservation)
+            else:
+                removed.add(str(reservation.id))
+            cursor = max(cursor, self._parse_timestamp(reservation.updated_at, cursor))
+        for deletion in deletions:
+            if deletion.get('reservation_id'):
+                removed.add(str(deletion['reservation_id']))
+            cursor = max(cursor, self._parse_timestamp(deletion.get('created_at'), cursor))
+
+        return {
+            'changed': changed,
+            'removed': sorted(removed),
+            'cursor': calendar_cursor(cursor),
+        }
+
+    @staticmethod
+    def _parse_timestamp(value: Any, default: datetime) -> datetime:
+        """Timestamp de la base de datos como datetime con zona (UTC si viene sin zona)"""
+        if not value:
+            return default
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return default
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
     def send_reservation_reminders(self, target_date: Optional[str] = None) -> Dict[str, int]:
         """Envía recordatorios de reservas aprobadas para la fecha indicada"""
         if not target_date:
@@ -320,26 +730,21 @@ class ReservationService:
         total = len(reservations)
         sent = 0
 
-        for reservation in reservations:
-            user = reservation.get('users') or reservation.get('user') or {}
-            email = user.get('email')
+        for res in reservations:
+            email = res.user.email if res.user else None
             if not email:
                 continue
 
-            space = reservation.get('spaces') or {}
-            if isinstance(space, list):
-                space = space[0] if space else {}
-            space_name = space.get('name', 'el espacio')
-
-            start_time = str(reservation.get('start_time', ''))[:5]
-            end_time = str(reservation.get('end_time', ''))[:5]
-            justification = reservation.get('justification', '')
+            space_name = res.space_name()
+            start_time = res.start_str
+            end_time = res.end_str
+            justification = res.justification
 
             subject = "Recordatorio de reserva - Reservas PUCE"
             body = f"""
             <html>
             <body>
-            <p>Hola {user.get('name', 'Usuario')},</p>
+            <p>Hola {res.user_name()},</p>
             <p>Tienes una reserva activa para hoy.</p>
             <p style="margin:0;"><strong>Espacio:</strong> {space_name}</p>
             <p style="margin:0;"><strong>Fecha:</strong> {target_date}</p>
@@ -349,8 +754,9 @@ class ReservationService:
             </body>
             </html>
             """
-            if self.email_service.send_email(email, subject, body, subtype="html"):
-                if self.reservation_repo.mark_reminder_sent(reservation.get('id')):
+            email_sent, _ = self.email_service.send_email(email, subject, body, subtype="html")
+            if email_sent:
+                if self.reservation_repo.mark_reminder_sent(res.id):
                     sent += 1
 
         return {'total': total, 'sent': sent}
@@ -388,8 +794,8 @@ class ReservationService:
             space_id, date, start_time, end_time
         )
         if class_conflict:
-            conflict_start = str(class_conflict.get('start_time'))[:5]
-            conflict_end = str(class_conflict.get('end_time'))[:5]
+            conflict_start = class_conflict.time_range.start_str
+            conflict_end = class_conflict.time_range.end_str
             return (
                 False,
                 f"El aula está ocupada por clases de {conflict_start} a {conflict_end}.",
@@ -419,12 +825,7 @@ class ReservationService:
 
         # Notificar al usuario
         try:
-            space_name = "el espacio"
-            if reservation.get("spaces"):
-                if isinstance(reservation.get("spaces"), dict):
-                    space_name = reservation.get("spaces", {}).get("name", "el espacio")
-                elif isinstance(reservation.get("spaces"), list) and reservation.get("spaces"):
-                    space_name = reservation.get("spaces")[0].get("name", "el espacio")
+            space_name = space_name_of(reservation)
             message = f"Tu reserva para {space_name} fue eliminada por un administrador.\n\nMotivo: {reason}"
             self.notification_repo.create_notification(
                 user_id=reservation.get("user_id"),
@@ -434,7 +835,7 @@ class ReservationService:
                 link="/user/my_reservations"
             )
         except Exception as e:
-            print(f"Error notificando eliminación: {e}")
+            logger.error("Error notificando eliminación: %s", e)
 
         deleted = self.reservation_repo.delete_reservation(reservation_id)
         if not deleted:
@@ -456,7 +857,7 @@ class ReservationService:
         self.notification_repo.create_notification(
             user_id=user_id,
             title="Reserva cancelada",
-            message=f"Cancelaste tu reserva para {reservation.get('spaces', {}).get('name', 'el espacio')}. Motivo: {reason}",
+            message=f"Cancelaste tu reserva para {space_name_of(reservation)}. Motivo: {reason}",
             type="info",
             link="/user/my_reservations"
         )
@@ -1,27 +1,16 @@
-from app.repositories.supabase.space_repo import SpaceRepository
+from app.models.space import resolve_floor
+from app.repositories.backend import space_repository
 from typing import List, Dict, Any, Optional
 
 class SpaceService:
     """Servicio para operaciones de espacios"""
     
     def __init__(self):
-        self.space_repo = SpaceRepository()
+        self.space_repo = space_repository()
 
     def _resolve_floor(self, space: Dict[str, Any]) -> str:
         """Resuelve piso basado en floor o en el prefijo del nombre"""
-        floor = space.get('floor')
-        if floor:
-            return floor
-        name = (space.get('name') or '').upper()
-        if name.startswith('A-0'):
-            return 'planta_baja'
-        if name.startswith('A-1'):
-            return 'piso_1'
-        if name.startswith('A-2'):
-            return 'piso_2'
-        if (space.get('type') or '').lower() == 'auditorio':
-            return 'planta_baja'
-        return 'sin_piso'
+        return resolve_floor(space.get('floor'), space.get('name'), space.get('type'))
     
     def get_all_spaces(self) -> List[Dict[str, Any]]:
         """Obtiene todos los espacios"""
@@ -31,6 +20,10 @@ class SpaceService:
         """Obtiene un espacio por ID"""
         return self.space_repo.get_space_by_id(space_id)
     
+    def get_free_spaces(self, date: str, weekday: Optional[int]) -> List[Dict[str, Any]]:
+        """Espacios sin clases ni reservas activas en la fecha"""
+        return self.space_repo.get_free_spaces(date, weekday)
+    
     def get_spaces_by_type(self, space_type: str) -> List[Dict[str, Any]]:
         """Obtiene espacios por tipo"""
         return self.space_repo.get_spaces_by_type(space_type)
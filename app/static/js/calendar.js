@@ -167,175 +167,157 @@ Justificación: ${info.event.extendedProps.justification || 'N/A'}
     }
 }
 
+// Copia local de las reservas visibles (id -> evento procesado) y cursor del último sync.
+// La primera carga trae todo; las siguientes piden solo el delta con ?since=cursor.
+const eventStore = new Map();
+let syncCursor = null;
+let syncInFlight = null;
+const SYNC_INTERVAL_MS = 60000;
+
 /**
- * Carga las reservas desde el API
+ * Convierte un evento del API en un evento "allDay" de un solo día para la vista de mes
  */
-function loadReservations(fetchInfo, successCallback, failureCallback) {
-    const params = new URLSearchParams();
+function processEvent(event) {
+    if (!event.start) {
+        console.warn('Evento sin start:', event);
+        return null;
+    }
     
-    if (selectedSpaceId) {
-        params.append('space_id', selectedSpaceId);
+    // Extraer SOLO la fecha (sin hora) del evento
+    let eventDate;
+    if (typeof event.start === 'string') {
+        eventDate = event.start.includes('T') 
+            ? event.start.split('T')[0]  // Extraer solo YYYY-MM-DD
+            : event.start;
+    } else {
+        eventDate = new Date(event.start).toISOString().split('T')[0];
     }
-    if (selectedFloor) {
-        params.append('floor', selectedFloor);
+    
+    // Extraer información de hora para el título
+    const startTime = event.startTime || event.extendedProps?.startTime || '';
+    const endTime = event.endTime || event.extendedProps?.endTime || '';
+    const spaceName = event.spaceName || event.extendedProps?.spaceName || 'Espacio';
+    
+    // Crear título con la hora
+    const eventTitle = startTime && endTime 
+        ? `${spaceName} (${startTime}-${endTime})`
+        : spaceName;
+    
+    // CRÍTICO: NO incluir 'end' y usar solo la fecha para que aparezca SOLO en UN día
+    return {
+        id: String(event.id),  // Asegurar que sea string único
+        title: eventTitle,
+        allDay: true,  // CRÍTICO: debe ser allDay para vista de mes
+        start: eventDate,  // SOLO la fecha YYYY-MM-DD (sin hora, sin end)
+        color: event.color || '#28a745',  // Verde por defecto
+        backgroundColor: event.backgroundColor || '#28a745',  // Verde por defecto
+        borderColor: event.borderColor || '#218838',  // Verde oscuro para borde
+        textColor: event.textColor || 'white',
+        // Mantener toda la información original para tooltips y filtros locales
+        extendedProps: {
+            status: event.status || event.extendedProps?.status,
+            spaceName: spaceName,
+            spaceId: event.spaceId ? String(event.spaceId) : '',
+            floor: event.floor || '',
+            userName: event.userName || event.extendedProps?.userName || 'Usuario',
+            startTime: startTime,
+            endTime: endTime,
+            justification: event.extendedProps?.justification || '',
+            originalStart: event.start,  // Guardar fecha/hora original completa
+            originalEnd: event.end
+        }
+    };
+}
+
+function storeEvents(events) {
+    events.forEach(event => {
+        const processed = processEvent(event);
+        if (processed) {
+            eventStore.set(processed.id, processed);
+        }
+    });
+}
+
+/**
+ * Sincroniza eventStore con el servidor: carga completa la primera vez, delta después.
+ * Las llamadas concurrentes comparten la misma petición.
+ */
+function syncReservations() {
+    if (syncInFlight) {
+        return syncInFlight;
     }
     
+    const url = syncCursor
+        ? `/user/api/reservations?since=${encodeURIComponent(syncCursor)}`
+        : '/user/api/reservations';
+    
+    syncInFlight = fetch(url)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const cursor = response.headers.get('X-Calendar-Cursor');
+            return response.json().then(data => ({ data, cursor }));
+        })
+        .then(({ data, cursor }) => {
+            if (Array.isArray(data)) {
+                // Carga completa
+                eventStore.clear();
+                storeEvents(data);
+                syncCursor = cursor;
+                console.log('Reservas recibidas:', data.length);
+            } else {
+                // Delta: upsert de los cambios y baja de las eliminadas/rechazadas
+                storeEvents(data.events || []);
+                (data.removed || []).forEach(id => eventStore.delete(String(id)));
+                syncCursor = data.cursor || syncCursor;
+                console.log('Cambios recibidos:', (data.events || []).length, 'eliminados:', (data.removed || []).length);
+            }
+        })
+        .finally(() => {
+            syncInFlight = null;
+        });
+    return syncInFlight;
+}
+
+/**
+ * Carga las reservas desde el store local (sincronizado con el API) para el rango visible
+ */
+function loadReservations(fetchInfo, successCallback, failureCallback) {
     // Obtener reservas para el rango de fechas visible
     const startDate = fetchInfo.startStr.split('T')[0];
     const endDate = fetchInfo.endStr.split('T')[0];
     
     console.log('Cargando reservas desde', startDate, 'hasta', endDate);
     
-    fetch(`/user/api/reservations?${params.toString()}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            return response.json();
+    syncReservations()
+        .catch(error => {
+            // Se muestra lo que ya hay en el store; el siguiente sync reintenta desde el mismo cursor
+            console.error('Error cargando reservas:', error);
         })
-        .then(events => {
-            console.log('Reservas recibidas:', events.length);
-            console.log('Eventos recibidos (primeros 3):', events.slice(0, 3));
-            
-            // Procesar eventos para la vista de mes
-            // En la vista de mes, los eventos deben ser "allDay" para aparecer solo en un día
-            const processedEvents = events.map(event => {
-                if (!event.start) {
-                    console.warn('Evento sin start:', event);
-                    return null;
-                }
-                
-                // Extraer SOLO la fecha (sin hora) del evento
-                let eventDate;
-                if (typeof event.start === 'string') {
-                    eventDate = event.start.includes('T') 
-                        ? event.start.split('T')[0]  // Extraer solo YYYY-MM-DD
-                        : event.start;
-                } else {
-                    eventDate = new Date(event.start).toISOString().split('T')[0];
-                }
-                
-                // Extraer información de hora para el título
-                const startTime = event.startTime || event.extendedProps?.startTime || '';
-                const endTime = event.endTime || event.extendedProps?.endTime || '';
-                const spaceName = event.spaceName || event.extendedProps?.spaceName || 'Espacio';
-                
-                // Crear título con la hora
-                const eventTitle = startTime && endTime 
-                    ? `${spaceName} (${startTime}-${endTime})`
-                    : spaceName;
-                
-                // Crear un nuevo evento que sea "allDay" pero SOLO en ese día específico
-                // CRÍTICO: NO incluir 'end' y usar solo la fecha para que aparezca SOLO en UN día
-                const processedEvent = {
-                    id: String(event.id),  // Asegurar que sea string único
-                    title: eventTitle,
-                    allDay: true,  // CRÍTICO: debe ser allDay para vista de mes
-                    start: eventDate,  // SOLO la fecha YYYY-MM-DD (sin hora, sin end)
-                    // IMPORTANTE: NO incluir 'end' - esto hace que ocupe solo UN día
-                    color: event.color || '#28a745',  // Verde por defecto
-                    backgroundColor: event.backgroundColor || '#28a745',  // Verde por defecto
-                    borderColor: event.borderColor || '#218838',  // Verde oscuro para borde
-                    textColor: event.textColor || 'white',
-                    // Mantener toda la información original para tooltips
-                    extendedProps: {
-                        status: event.status || event.extendedProps?.status,
-                        spaceName: spaceName,
-                        userName: event.userName || event.extendedProps?.userName || 'Usuario',
-                        startTime: startTime,
-                        endTime: endTime,
-                        justification: event.extendedProps?.justification || '',
-                        originalStart: event.start,  // Guardar fecha/hora original completa
-                        originalEnd: event.end
-                    }
-                };
-                
-                // CRÍTICO: Asegurar que NO tenga 'end' para que ocupe solo UN día
-                delete processedEvent.end;  // Eliminar explícitamente si existe
-                
-                // Verificar formato final
-                if (processedEvent.allDay !== true) {
-                    console.warn('ADVERTENCIA: Evento no es allDay después de procesar:', processedEvent);
-                    processedEvent.allDay = true;
+        .then(() => {
+            const events = [];
+            eventStore.forEach(event => {
+                if (selectedSpaceId && event.extendedProps.spaceId !== String(selectedSpaceId)) {
+                    return;
                 }
-                
-                return processedEvent;
-            }).filter(e => e !== null);
-            
-            // Filtrar eventos por el rango visible
-            // Ahora los eventos tienen start como solo fecha (YYYY-MM-DD), así que es más simple
-            const filteredEvents = processedEvents.filter(event => {
-                if (!event.start) {
-                    return false;
+                if (selectedFloor && event.extendedProps.floor !== selectedFloor) {
+                    return;
                 }
-                
-                try {
-                    // Como ahora start es solo la fecha (YYYY-MM-DD), comparar directamente
-                    const eventDate = event.start;  // Ya es solo la fecha sin hora
-                    
-                    // El evento solo debe aparecer en su día específico
-                    const isInRange = eventDate >= startDate && eventDate <= endDate;
-                    
-                    return isInRange;
-                } catch (error) {
-                    console.error('Error procesando evento:', event, error);
-                    return false;
+                // El evento solo debe aparecer en su día específico
+                if (event.start >= startDate && event.start <= endDate) {
+                    events.push(event);
                 }
             });
             
-            console.log('Eventos filtrados:', filteredEvents.length);
-            
-            // Debug detallado: mostrar información de cada evento
-            filteredEvents.forEach((e, index) => {
-                console.log(`Evento ${index + 1}:`, {
-                    id: e.id,
-                    title: e.title,
-                    start: e.start,
-                    end: e.end,
-                    allDay: e.allDay,
-                    hasEndProperty: 'end' in e
-                });
-            });
-            
-            // Verificar que no haya eventos duplicados o mal formateados
-            const eventDates = filteredEvents.map(e => e.start);
-            const uniqueDates = new Set(eventDates);
-            if (eventDates.length !== uniqueDates.size) {
-                console.warn('ADVERTENCIA: Hay eventos con la misma fecha', eventDates);
-            }
-            
-            // Verificar y limpiar eventos antes de enviarlos a FullCalendar
-            const finalEvents = filteredEvents.map(e => {
-                // Crear un objeto nuevo SIN la propiedad 'end'
-                const cleanEvent = {
-                    id: e.id,
-                    title: e.title,
-                    allDay: true,  // Forzar a true
-                    start: e.start,  // Solo la fecha
-                    color: e.color,
-                    backgroundColor: e.backgroundColor,
-                    borderColor: e.borderColor,
-                    textColor: e.textColor,
-                    extendedProps: e.extendedProps || {}
-                };
-                
-                // NO incluir 'end' en ningún caso
-                return cleanEvent;
-            });
-            
-            console.log('Eventos finales (sin end):', finalEvents.map(e => ({
-                id: e.id,
-                title: e.title,
-                start: e.start,
-                allDay: e.allDay,
-                hasEnd: 'end' in e
-            })));
-            
-            successCallback(finalEvents);
-        })
-        .catch(error => {
-            console.error('Error cargando reservas:', error);
-            // Llamar con un array vacío para que el calendario se muestre
-            successCallback([]);
+            console.log('Eventos filtrados:', events.length);
+            successCallback(events);
         });
 }
+
+// Sincronización periódica mientras la pestaña está visible
+setInterval(function() {
+    if (calendar && syncCursor && !document.hidden) {
+        calendar.refetchEvents();
+    }
+}, SYNC_INTERVAL_MS);
@@ -0,0 +1 @@
+# Benchmarks (se ejecutan contra el backend en memoria, ver SETUP_ENV.md)
@@ -0,0 +1,131 @@
+"""
+Costo de arranque en frío: importar api/index.py y atender la primera petición.
+
+Cada corrida es un proceso nuevo (como una instancia serverless recién creada) que mide
+el import de la app, la primera petición a /auth/login y qué módulos pesados quedaron
+cargados. Con --importtime se listan los módulos más caros según ``python -X importtime``.
+
+Uso:
+  python -m benchmarks.coldstart --runs 10
+  python -m benchmarks.coldstart --importtime --top 15
+  python -m benchmarks.coldstart --compare benchmarks/results/coldstart-base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+HEAVY_MODULES = ['supabase', 'httpx', 'smtplib', 'app.services.chatbot_service']
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import api.index
+t1 = time.perf_counter()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+client = api.index.app.test_client()
+t2 = time.perf_counter()
+client.get('/auth/login')
+t3 = time.perf_counter()
+print(json.dumps({{'import_ms': (t1 - t0) * 1000, 'first_request_ms': (t3 - t2) * 1000, 'loaded_at_import': loaded}}))
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault('DATA_BACKEND', 'memory')
+    env.setdefault('MEMORY_BACKEND_LATENCY_MS', '0')
+    return env
+
+
+def run_once() -> Dict[str, Any]:
+    code = _CHILD.format(heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         env=_child_env(), check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top: int) -> List[Dict[str, Any]]:
+    """Módulos con mayor tiempo acumulado de import (microsegundos de -X importtime)."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import api.index'],
+                         capture_output=True, text=True, env=_child_env(), check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append({'module': parts[2].strip(), 'cumulative_us': int(parts[1])})
+    rows.sort(key=lambda r: r['cumulative_us'], reverse=True)
+    return rows[:top]
+
+
+def run(args) -> Dict[str, Any]:
+    runs = [run_once() for _ in range(args.runs)]
+    imports = [r['import_ms'] for r in runs]
+    firsts = [r['first_request_ms'] for r in runs]
+    summary = {
+        'import_ms_median': round(statistics.median(imports), 2),
+        'import_ms_min': round(min(imports), 2),
+        'first_request_ms_median': round(statistics.median(firsts), 2),
+        'loaded_at_import': runs[-1]['loaded_at_import'],
+    }
+    print(f"import api.index  mediana {summary['import_ms_median']:.1f} ms (mín {summary['import_ms_min']:.1f} ms)")
+    print(f"primera petición  mediana {summary['first_request_ms_median']:.1f} ms")
+    print(f"módulos pesados cargados al importar: {', '.join(summary['loaded_at_import']) or 'ninguno'}")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+        },
+        'summary': summary,
+    }
+    if args.importtime:
+        report['import_profile'] = import_profile(args.top)
+        for row in report['import_profile']:
+            print(f"{row['cumulative_us'] / 1000:10.1f} ms  {row['module']}")
+    return report
+
+
+def compare(current: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """False si la mediana del import empeora más del umbral."""
+    with open(baseline_path, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    base = baseline['summary']['import_ms_median']
+    cur = current['summary']['import_ms_median']
+    delta = (cur - base) / base if base else 0.0
+    flag = '  <-- regresión' if delta > threshold else ''
+    print(f"import api.index {base:.1f} -> {cur:.1f} ms ({delta:+.1%}){flag}")
+    return not flag
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Arranque en frío de ReservasPuce')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', action='store_true', help='Incluir el top de -X importtime')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', default='benchmarks/results/coldstart.json')
+    parser.add_argument('--compare', help='JSON de una corrida anterior')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Regresión tolerada (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare and not compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
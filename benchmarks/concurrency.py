@@ -0,0 +1,214 @@
+"""
+Benchmark de concurrencia: la app detrás de gunicorn con distintas clases de worker.
+
+Levanta ``gunicorn -c gunicorn.conf.py run:app`` con un solo worker por clase (sync, gthread
+y gevent si está instalado) sobre el backend en memoria con latencia simulada, y lanza
+--clients clientes concurrentes durante --duration segundos mezclando peticiones rápidas
+(contador de notificaciones) con lentas (chatbot, decenas de consultas). Reporta
+peticiones/seg, p50/p95/p99 por ruta y errores.
+
+Uso:
+  python -m benchmarks.concurrency --clients 16 --duration 10 --latency-ms 20
+  python -m benchmarks.concurrency --workers sync gthread --output benchmarks/results/concurrency.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, '.')
+
+from benchmarks.e2e import CHATBOT_QUESTIONS, percentile
+
+SECRET_KEY = 'benchmark-concurrency'
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(port: int, proc: subprocess.Popen, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn terminó con código {proc.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn no respondió a tiempo')
+
+
+def _session_cookie(user: Dict[str, Any]) -> str:
+    """Cookie de sesión firmada con SECRET_KEY (la misma que recibe gunicorn)."""
+    from flask import Flask
+    from flask.sessions import SecureCookieSessionInterface
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    return serializer.dumps({'user_id': user['id'], 'email': user['email'],
+                             'name': user['name'], 'role': user['role']})
+
+
+def _request(port: int, cookie: str, path: str, body: Optional[Dict[str, Any]] = None) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data)
+    req.add_header('Cookie', f'session={cookie}')
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _load(port: int, cookies: List[str], clients: int, duration: float, slow_ratio: float, seed: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {'unread_count': [], 'chatbot': []}
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(i: int):
+        rnd = random.Random(seed + i)
+        cookie = cookies[i % len(cookies)]
+        while time.monotonic() < stop_at:
+            if rnd.random() < slow_ratio:
+                name, status_fn = 'chatbot', lambda: _request(
+                    port, cookie, '/user/chatbot/query', {'question': rnd.choice(CHATBOT_QUESTIONS)})
+            else:
+                name, status_fn = 'unread_count', lambda: _request(port, cookie, '/notifications/api/unread_count')
+            t0 = time.perf_counter()
+            try:
+                ok = status_fn() == 200
+            except OSError:
+                ok = False
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    result: Dict[str, Any] = {'requests': total, 'rps': round(total / wall, 1), 'errors': errors[0], 'routes': {}}
+    for name, values in latencies.items():
+        if values:
+            result['routes'][name] = {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+            }
+    return result
+
+
+def run_worker(worker_class: str, args, seed_path: str, cookies: List[str]) -> Dict[str, Any]:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'WEB_CONCURRENCY': '1',
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_TIMEOUT': '120',
+        'DATA_BACKEND': 'memory',
+        'MEMORY_BACKEND_LATENCY_MS': str(args.latency_ms),
+        'MEMORY_BACKEND_SEED': seed_path,
+        'SECRET_KEY': SECRET_KEY,
+        'DEEPSEEK_API_KEY': '',
+        'SMTP_HOST': '',
+        'LOG_LEVEL': 'ERROR',
+    })
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(port, proc)
+        _load(port, cookies, min(args.clients, 2), 1.0, args.slow_ratio, args.seed)  # calentamiento
+        result = _load(port, cookies, args.clients, args.duration, args.slow_ratio, args.seed)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    routes = ' '.join(f"{n} p95={r['p95_ms']}ms" for n, r in result['routes'].items())
+    print(f"{worker_class:8s} {result['rps']:>8.1f} req/s  errores={result['errors']}  {routes}")
+    return result
+
+
+def run(args) -> Dict[str, Any]:
+    from benchmarks.seed import build_dataset
+
+    dataset = build_dataset(n_spaces=args.spaces, n_users=50, n_reservations=args.reservations, seed=args.seed)
+    users = [u for u in dataset['users'] if u['role'] == 'user'][:args.clients]
+    cookies = [_session_cookie(u) for u in users]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as fh:
+        json.dump(dataset, fh, default=str)
+        seed_path = fh.name
+    try:
+        results = {w: run_worker(w, args, seed_path, cookies) for w in args.workers}
+    finally:
+        os.remove(seed_path)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'clients': args.clients,
+            'threads': args.threads,
+            'duration': args.duration,
+            'latency_ms': args.latency_ms,
+            'slow_ratio': args.slow_ratio,
+        },
+        'workers': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    default_workers = ['sync', 'gthread'] + (['gevent'] if importlib.util.find_spec('gevent') else [])
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia por clase de worker de gunicorn')
+    parser.add_argument('--workers', nargs='*', default=default_workers)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=8, help='GUNICORN_THREADS para gthread')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Latencia simulada por consulta')
+    parser.add_argument('--slow-ratio', type=float, default=0.1, help='Fracción de peticiones lentas (chatbot)')
+    parser.add_argument('--spaces', type=int, default=50)
+    parser.add_argument('--reservations', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmarks/results/concurrency.json')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
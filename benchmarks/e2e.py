@@ -0,0 +1,231 @@
+"""
+Benchmark de extremo a extremo de las rutas principales contra el backend en memoria
+(o contra un Postgres local con --postgres-url).
+
+Siembra datos (benchmarks/seed.py), recorre con el test client de Flask las rutas de
+reserva, calendario, dashboard, chatbot y contador de notificaciones, y reporta p50/p95/p99,
+consultas al backend por petición y bytes devueltos. El resultado se guarda en JSON y,
+con --compare, se contrasta contra una corrida anterior.
+
+Uso:
+  python -m benchmarks.e2e --iterations 200 --latency-ms 5 --output benchmarks/results/e2e.json
+  python -m benchmarks.e2e --compare benchmarks/results/e2e-base.json
+  python -m benchmarks.e2e --postgres-url postgresql://localhost/reservas_bench
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, '.')
+
+CHATBOT_QUESTIONS = [
+    "¿Qué espacios están libres hoy?",
+    "capacidad del A-100",
+    "ocupación del A-101 mañana",
+    "laboratorios libres el lunes",
+    "¿cuál es el aula más grande del piso 2?",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil con interpolación lineal (values no vacío)."""
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    ms = [s['ms'] for s in samples]
+    return {
+        'requests': len(samples),
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+        'mean_ms': round(statistics.mean(ms), 3),
+        'queries_per_request': round(statistics.mean(s['queries'] for s in samples), 2),
+        'bytes_per_request': int(statistics.mean(s['bytes'] for s in samples)),
+        'status_codes': sorted({int(s['status']) for s in samples}),
+    }
+
+
+def _setup_env(latency_ms: float, postgres_url: Optional[str] = None):
+    # Config lee el entorno al importarse: fijar antes de importar la app
+    os.environ['DATA_BACKEND'] = 'postgres' if postgres_url else 'memory'
+    if postgres_url:
+        os.environ['DATABASE_URL'] = postgres_url
+    os.environ['MEMORY_BACKEND_LATENCY_MS'] = str(latency_ms)
+    os.environ['MEMORY_BACKEND_SEED'] = ''
+    os.environ['DEEPSEEK_API_KEY'] = ''  # chatbot solo con reglas, sin red
+    os.environ['SMTP_HOST'] = ''
+
+
+def _login(client, user: Dict[str, Any]):
+    with client.session_transaction() as session:
+        session['user_id'] = user['id']
+        session['email'] = user['email']
+        session['name'] = user['name']
+        session['role'] = user['role']
+
+
+def run(args) -> Dict[str, Any]:
+    _setup_env(args.latency_ms, args.postgres_url)
+
+    from app import create_app
+    from app.repositories.supabase.client import get_supabase_client
+    from benchmarks.seed import build_dataset, with_uuid_ids
+
+    db = get_supabase_client().db
+    db.reset()
+    dataset = build_dataset(
+        n_spaces=args.spaces,
+        n_users=args.users,
+        n_reservations=args.reservations,
+        weeks=args.weeks,
+        seed=args.seed,
+    )
+    if args.postgres_url:
+        dataset = with_uuid_ids(dataset)
+    db.load(dataset)
+
+    app = create_app()
+    app.config['TESTING'] = True
+    rnd = random.Random(args.seed)
+    users = [u for u in dataset['users'] if u['role'] == 'user']
+    admin = next(u for u in dataset['users'] if u['role'] == 'admin')
+    spaces = dataset['spaces']
+    today = date.today()
+
+    user_client = app.test_client()
+    admin_client = app.test_client()
+    _login(admin_client, admin)
+
+    def reserve():
+        _login(user_client, rnd.choice(users))
+        start = rnd.randrange(7, 20)
+        return user_client.post('/user/reserve', data={
+            'space_id': rnd.choice(spaces)['id'],
+            'date': (today + timedelta(days=rnd.randrange(1, args.weeks * 7))).isoformat(),
+            'start_time': f"{start:02d}:00",
+            'end_time': f"{start + 1:02d}:00",
+            'justification': 'Benchmark',
+        })
+
+    def calendar():
+        _login(user_client, rnd.choice(users))
+        return user_client.get('/user/api/reservations')
+
+    def dashboard():
+        return admin_client.get('/admin/dashboard')
+
+    def chatbot():
+        _login(user_client, rnd.choice(users))
+        return user_client.post('/user/chatbot/query', json={'question': rnd.choice(CHATBOT_QUESTIONS)})
+
+    def unread_count():
+        _login(user_client, rnd.choice(users))
+        return user_client.get('/notifications/api/unread_count')
+
+    scenarios: Dict[str, Callable] = {
+        'reserve': reserve,
+        'calendar': calendar,
+        'admin_dashboard': dashboard,
+        'chatbot': chatbot,
+        'unread_count': unread_count,
+    }
+    if args.only:
+        scenarios = {k: v for k, v in scenarios.items() if k in args.only}
+
+    results = {}
+    for name, fn in scenarios.items():
+        for _ in range(args.warmup):
+            fn()
+        samples = []
+        for _ in range(args.iterations):
+            calls_before = db.calls
+            t0 = time.perf_counter()
+            response = fn()
+            elapsed = (time.perf_counter() - t0) * 1000
+            samples.append({
+                'ms': elapsed,
+                'queries': db.calls - calls_before,
+                'bytes': len(response.get_data()),
+                'status': response.status_code,
+            })
+        results[name] = summarize(samples)
+        print(f"{name:16s} p50={results[name]['p50_ms']:.2f}ms p95={results[name]['p95_ms']:.2f}ms "
+              f"p99={results[name]['p99_ms']:.2f}ms q/req={results[name]['queries_per_request']} "
+              f"bytes={results[name]['bytes_per_request']}")
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'latency_ms': args.latency_ms,
+            'backend': 'postgres' if args.postgres_url else 'memory',
+            'dataset': {table: len(rows) for table, rows in dataset.items()},
+        },
+        'scenarios': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Imprime las diferencias contra una corrida previa. False si alguna p95 empeora más del umbral."""
+    with open(baseline_path, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    ok = True
+    for name, cur in current['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        delta = (cur['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        flag = ''
+        if delta > threshold:
+            flag = '  <-- regresión'
+            ok = False
+        print(f"{name:16s} p95 {base['p95_ms']:.2f} -> {cur['p95_ms']:.2f} ms ({delta:+.1%}) "
+              f"q/req {base['queries_per_request']} -> {cur['queries_per_request']}{flag}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark E2E de ReservasPuce (backend en memoria o Postgres)')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia simulada por consulta')
+    parser.add_argument('--spaces', type=int, default=100)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--reservations', type=int, default=5000)
+    parser.add_argument('--weeks', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='*', help='Escenarios a ejecutar')
+    parser.add_argument('--postgres-url', help='Postgres con app/scripts/01-03 aplicados; '
+                                               'VACÍA sus tablas antes de sembrar')
+    parser.add_argument('--output', default='benchmarks/results/e2e.json')
+    parser.add_argument('--compare', help='JSON de una corrida anterior')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Regresión tolerada en p95 (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare and not compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Microbenchmarks de las funciones puras que corren en cada petición.
+
+Cada caso se mide con entradas sintéticas de varios tamaños; los repositorios se sustituyen
+por listas fijas para que solo cuente el CPU de la función. Reporta ops/seg (mejor de
+--repeat corridas) y memoria (pico y retenida por llamada, vía tracemalloc).
+
+Uso:
+  python -m benchmarks.micro
+  python -m benchmarks.micro --only check_overlap calendar_events --output benchmarks/results/micro.json
+  python -m benchmarks.micro --compare benchmarks/results/micro-base.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, '.')
+
+SIZES = [10, 100, 1000]
+
+PARSE_DATE_INPUTS = [
+    "hoy", "mañana", "pasado mañana", "el lunes", "el viernes próximo",
+    "15 de marzo", "3 de dic", "2026-05-20", "20/05/2026", "sin fecha en el texto",
+]
+
+CHATBOT_QUESTIONS = [
+    "¿Qué espacios están libres hoy?",
+    "capacidad del A-150",
+    "ocupación del A-101 mañana",
+    "laboratorios libres en el piso 2",
+    "ayuda",
+    "¿el auditorio está ocupado el viernes?",
+]
+
+
+class _FixedRows:
+    """Sustituye a un repositorio/servicio devolviendo siempre las mismas filas."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+
+    def get_all_spaces(self) -> List[Dict[str, Any]]:
+        return [dict(r) for r in self.rows]
+
+    def get_schedules(self, space_id=None, weekday=None) -> List[Dict[str, Any]]:
+        return self.rows
+
+    def get_reservations_by_space_and_date(self, space_id, date_str) -> List[Dict[str, Any]]:
+        return self.rows
+
+
+def _time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def _intervals(n: int, with_status: bool = False) -> List[Dict[str, Any]]:
+    """n intervalos de 30 min repartidos (con solapes) entre 07:00 y 22:00."""
+    rows = []
+    for i in range(n):
+        start = 7 * 60 + (i * 37) % (14 * 60)
+        row = {"id": f"row-{i}", "start_time": _time(start), "end_time": _time(start + 30)}
+        if with_status:
+            row["status"] = "approved" if i % 3 else "pending"
+        rows.append(row)
+    return rows
+
+
+def _spaces(n: int) -> List[Dict[str, Any]]:
+    floors = ["planta_baja", "piso_1", "piso_2", None]
+    prefixes = {"planta_baja": "A-0", "piso_1": "A-1", "piso_2": "A-2", None: "B-"}
+    return [
+        {
+            "id": f"space-{i}",
+            "name": f"{prefixes[floors[i % 4]]}{i:02d}",
+            "type": "laboratorio" if i % 5 == 0 else "aula",
+            "floor": floors[i % 4],
+            "capacity": 30,
+        }
+        for i in range(n)
+    ]
+
+
+def _calendar_rows(n: int) -> List[Dict[str, Any]]:
+    today = date.today()
+    rows = []
+    for i, interval in enumerate(_intervals(n, with_status=True)):
+        interval.update({
+            "space_id": f"space-{i % 50}",
+            "date": (today + timedelta(days=i % 120)).isoformat(),
+            "justification": "Reserva de prueba",
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "spaces": {"name": f"A-1{i % 50:02d}", "type": "aula", "floor": "piso_1"},
+            "users": {"name": f"Usuario {i}"},
+        })
+        rows.append(interval)
+    return rows
+
+
+def build_cases(app) -> Dict[str, Callable[[int], Callable[[], Any]]]:
+    """Cada caso recibe el tamaño y retorna la función (sin argumentos) a medir."""
+    from app.models.reservation import Reservation
+    from app.routes.user_routes import _format_calendar_events
+    from app.services.chatbot_service import ChatbotService
+    from app.services.class_schedule_service import ClassScheduleService
+    from app.services.space_service import SpaceService
+
+    schedule_service = ClassScheduleService()
+    space_service = SpaceService()
+    chatbot = ChatbotService()
+
+    def check_overlap(n):
+        schedules = _intervals(n)
+        # Franja que no choca: recorre toda la lista (peor caso)
+        return lambda: schedule_service._check_overlap(schedules, "22:00", "23:00", exclude_id="row-0")
+
+    def occupancy(n):
+        chatbot.class_schedule_service = _FixedRows(_intervals(n))
+        chatbot.reservation_service = _FixedRows(_intervals(n, with_status=True))
+        day = date.today().isoformat()
+        return lambda: chatbot._get_occupancy("space-0", day)
+
+    def parse_date(n):
+        texts = (PARSE_DATE_INPUTS * (n // len(PARSE_DATE_INPUTS) + 1))[:n]
+        return lambda: [chatbot._parse_date(t) for t in texts]
+
+    def resolve_intent(n):
+        chatbot.space_service = _FixedRows(_spaces(n))
+
+        def run():
+            with app.app_context():
+                return [chatbot._resolve_intent_and_slots(q, {}) for q in CHATBOT_QUESTIONS]
+        return run
+
+    def spaces_grouped(n):
+        space_service.space_repo = _FixedRows(_spaces(n))
+        return space_service.get_spaces_grouped_by_floor
+
+    def calendar_events(n):
+        rows = _calendar_rows(n)
+        return lambda: _format_calendar_events(Reservation.from_rows(rows))
+
+    return {
+        "check_overlap": check_overlap,
+        "occupancy_free_blocks": occupancy,
+        "parse_date": parse_date,
+        "resolve_intent_rule_based": resolve_intent,
+        "spaces_grouped_by_floor": spaces_grouped,
+        "calendar_events": calendar_events,
+    }
+
+
+def measure(fn: Callable[[], Any], min_time: float, repeat: int) -> Dict[str, Any]:
+    # Calibrar el número de llamadas para que cada corrida dure al menos min_time
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time * 1.1 / max(elapsed, 1e-9)))
+
+    best = number / elapsed
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = max(best, number / (time.perf_counter() - t0))
+
+    tracemalloc.start()
+    fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_per_sec": round(best, 1),
+        "us_per_op": round(1e6 / best, 3),
+        "peak_kb": round(peak / 1024, 2),
+        "retained_kb": round(retained / 1024, 2),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    os.environ['DATA_BACKEND'] = 'memory'
+    os.environ['MEMORY_BACKEND_LATENCY_MS'] = '0'
+    os.environ['DEEPSEEK_API_KEY'] = ''
+
+    from app import create_app
+
+    app = create_app()
+    cases = build_cases(app)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if k in args.only}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, factory in cases.items():
+        results[name] = {}
+        for size in args.sizes:
+            stats = measure(factory(size), args.min_time, args.repeat)
+            results[name][str(size)] = stats
+            print(f"{name:28s} n={size:<6d} {stats['ops_per_sec']:>12.1f} ops/s "
+                  f"{stats['us_per_op']:>10.2f} us/op peak={stats['peak_kb']}KB")
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'min_time': args.min_time,
+            'repeat': args.repeat,
+        },
+        'cases': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Compara ops/seg contra una corrida previa. False si alguna cae más del umbral."""
+    with open(baseline_path, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    ok = True
+    for name, sizes in current['cases'].items():
+        for size, cur in sizes.items():
+            base = baseline.get('cases', {}).get(name, {}).get(size)
+            if not base or not base['ops_per_sec']:
+                continue
+            delta = (cur['ops_per_sec'] - base['ops_per_sec']) / base['ops_per_sec']
+            flag = ''
+            if delta < -threshold:
+                flag = '  <-- regresión'
+                ok = False
+            print(f"{name:28s} n={size:<6s} {base['ops_per_sec']:.1f} -> {cur['ops_per_sec']:.1f} ops/s ({delta:+.1%}){flag}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Microbenchmarks de funciones puras de ReservasPuce')
+    parser.add_argument('--sizes', type=int, nargs='*', default=SIZES)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Segundos mínimos por corrida')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='Casos a ejecutar')
+    parser.add_argument('--output', default='benchmarks/results/micro.json')
+    parser.add_argument('--compare', help='JSON de una corrida anterior')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Caída tolerada de ops/seg (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare and not compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Datos sintéticos con volúmenes realistas para los benchmarks.
+
+Genera ~100 espacios repartidos en los tres pisos, usuarios, un semestre completo de
+horarios de clases (lunes a viernes) y miles de reservas sin solapamientos por espacio
+y día. Todo es determinista para una misma semilla.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+FLOORS = ["planta_baja", "piso_1", "piso_2"]
+FLOOR_PREFIX = {"planta_baja": "A-0", "piso_1": "A-1", "piso_2": "A-2"}
+# Bloques de una hora entre 07:00 y 21:00
+SLOTS = [(h, h + 1) for h in range(7, 21)]
+PASSWORD_HASH = "pbkdf2:sha256:600000$bench$" + "0" * 64
+
+
+# Columnas con ids sintéticos ('user-0', 'space-3') que Postgres guarda como UUID
+ID_COLUMNS = ("id", "user_id", "space_id", "admin_id")
+
+
+def _time(hour: int) -> str:
+    return f"{hour:02d}:00:00"
+
+
+def build_dataset(
+    n_spaces: int = 100,
+    n_users: int = 300,
+    n_reservations: int = 5000,
+    weeks: int = 16,
+    classes_per_day: int = 4,
+    start: date = None,
+    seed: int = 42,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Retorna {tabla: [filas]} listo para MemoryDatabase.load()."""
+    rnd = random.Random(seed)
+    start = start or date.today()
+
+    users = [
+        {
+            "id": "admin-0",
+            "email": "admin@bench.local",
+            "password_hash": PASSWORD_HASH,
+            "name": "Admin Bench",
+            "student_id": "ADMIN0",
+            "role": "admin",
+            "email_verified": True,
+        }
+    ]
+    for i in range(n_users):
+        users.append({
+            "id": f"user-{i}",
+            "email": f"user{i}@bench.local",
+            "password_hash": PASSWORD_HASH,
+            "name": f"Usuario {i}",
+            "student_id": f"S{i:05d}",
+            "role": "user",
+            "email_verified": True,
+            "verification_code": f"{rnd.randint(0, 999999):06d}",
+        })
+
+    spaces = []
+    for i in range(n_spaces):
+        floor = FLOORS[i % len(FLOORS)]
+        kind = "laboratorio" if i % 7 == 0 else ("auditorio" if i % 25 == 0 else "aula")
+        spaces.append({
+            "id": f"space-{i}",
+            "name": f"{FLOOR_PREFIX[floor]}{i:02d}",
+            "type": kind,
+            "lab_category": "computacion" if kind == "laboratorio" else None,
+            "floor": floor,
+            "capacity": rnd.choice([20, 30, 40, 60, 120]),
+            "description": f"Espacio de prueba {i}",
+        })
+
+    # Horario de clases: bloques fijos por espacio y día laborable
+    schedules = []
+    busy_by_weekday: Dict[tuple, set] = {}
+    for space in spaces:
+        for weekday in range(5):
+            slots = rnd.sample(range(len(SLOTS)), classes_per_day)
+            busy_by_weekday[(space["id"], weekday)] = set(slots)
+            for s in slots:
+                begin, end = SLOTS[s]
+                schedules.append({
+                    "space_id": space["id"],
+                    "weekday": weekday,
+                    "start_time": _time(begin),
+                    "end_time": _time(end),
+                    "description": f"Clase {space['name']}",
+                })
+
+    # Reservas sobre bloques libres (sin solapes por espacio/día)
+    reservations = []
+    taken: Dict[tuple, set] = {}
+    days = weeks * 7
+    attempts = 0
+    while len(reservations) < n_reservations and attempts < n_reservations * 20:
+        attempts += 1
+        space = rnd.choice(spaces)
+        day = start + timedelta(days=rnd.randrange(days))
+        slot = rnd.randrange(len(SLOTS))
+        key = (space["id"], day)
+        if slot in busy_by_weekday.get((space["id"], day.weekday()), ()) or slot in taken.get(key, ()):
+            continue
+        taken.setdefault(key, set()).add(slot)
+        begin, end = SLOTS[slot]
+        reservations.append({
+            "user_id": f"user-{rnd.randrange(n_users)}",
+            "space_id": space["id"],
+            "date": day.isoformat(),
+            "start_time": _time(begin),
+            "end_time": _time(end),
+            "justification": "Reserva de prueba para benchmark",
+            "status": rnd.choices(["approved", "pending", "rejected"], weights=[6, 3, 1])[0],
+        })
+
+    notifications = []
+    for i in range(n_users * 3):
+        notifications.append({
+            "user_id": f"user-{i % n_users}",
+            "title": "Reserva aprobada",
+            "message": "Tu reserva fue aprobada.",
+            "type": "success",
+            "read": i % 2 == 0,
+        })
+
+    return {
+        "users": users,
+        "spaces": spaces,
+        "class_schedules": schedules,
+        "reservations": reservations,
+        "notifications": notifications,
+    }
+
+
+def with_uuid_ids(dataset: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Copia del dataset con los ids sintéticos convertidos a UUID (deterministas) para Postgres."""
+    def convert(value: Any) -> Any:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"reservaspuce:{value}")) if value else value
+
+    return {
+        table: [{k: convert(v) if k in ID_COLUMNS else v for k, v in row.items()} for row in rows]
+        for table, rows in dataset.items()
+    }
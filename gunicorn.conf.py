@@ -0,0 +1,34 @@
+"""
+Configuración de gunicorn (Procfile / render.yaml: ``gunicorn -c gunicorn.conf.py run:app``).
+
+Por defecto usa workers ``gthread``: cada worker atiende GUNICORN_THREADS peticiones a la vez,
+así una llamada lenta a DeepSeek, SMTP o Supabase no bloquea el worker completo. Con
+``GUNICORN_WORKER_CLASS=gevent`` (requiere ``pip install gevent``) cada worker usa greenlets
+y atiende hasta GUNICORN_WORKER_CONNECTIONS peticiones. ``sync`` mantiene el modo anterior.
+
+Un solo proceso por defecto: la concurrencia viene de los hilos/greenlets y el plan free de
+Render no tiene memoria para varias copias de la app. WEB_CONCURRENCY sube el número de procesos.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Con threads > 1 gunicorn convierte sync en gthread: solo aplica a gthread
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# DeepSeek puede tardar ~10 s; el timeout debe cubrir la petición más lenta esperada
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 20))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Reciclar workers de vez en cuando acota cualquier crecimiento de memoria
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Los logs de la app ya salen como JSON por stdout (app/logging_setup.py)
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'